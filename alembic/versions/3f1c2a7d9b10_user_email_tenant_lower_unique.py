@@ -0,0 +1,67 @@
+"""Unique case-insensitive email per tenant on user_details
+
+Replaces the plain index on user_details.email with a unique index on
+(tenant_id, lower(email)) plus an index on lower(email) for logins that
+don't name a tenant. Existing rows that differ only by email case within
+a tenant must be merged before upgrading.
+
+Revision ID: 3f1c2a7d9b10
+Revises:
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction; keeps user_details writable
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_user_details_tenant_email_lower',
+            'user_details',
+            ['tenant_id', sa.text('lower(email)')],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_user_details_email_lower',
+            'user_details',
+            [sa.text('lower(email)')],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_user_details_email',
+            table_name='user_details',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_user_details_email',
+            'user_details',
+            ['email'],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_user_details_email_lower',
+            table_name='user_details',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'uq_user_details_tenant_email_lower',
+            table_name='user_details',
+            postgresql_concurrently=True,
+        )
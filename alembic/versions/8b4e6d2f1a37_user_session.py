@@ -0,0 +1,40 @@
+"""Refresh-token sessions
+
+Revision ID: 8b4e6d2f1a37
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e6d2f1a37'
+down_revision: Union[str, None] = '3f1c2a7d9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_session',
+        sa.Column('session_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('user_details.user_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('refresh_token_hash', sa.String(length=64), nullable=False, unique=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_user_session_user_id', 'user_session', ['user_id'])
+    op.create_index('ix_user_session_revoked_at', 'user_session', ['revoked_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_session_revoked_at', table_name='user_session')
+    op.drop_index('ix_user_session_user_id', table_name='user_session')
+    op.drop_table('user_session')
@@ -0,0 +1,29 @@
+"""Attribute conditions on grants
+
+Revision ID: a7e2b4c9d613
+Revises: f6c3d8a2e417
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e2b4c9d613'
+down_revision: Union[str, None] = 'f6c3d8a2e417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable, no default: metadata-only change
+    op.add_column('permission_user_mapping', sa.Column('condition', sa.Text(), nullable=True))
+    op.add_column('role_permission_mapping', sa.Column('condition', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('role_permission_mapping', 'condition')
+    op.drop_column('permission_user_mapping', 'condition')
@@ -0,0 +1,37 @@
+"""Permission module for subscription gating
+
+Revision ID: b5c1e8f2a4d7
+Revises: a7e2b4c9d613
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c1e8f2a4d7'
+down_revision: Union[str, None] = 'a7e2b4c9d613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing permissions stay core (NULL module) and keep working for every tenant
+    op.add_column('permission_master', sa.Column('module_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'permission_master_module_id_fkey',
+        'permission_master', 'module_master',
+        ['module_id'], ['module_id'],
+        ondelete='SET NULL'
+    )
+    op.create_index(op.f('ix_permission_master_module_id'), 'permission_master', ['module_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_permission_master_module_id'), table_name='permission_master')
+    op.drop_constraint('permission_master_module_id_fkey', 'permission_master', type_='foreignkey')
+    op.drop_column('permission_master', 'module_id')
@@ -0,0 +1,68 @@
+"""Materialized effective permissions
+
+Revision ID: c52e9a1d7f04
+Revises: 8b4e6d2f1a37
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52e9a1d7f04'
+down_revision: Union[str, None] = '8b4e6d2f1a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_effective_permission',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('user_details.user_id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('permission_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('permission_master.permission_id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+    )
+    op.create_index('ix_user_effective_permission_permission_id', 'user_effective_permission', ['permission_id'])
+
+    # Initial fill; afterwards the services keep it current
+    # (python -m app.cli rebuild-effective-permissions does the same)
+    op.execute("""
+        INSERT INTO user_effective_permission (user_id, permission_id)
+        SELECT DISTINCT g.user_id, g.permission_id
+        FROM (
+            SELECT pum.user_id, pum.permission_id
+            FROM permission_user_mapping pum
+            WHERE pum.is_active
+            UNION ALL
+            SELECT urm.user_id, rpm.permission_id
+            FROM user_role_mapping urm
+            JOIN role_master r ON r.role_id = urm.role_id
+            JOIN role_permission_mapping rpm ON rpm.role_id = r.role_id
+            WHERE urm.is_active AND r.is_active AND rpm.is_active
+            UNION ALL
+            SELECT gum.user_id, gpm.permission_id
+            FROM group_user_mapping gum
+            JOIN group_master gm ON gm.group_id = gum.group_id
+            JOIN group_permission_mapping gpm ON gpm.group_id = gm.group_id
+            WHERE gum.is_active AND gm.is_active AND gpm.is_active
+            UNION ALL
+            SELECT gum.user_id, rpm.permission_id
+            FROM group_user_mapping gum
+            JOIN group_master gm ON gm.group_id = gum.group_id
+            JOIN group_role_mapping grm ON grm.group_id = gm.group_id
+            JOIN role_master r ON r.role_id = grm.role_id
+            JOIN role_permission_mapping rpm ON rpm.role_id = r.role_id
+            WHERE gum.is_active AND gm.is_active AND grm.is_active AND r.is_active AND rpm.is_active
+        ) g
+        JOIN permission_master p ON p.permission_id = g.permission_id
+        WHERE p.is_active
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_effective_permission_permission_id', table_name='user_effective_permission')
+    op.drop_table('user_effective_permission')
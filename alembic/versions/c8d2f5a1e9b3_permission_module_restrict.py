@@ -0,0 +1,38 @@
+"""Keep module permissions gated when their module is deleted
+
+Revision ID: c8d2f5a1e9b3
+Revises: b5c1e8f2a4d7
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d2f5a1e9b3'
+down_revision: Union[str, None] = 'b5c1e8f2a4d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SET NULL would turn a deleted module's permissions into core ones for every tenant
+    op.drop_constraint('permission_master_module_id_fkey', 'permission_master', type_='foreignkey')
+    op.create_foreign_key(
+        'permission_master_module_id_fkey',
+        'permission_master', 'module_master',
+        ['module_id'], ['module_id'],
+        ondelete='RESTRICT'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('permission_master_module_id_fkey', 'permission_master', type_='foreignkey')
+    op.create_foreign_key(
+        'permission_master_module_id_fkey',
+        'permission_master', 'module_master',
+        ['module_id'], ['module_id'],
+        ondelete='SET NULL'
+    )
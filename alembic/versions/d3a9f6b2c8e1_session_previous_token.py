@@ -0,0 +1,28 @@
+"""Remember each session's previous refresh token to detect reuse
+
+Revision ID: d3a9f6b2c8e1
+Revises: c8d2f5a1e9b3
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a9f6b2c8e1'
+down_revision: Union[str, None] = 'c8d2f5a1e9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_session', sa.Column('previous_token_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_user_session_previous_token_hash', 'user_session', ['previous_token_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_session_previous_token_hash', table_name='user_session')
+    op.drop_column('user_session', 'previous_token_hash')
@@ -0,0 +1,66 @@
+"""Reverse-lookup indexes for who-can queries
+
+Partial (is_active) composite indexes that let a permission be walked
+back to its users through every grant path, plus (tenant_id, user_id)
+on user_details for tenant-scoped keyset pagination.
+
+Revision ID: d81f3b6c2e95
+Revises: c52e9a1d7f04
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f3b6c2e95'
+down_revision: Union[str, None] = 'c52e9a1d7f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ACTIVE_INDEXES = [
+    ('ix_permission_user_mapping_permission_user_active', 'permission_user_mapping', ['permission_id', 'user_id']),
+    ('ix_role_permission_mapping_permission_role_active', 'role_permission_mapping', ['permission_id', 'role_id']),
+    ('ix_user_role_mapping_role_user_active', 'user_role_mapping', ['role_id', 'user_id']),
+    ('ix_group_permission_mapping_permission_group_active', 'group_permission_mapping', ['permission_id', 'group_id']),
+    ('ix_group_role_mapping_role_group_active', 'group_role_mapping', ['role_id', 'group_id']),
+    ('ix_group_user_mapping_group_user_active', 'group_user_mapping', ['group_id', 'user_id']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction; keeps the mapping tables writable
+    with op.get_context().autocommit_block():
+        for name, table, columns in ACTIVE_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text('is_active'),
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            'ix_user_details_tenant_user',
+            'user_details',
+            ['tenant_id', 'user_id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_user_details_tenant_user',
+            table_name='user_details',
+            postgresql_concurrently=True,
+        )
+        for name, table, _ in reversed(ACTIVE_INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+            )
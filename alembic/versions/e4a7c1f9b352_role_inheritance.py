@@ -0,0 +1,55 @@
+"""Role inheritance with a transitive closure table
+
+Revision ID: e4a7c1f9b352
+Revises: d81f3b6c2e95
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c1f9b352'
+down_revision: Union[str, None] = 'd81f3b6c2e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'role_inheritance',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('parent_role_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('role_master.role_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('child_role_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('role_master.role_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('assigned_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        sa.UniqueConstraint('parent_role_id', 'child_role_id', name='uq_role_inheritance'),
+    )
+    op.create_index('ix_role_inheritance_parent_role_id', 'role_inheritance', ['parent_role_id'])
+    op.create_index('ix_role_inheritance_child_role_id', 'role_inheritance', ['child_role_id'])
+
+    op.create_table(
+        'role_closure',
+        sa.Column('ancestor_role_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('role_master.role_id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('descendant_role_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('role_master.role_id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('path_count', sa.Integer(), nullable=False, server_default='1'),
+    )
+    op.create_index('ix_role_closure_descendant_ancestor', 'role_closure', ['descendant_role_id', 'ancestor_role_id'])
+
+    # No edges exist yet, so the closure is just the self rows
+    op.execute("""
+        INSERT INTO role_closure (ancestor_role_id, descendant_role_id, path_count)
+        SELECT role_id, role_id, 1 FROM role_master
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_role_closure_descendant_ancestor', table_name='role_closure')
+    op.drop_table('role_closure')
+    op.drop_index('ix_role_inheritance_child_role_id', table_name='role_inheritance')
+    op.drop_index('ix_role_inheritance_parent_role_id', table_name='role_inheritance')
+    op.drop_table('role_inheritance')
@@ -0,0 +1,27 @@
+"""Tenant authorization version
+
+Revision ID: f6c3d8a2e417
+Revises: e4a7c1f9b352
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6c3d8a2e417'
+down_revision: Union[str, None] = 'e4a7c1f9b352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Constant default: no table rewrite on PostgreSQL 11+
+    op.add_column('tenant_master', sa.Column('authz_version', sa.BigInteger(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('tenant_master', 'authz_version')
@@ -0,0 +1,171 @@
+from typing import Callable, Optional
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import get_db
+from app.models.group import GroupMaster
+from app.models.role import RoleMaster
+from app.models.user import UserDetails
+from app.schemas.group import GroupCreate, AssignUserToGroup, AssignRoleToGroup, AssignPermissionToGroup
+from app.schemas.role import RoleCreate, AssignRoleToUser, RoleInheritanceCreate
+from app.schemas.user import Principal
+from app.services.auth_service import AuthService
+from app.services.permission_service import PermissionService
+from app.services.session_service import revocation_filter
+from app.utils.permission_matcher import PermissionMatcher
+
+settings = get_settings()
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def client_ip(request: Request) -> Optional[str]:
+    """The caller's address: the last hop the trusted proxy recorded, else the peer"""
+    if settings.TRUSTED_PROXY_IP_HEADER:
+        forwarded = request.headers.get(settings.TRUSTED_PROXY_IP_HEADER)
+        if forwarded:
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else None
+
+def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Resolve the authenticated principal from the bearer token"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    if credentials is None:
+        raise credentials_exception
+
+    claims = AuthService.get_token_claims(credentials.credentials)
+    if not claims or not claims.get("sub"):
+        raise credentials_exception
+
+    try:
+        user_id = UUID(claims["sub"])
+    except ValueError:
+        raise credentials_exception
+
+    # Tokens tied to a refresh session die with it (logout / revocation)
+    session_id = claims.get("sid")
+    if session_id:
+        try:
+            session_id = UUID(session_id)
+        except ValueError:
+            raise credentials_exception
+
+        if revocation_filter.is_revoked(db, session_id):
+            raise credentials_exception
+
+    principal = AuthService.get_principal(db, user_id)
+    if not principal:
+        raise credentials_exception
+
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User is inactive"
+        )
+
+    return principal
+
+def get_granted_permissions(request: Request, principal: Principal, db: Session) -> PermissionMatcher:
+    """Caller's compiled permission matcher, resolved once per request"""
+    granted = getattr(request.state, "granted_permissions", None)
+    if granted is None:
+        # Served from the process-level matcher cache when warm
+        granted = PermissionService.get_users_matchers(db, [principal.user_id])[principal.user_id]
+        request.state.granted_permissions = granted
+    return granted
+
+# Tenant scopes: route dependencies resolving the tenant a request targets.
+# None means the target does not exist; the route then answers 404 itself.
+# Body scopes declare the same parameter name as the route so the body is parsed once.
+
+def tenant_in_path(tenant_id: UUID) -> UUID:
+    return tenant_id
+
+def listed_tenant(tenant_id: Optional[UUID] = None) -> Optional[UUID]:
+    return tenant_id
+
+def role_tenant(role_id: UUID, db: Session = Depends(get_db)) -> Optional[UUID]:
+    return db.query(RoleMaster.tenant_id).filter(RoleMaster.role_id == role_id).scalar()
+
+def child_role_tenant(child_role_id: UUID, db: Session = Depends(get_db)) -> Optional[UUID]:
+    return role_tenant(child_role_id, db)
+
+def group_tenant(group_id: UUID, db: Session = Depends(get_db)) -> Optional[UUID]:
+    return db.query(GroupMaster.tenant_id).filter(GroupMaster.group_id == group_id).scalar()
+
+def user_tenant(user_id: UUID, db: Session = Depends(get_db)) -> Optional[UUID]:
+    return db.query(UserDetails.tenant_id).filter(UserDetails.user_id == user_id).scalar()
+
+def role_create_tenant(role_data: RoleCreate) -> UUID:
+    return role_data.tenant_id
+
+def group_create_tenant(group_data: GroupCreate) -> UUID:
+    return group_data.tenant_id
+
+def role_assignment_tenant(assignment: AssignRoleToUser, db: Session = Depends(get_db)) -> Optional[UUID]:
+    return role_tenant(assignment.role_id, db)
+
+def inheritance_tenant(inheritance: RoleInheritanceCreate, db: Session = Depends(get_db)) -> Optional[UUID]:
+    return role_tenant(inheritance.child_role_id, db)
+
+def group_user_assignment_tenant(assignment: AssignUserToGroup, db: Session = Depends(get_db)) -> Optional[UUID]:
+    return group_tenant(assignment.group_id, db)
+
+def group_role_assignment_tenant(assignment: AssignRoleToGroup, db: Session = Depends(get_db)) -> Optional[UUID]:
+    return group_tenant(assignment.group_id, db)
+
+def group_permission_assignment_tenant(assignment: AssignPermissionToGroup, db: Session = Depends(get_db)) -> Optional[UUID]:
+    return group_tenant(assignment.group_id, db)
+
+def _unscoped() -> None:
+    return None
+
+def require_permission(resource: str, action: str, scope: Optional[Callable[..., Optional[UUID]]] = None) -> Callable:
+    """Route dependency rejecting callers without the permission (no-op unless ENFORCE_AUTHORIZATION).
+
+    With a scope, the permission only counts inside the caller's own tenant:
+    a target the scope resolves to another tenant is rejected with 403.
+    """
+    if not settings.ENFORCE_AUTHORIZATION:
+        def allow_all() -> None:
+            return None
+        return allow_all
+
+    def check_permission(
+        request: Request,
+        principal: Principal = Depends(get_current_user),
+        target_tenant_id: Optional[UUID] = Depends(scope or _unscoped),
+        db: Session = Depends(get_db)
+    ) -> Principal:
+        granted = get_granted_permissions(request, principal, db)
+        context = None
+        if granted.conditional:
+            # Route-level checks know the caller, not the target resource; resource.* conditions fail closed
+            context = PermissionService.condition_context(
+                principal.user_id,
+                {"request": {"ip": client_ip(request)}}
+            )
+        if not granted.allows(resource, action, context):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Missing permission {resource}:{action}"
+            )
+        if target_tenant_id is not None and target_tenant_id != principal.tenant_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Permission {resource}:{action} does not extend to other tenants"
+            )
+        return principal
+
+    return check_permission
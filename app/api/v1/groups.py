@@ -4,12 +4,16 @@ from typing import List, Optional
 from uuid import UUID
 
 from app.database import get_db
+from app.api.deps import (
+    require_permission, listed_tenant, group_tenant, user_tenant, group_create_tenant,
+    group_user_assignment_tenant, group_role_assignment_tenant, group_permission_assignment_tenant
+)
 from app.schemas.group import (
     GroupCreate, GroupUpdate, GroupResponse,
     AssignUserToGroup, AssignRoleToGroup, AssignPermissionToGroup,
     GroupUserMappingResponse, GroupRoleMappingResponse, GroupPermissionMappingResponse
 )
-from app.schemas.user import UserResponse
+from app.schemas.user import UserResponse, Principal
 from app.schemas.role import RoleResponse
 from app.schemas.permission import PermissionResponse
 from app.schemas.common import ResponseBase
@@ -18,7 +22,7 @@ from app.services.group_service import GroupService
 router = APIRouter()
 
 # ============ GROUP CRUD ============
-@router.post("/", response_model=GroupResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=GroupResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission("groups", "create", scope=group_create_tenant))])
 def create_group(
     group_data: GroupCreate,
     db: Session = Depends(get_db)
@@ -27,7 +31,7 @@ def create_group(
     group = GroupService.create_group(db, group_data)
     return group
 
-@router.get("/{group_id}", response_model=GroupResponse)
+@router.get("/{group_id}", response_model=GroupResponse, dependencies=[Depends(require_permission("groups", "read", scope=group_tenant))])
 def get_group(
     group_id: UUID,
     db: Session = Depends(get_db)
@@ -48,13 +52,17 @@ def list_groups(
     tenant_id: Optional[UUID] = None,
     skip: int = 0,
     limit: int = 100,
+    principal: Optional[Principal] = Depends(require_permission("groups", "read", scope=listed_tenant)),
     db: Session = Depends(get_db)
 ):
     """List all groups"""
+    if principal is not None:
+        # Enforced: callers only list their own tenant
+        tenant_id = principal.tenant_id
     groups = GroupService.get_groups(db, tenant_id=tenant_id, skip=skip, limit=limit)
     return groups
 
-@router.post("/{group_id}/update", response_model=GroupResponse)
+@router.post("/{group_id}/update", response_model=GroupResponse, dependencies=[Depends(require_permission("groups", "update", scope=group_tenant))])
 def update_group(
     group_id: UUID,
     group_data: GroupUpdate,
@@ -64,7 +72,7 @@ def update_group(
     group = GroupService.update_group(db, group_id, group_data)
     return group
 
-@router.post("/{group_id}/delete", response_model=ResponseBase)
+@router.post("/{group_id}/delete", response_model=ResponseBase, dependencies=[Depends(require_permission("groups", "delete", scope=group_tenant))])
 def delete_group(
     group_id: UUID,
     db: Session = Depends(get_db)
@@ -75,7 +83,7 @@ def delete_group(
 
 
 # ============ USER ASSIGNMENTS ============
-@router.post("/assign-user", response_model=GroupUserMappingResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/assign-user", response_model=GroupUserMappingResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission("groups", "assign", scope=group_user_assignment_tenant))])
 def assign_user_to_group(
     assignment: AssignUserToGroup,
     db: Session = Depends(get_db)
@@ -88,7 +96,7 @@ def assign_user_to_group(
     )
     return mapping
 
-@router.post("/remove-user/{group_id}/{user_id}", response_model=ResponseBase)
+@router.post("/remove-user/{group_id}/{user_id}", response_model=ResponseBase, dependencies=[Depends(require_permission("groups", "assign", scope=group_tenant))])
 def remove_user_from_group(
     group_id: UUID,
     user_id: UUID,
@@ -98,7 +106,7 @@ def remove_user_from_group(
     GroupService.remove_user_from_group(db, user_id, group_id)
     return ResponseBase(success=True, message="User removed from group successfully")
 
-@router.get("/{group_id}/users", response_model=List[UserResponse])
+@router.get("/{group_id}/users", response_model=List[UserResponse], dependencies=[Depends(require_permission("groups", "read", scope=group_tenant))])
 def get_group_users(
     group_id: UUID,
     db: Session = Depends(get_db)
@@ -107,7 +115,7 @@ def get_group_users(
     users = GroupService.get_group_users(db, group_id)
     return users
 
-@router.get("/user/{user_id}/groups", response_model=List[GroupResponse])
+@router.get("/user/{user_id}/groups", response_model=List[GroupResponse], dependencies=[Depends(require_permission("groups", "read", scope=user_tenant))])
 def get_user_groups(
     user_id: UUID,
     db: Session = Depends(get_db)
@@ -118,7 +126,7 @@ def get_user_groups(
 
 
 # ============ ROLE ASSIGNMENTS ============
-@router.post("/assign-role", response_model=GroupRoleMappingResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/assign-role", response_model=GroupRoleMappingResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission("groups", "assign", scope=group_role_assignment_tenant))])
 def assign_role_to_group(
     assignment: AssignRoleToGroup,
     db: Session = Depends(get_db)
@@ -131,7 +139,7 @@ def assign_role_to_group(
     )
     return mapping
 
-@router.post("/remove-role/{group_id}/{role_id}", response_model=ResponseBase)
+@router.post("/remove-role/{group_id}/{role_id}", response_model=ResponseBase, dependencies=[Depends(require_permission("groups", "assign", scope=group_tenant))])
 def remove_role_from_group(
     group_id: UUID,
     role_id: UUID,
@@ -141,7 +149,7 @@ def remove_role_from_group(
     GroupService.remove_role_from_group(db, group_id, role_id)
     return ResponseBase(success=True, message="Role removed from group successfully")
 
-@router.get("/{group_id}/roles", response_model=List[RoleResponse])
+@router.get("/{group_id}/roles", response_model=List[RoleResponse], dependencies=[Depends(require_permission("groups", "read", scope=group_tenant))])
 def get_group_roles(
     group_id: UUID,
     db: Session = Depends(get_db)
@@ -152,7 +160,7 @@ def get_group_roles(
 
 
 # ============ PERMISSION ASSIGNMENTS ============
-@router.post("/assign-permission", response_model=GroupPermissionMappingResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/assign-permission", response_model=GroupPermissionMappingResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission("groups", "assign", scope=group_permission_assignment_tenant))])
 def assign_permission_to_group(
     assignment: AssignPermissionToGroup,
     db: Session = Depends(get_db)
@@ -165,7 +173,7 @@ def assign_permission_to_group(
     )
     return mapping
 
-@router.post("/remove-permission/{group_id}/{permission_id}", response_model=ResponseBase)
+@router.post("/remove-permission/{group_id}/{permission_id}", response_model=ResponseBase, dependencies=[Depends(require_permission("groups", "assign", scope=group_tenant))])
 def remove_permission_from_group(
     group_id: UUID,
     permission_id: UUID,
@@ -175,7 +183,7 @@ def remove_permission_from_group(
     GroupService.remove_permission_from_group(db, group_id, permission_id)
     return ResponseBase(success=True, message="Permission removed from group successfully")
 
-@router.get("/{group_id}/permissions", response_model=List[PermissionResponse])
+@router.get("/{group_id}/permissions", response_model=List[PermissionResponse], dependencies=[Depends(require_permission("groups", "read", scope=group_tenant))])
 def get_group_permissions(
     group_id: UUID,
     db: Session = Depends(get_db)
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
+from app import authz
 from app.database import get_db
 from app.schemas.permission import (
     PermissionCreate, PermissionUpdate, PermissionResponse,
-    AssignPermissionToUser, AssignPermissionToRole
+    AssignPermissionToUser, AssignPermissionToRole, PermissionCatalogResponse,
+    EffectivePermissionResponse, PermissionCheckRequest, PermissionCheckResponse,
+    WhoCanResponse
 )
 from app.schemas.common import ResponseBase
 from app.services.permission_service import PermissionService
+from app.services.permission_catalog_service import PermissionCatalogService
 
 router = APIRouter()
 
@@ -22,6 +27,70 @@ def create_permission(
     permission = PermissionService.create_permission(db, permission_data)
     return permission
 
+@router.get("/catalog", response_model=PermissionCatalogResponse)
+def get_permission_catalog(
+    db: Session = Depends(get_db)
+):
+    """Bit positions used by the permission bitmap in access tokens"""
+    catalog = PermissionCatalogService.get_catalog(db)
+    return catalog.to_dict()
+
+@router.post("/check", response_model=PermissionCheckResponse)
+def check_permissions(
+    request: PermissionCheckRequest,
+    db: Session = Depends(get_db)
+):
+    """Batch (user_id, resource, action) checks; each distinct user is resolved once"""
+    results = PermissionService.check_permissions(
+        db,
+        [(check.user_id, check.resource, check.action) for check in request.checks],
+        [check.context for check in request.checks]
+    )
+    return PermissionCheckResponse(results=results)
+
+@router.post(
+    "/check/msgpack",
+    response_class=Response,
+    responses={200: {"content": {authz.MSGPACK_MEDIA_TYPE: {}}, "description": "msgpack array of booleans"}}
+)
+def check_permissions_msgpack(
+    payload: bytes = Body(..., media_type=authz.MSGPACK_MEDIA_TYPE),
+    db: Session = Depends(get_db)
+):
+    """Binary batch check: msgpack [[user_id, resource, action, context?], ...] in, [bool, ...] out"""
+    try:
+        body = authz.check_many_msgpack(payload, db=db)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    return Response(content=body, media_type=authz.MSGPACK_MEDIA_TYPE)
+
+@router.get("/who-can", response_model=WhoCanResponse)
+def who_can(
+    tenant_id: UUID,
+    resource: str,
+    action: str,
+    after: Optional[UUID] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    include_sources: bool = False,
+    format: str = Query("json", pattern="^(json|csv)$"),
+    db: Session = Depends(get_db)
+):
+    """Active users in a tenant who can perform an action on a resource (format=csv streams all of them)"""
+    if format == "csv":
+        permissions = PermissionService.get_covering_permissions(db, resource, action)
+        return StreamingResponse(
+            PermissionService.iter_who_can_csv(tenant_id, [permission.permission_id for permission in permissions]),
+            media_type="text/csv"
+        )
+    
+    return PermissionService.who_can(
+        db, tenant_id, resource, action,
+        after=after, limit=limit, include_sources=include_sources
+    )
+
 @router.get("/{permission_id}", response_model=PermissionResponse)
 def get_permission(
     permission_id: UUID,
@@ -77,7 +146,8 @@ def assign_permission_to_user(
     PermissionService.assign_permission_to_user(
         db,
         assignment.user_id,
-        assignment.permission_id
+        assignment.permission_id,
+        condition=assignment.condition
     )
     return ResponseBase(success=True, message="Permission assigned to user successfully")
 
@@ -90,15 +160,17 @@ def assign_permission_to_role(
     PermissionService.assign_permission_to_role(
         db,
         assignment.role_id,
-        assignment.permission_id
+        assignment.permission_id,
+        condition=assignment.condition
     )
     return ResponseBase(success=True, message="Permission assigned to role successfully")
 
-@router.get("/user/{user_id}/permissions", response_model=List[PermissionResponse])
+@router.get("/user/{user_id}/permissions", response_model=List[EffectivePermissionResponse])
 def get_user_permissions(
     user_id: UUID,
+    include_sources: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Get all permissions for a user (direct + through roles)"""
-    permissions = PermissionService.get_user_permissions(db, user_id)
+    """Get all permissions for a user (direct, roles, groups and group roles)"""
+    permissions = PermissionService.get_user_permissions(db, user_id, include_sources=include_sources)
     return permissions
\ No newline at end of file
@@ -4,17 +4,23 @@ from typing import List, Optional
 from uuid import UUID
 
 from app.database import get_db
+from app.api.deps import (
+    require_permission, listed_tenant, role_tenant, child_role_tenant, user_tenant, role_create_tenant,
+    role_assignment_tenant, inheritance_tenant
+)
 from app.schemas.role import (
     RoleCreate, RoleUpdate, RoleResponse,
-    AssignRoleToUser, UserRoleMappingResponse
+    AssignRoleToUser, UserRoleMappingResponse,
+    RoleInheritanceCreate, RoleInheritanceResponse
 )
 from app.schemas.permission import PermissionResponse
+from app.schemas.user import Principal
 from app.schemas.common import ResponseBase
 from app.services.role_service import RoleService
 
 router = APIRouter()
 
-@router.post("/", response_model=RoleResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=RoleResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission("roles", "create", scope=role_create_tenant))])
 def create_role(
     role_data: RoleCreate,
     db: Session = Depends(get_db)
@@ -23,7 +29,7 @@ def create_role(
     role = RoleService.create_role(db, role_data)
     return role
 
-@router.get("/{role_id}", response_model=RoleResponse)
+@router.get("/{role_id}", response_model=RoleResponse, dependencies=[Depends(require_permission("roles", "read", scope=role_tenant))])
 def get_role(
     role_id: UUID,
     db: Session = Depends(get_db)
@@ -44,13 +50,17 @@ def list_roles(
     tenant_id: Optional[UUID] = None,
     skip: int = 0,
     limit: int = 100,
+    principal: Optional[Principal] = Depends(require_permission("roles", "read", scope=listed_tenant)),
     db: Session = Depends(get_db)
 ):
     """List all roles"""
+    if principal is not None:
+        # Enforced: callers only list their own tenant
+        tenant_id = principal.tenant_id
     roles = RoleService.get_roles(db, tenant_id=tenant_id, skip=skip, limit=limit)
     return roles
 
-@router.post("/{role_id}/update", response_model=RoleResponse)
+@router.post("/{role_id}/update", response_model=RoleResponse, dependencies=[Depends(require_permission("roles", "update", scope=role_tenant))])
 def update_role(
     role_id: UUID,
     role_data: RoleUpdate,
@@ -60,7 +70,7 @@ def update_role(
     role = RoleService.update_role(db, role_id, role_data)
     return role
 
-@router.post("/{role_id}/delete", response_model=ResponseBase)
+@router.post("/{role_id}/delete", response_model=ResponseBase, dependencies=[Depends(require_permission("roles", "delete", scope=role_tenant))])
 def delete_role(
     role_id: UUID,
     db: Session = Depends(get_db)
@@ -69,7 +79,7 @@ def delete_role(
     RoleService.delete_role(db, role_id)
     return ResponseBase(success=True, message="Role deleted successfully")
 
-@router.post("/assign-user", response_model=UserRoleMappingResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/assign-user", response_model=UserRoleMappingResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission("roles", "assign", scope=role_assignment_tenant))])
 def assign_role_to_user(
     assignment: AssignRoleToUser,
     db: Session = Depends(get_db)
@@ -82,7 +92,7 @@ def assign_role_to_user(
     )
     return mapping
 
-@router.post("/remove-user/{user_id}/{role_id}", response_model=ResponseBase)
+@router.post("/remove-user/{user_id}/{role_id}", response_model=ResponseBase, dependencies=[Depends(require_permission("roles", "assign", scope=role_tenant))])
 def remove_role_from_user(
     user_id: UUID,
     role_id: UUID,
@@ -92,11 +102,43 @@ def remove_role_from_user(
     RoleService.remove_role_from_user(db, user_id, role_id)
     return ResponseBase(success=True, message="Role removed from user successfully")
 
-@router.get("/user/{user_id}/roles", response_model=List[RoleResponse])
+@router.get("/user/{user_id}/roles", response_model=List[RoleResponse], dependencies=[Depends(require_permission("roles", "read", scope=user_tenant))])
 def get_user_roles(
     user_id: UUID,
     db: Session = Depends(get_db)
 ):
     """Get all roles for a user"""
     roles = RoleService.get_user_roles(db, user_id)
-    return roles
\ No newline at end of file
+    return roles
+
+@router.post("/inherit", response_model=RoleInheritanceResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission("roles", "update", scope=inheritance_tenant))])
+def add_role_inheritance(
+    inheritance: RoleInheritanceCreate,
+    db: Session = Depends(get_db)
+):
+    """Make a role inherit another role's permissions"""
+    edge = RoleService.add_role_inheritance(
+        db,
+        inheritance.parent_role_id,
+        inheritance.child_role_id
+    )
+    return edge
+
+@router.post("/remove-inheritance/{parent_role_id}/{child_role_id}", response_model=ResponseBase, dependencies=[Depends(require_permission("roles", "update", scope=child_role_tenant))])
+def remove_role_inheritance(
+    parent_role_id: UUID,
+    child_role_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Remove role inheritance"""
+    RoleService.remove_role_inheritance(db, parent_role_id, child_role_id)
+    return ResponseBase(success=True, message="Role inheritance removed successfully")
+
+@router.get("/{role_id}/inherited-roles", response_model=List[RoleResponse], dependencies=[Depends(require_permission("roles", "read", scope=role_tenant))])
+def get_inherited_roles(
+    role_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Get all roles a role inherits from, directly or transitively"""
+    roles = RoleService.get_inherited_roles(db, role_id)
+    return roles
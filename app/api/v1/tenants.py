@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
 from app.database import get_db
-from app.schemas.tenant import TenantCreate, TenantUpdate, TenantResponse
+from app.api.deps import require_permission, tenant_in_path
+from app.schemas.tenant import (
+    TenantCreate, TenantUpdate, TenantResponse, AccessMatrixResponse, SimulationRequest, SimulationResponse,
+    RbacSyncRequest, RbacSyncResponse
+)
 from app.schemas.common import ResponseBase
 from app.services.tenant_service import TenantService
+from app.services.access_review_service import AccessReviewService
+from app.services.access_simulation_service import AccessSimulationService
+from app.services.rbac_sync_service import RbacSyncService
 
 router = APIRouter()
 
@@ -63,3 +71,55 @@ def delete_tenant(
     """Delete tenant (soft delete)"""
     TenantService.delete_tenant(db, tenant_id)
     return ResponseBase(success=True, message="Tenant deleted successfully")
+
+@router.get("/{tenant_id}/access-matrix", response_model=AccessMatrixResponse)
+def get_access_matrix(
+    tenant_id: UUID,
+    format: str = Query("json", pattern="^(json|csv)$"),
+    db: Session = Depends(get_db)
+):
+    """Effective user x permission matrix for access reviews (format=csv streams one row per grant)"""
+    matrix, users, permissions = AccessReviewService.build_access_matrix(db, tenant_id)
+    
+    if format == "csv":
+        return StreamingResponse(
+            AccessReviewService.iter_csv(matrix, users, permissions),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="access-matrix-{tenant_id}.csv"'}
+        )
+    
+    return AccessReviewService.to_response(tenant_id, matrix, users, permissions)
+
+@router.post(
+    "/{tenant_id}/simulate",
+    response_model=SimulationResponse,
+    dependencies=[
+        Depends(require_permission("roles", "assign", scope=tenant_in_path)),
+        Depends(require_permission("groups", "assign", scope=tenant_in_path))
+    ]
+)
+def simulate_changes(
+    tenant_id: UUID,
+    simulation: SimulationRequest,
+    db: Session = Depends(get_db)
+):
+    """Dry run: permissions each user would gain or lose from proposed mapping changes"""
+    return AccessSimulationService.simulate(db, tenant_id, simulation.changes)
+
+@router.post(
+    "/{tenant_id}/rbac-sync",
+    response_model=RbacSyncResponse,
+    response_model_exclude_none=True,
+    dependencies=[
+        Depends(require_permission("roles", "assign", scope=tenant_in_path)),
+        Depends(require_permission("groups", "assign", scope=tenant_in_path))
+    ]
+)
+def sync_rbac(
+    tenant_id: UUID,
+    desired: RbacSyncRequest,
+    dry_run: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Replace the tenant's user-role, group-user, group-role and group-permission edges with the desired set"""
+    return RbacSyncService.sync(db, tenant_id, desired, dry_run=dry_run)
@@ -1,60 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from uuid import UUID
 from datetime import timedelta
 
+from app.api.deps import client_ip
 from app.database import get_db
-from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, Token
+from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, Token, RefreshTokenRequest
 from app.schemas.common import ResponseBase
 from app.services.user_service import UserService
+from app.services.permission_service import PermissionService
+from app.services.session_service import SessionService
 from app.utils.security import create_access_token
+from app.utils.password_hasher import password_hasher, PRIORITY_REGISTER
+from app.utils.rate_limiter import LoginAttemptLimiter
+from app.utils.metrics import register_stats
 from app.config import get_settings
 
 router = APIRouter()
 settings = get_settings()
 
+login_limiter = LoginAttemptLimiter(
+    max_failures_per_email=settings.LOGIN_MAX_FAILURES_PER_EMAIL,
+    max_failures_per_ip=settings.LOGIN_MAX_FAILURES_PER_IP,
+    window_seconds=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+    max_keys=settings.LOGIN_LIMITER_MAX_KEYS
+)
+register_stats("login_limiter", login_limiter.stats)
+
+def _create_user_access_token(db: Session, user, session_id: UUID) -> str:
+    """Access token for a user's refresh session"""
+    token_data = {"sub": str(user.user_id), "email": user.email, "sid": str(session_id)}
+    
+    if settings.ACCESS_TOKEN_PERMISSION_BITMAP:
+        token_data.update(PermissionService.get_permission_claims(db, user.user_id))
+    
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return create_access_token(
+        data=token_data,
+        expires_delta=access_token_expires
+    )
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_data: UserCreate,
     db: Session = Depends(get_db)
 ):
     """Register a new user"""
-    user = UserService.create_user(db, user_data)
+    password_hash = await password_hasher.hash(user_data.password, priority=PRIORITY_REGISTER)
+    user = await run_in_threadpool(UserService.create_user, db, user_data, password_hash)
     return user
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     login_data: UserLogin,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Login user and get access token"""
-    user = UserService.authenticate_user(db, login_data.email, login_data.password)
+    # Emails are unique per tenant, so are their failure budgets
+    email_key = (login_data.tenant_id, login_data.email.lower())
+    caller_ip = client_ip(request) or "unknown"
+    
+    # Shed hammered emails/IPs before any DB lookup or password hashing
+    login_limiter.check(email_key, caller_ip)
+    
+    try:
+        user = await UserService.authenticate_user_async(
+            db, login_data.email, login_data.password, login_data.tenant_id
+        )
+    except Exception:
+        login_limiter.release(email_key, caller_ip)
+        raise
     
     if not user:
+        login_limiter.record_failure()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    login_limiter.record_success(email_key, caller_ip)
+    
     # Update last login
-    from datetime import datetime
-    user.last_login = datetime.utcnow()
-    db.commit()
+    UserService.record_login(user)
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.user_id), "email": user.email},
-        expires_delta=access_token_expires
+    session_id, refresh_token = await run_in_threadpool(SessionService.create_session, db, user.user_id)
+    access_token = await run_in_threadpool(_create_user_access_token, db, user, session_id)
+    
+    return Token(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        user=UserResponse.model_validate(user)
     )
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(
+    refresh_data: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+):
+    """Exchange a refresh token for a new access token (the refresh token rotates)"""
+    user, session_id, refresh_token = SessionService.rotate_session(db, refresh_data.refresh_token)
+    access_token = _create_user_access_token(db, user, session_id)
     
     return Token(
         access_token=access_token,
+        refresh_token=refresh_token,
         user=UserResponse.model_validate(user)
     )
 
+@router.post("/logout", response_model=ResponseBase)
+def logout(
+    refresh_data: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+):
+    """Revoke the session; its access tokens stop working"""
+    SessionService.revoke_session(db, refresh_data.refresh_token)
+    return ResponseBase(success=True, message="Logged out successfully")
+
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
     user_id: UUID,
@@ -0,0 +1,95 @@
+"""In-process authorization checks for code running alongside (or importing) this app.
+
+    from app import authz
+
+    authz.check(user_id, "reports/finance/q1", "read")
+    authz.check_many([(user_id, "roles", "read"), (other_id, "groups", "update")])
+    authz.check(user_id, "documents", "update", context={"resource": {"owner_id": owner}})
+
+Answers come from the same tenant snapshots, permission matchers and caches
+as the HTTP endpoints, so warm checks touch no database and need no running
+FastAPI app. Pass ``db`` to reuse an open session; otherwise one is opened
+only for the duration of the call (and only connects on a cache miss).
+"""
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+import msgpack
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.schemas.permission import CHECK_BATCH_LIMIT
+from app.services.permission_service import PermissionService
+
+UserId = Union[UUID, str, bytes]
+Context = Optional[Mapping[str, Any]]
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def _as_uuid(user_id: UserId) -> UUID:
+    if isinstance(user_id, UUID):
+        return user_id
+    if isinstance(user_id, bytes):
+        return UUID(bytes=user_id)
+    if isinstance(user_id, str):
+        return UUID(user_id)
+    raise ValueError(f"User id must be a UUID, a UUID string or 16 bytes, not {type(user_id).__name__}")
+
+
+def check_many(
+    checks: Iterable[Tuple[UserId, str, str]],
+    db: Optional[Session] = None,
+    contexts: Optional[Sequence[Context]] = None
+) -> List[bool]:
+    """Answer (user_id, resource, action) checks in order; wildcard and conditional grants apply.
+
+    ``contexts`` optionally gives one attribute mapping per check for grant
+    conditions, e.g. ``{"resource": {"owner_id": ...}, "request": {"ip": ...}}``.
+    """
+    checks = [(_as_uuid(user_id), resource, action) for user_id, resource, action in checks]
+    if not checks:
+        return []
+    if db is not None:
+        return PermissionService.check_permissions(db, checks, contexts)
+
+    session = SessionLocal()
+    try:
+        return PermissionService.check_permissions(session, checks, contexts)
+    finally:
+        session.close()
+
+
+def check(user_id: UserId, resource: str, action: str, db: Optional[Session] = None, context: Context = None) -> bool:
+    """Whether the user holds the permission, given the attributes in ``context``"""
+    return check_many([(user_id, resource, action)], db=db, contexts=[context])[0]
+
+
+def decode_checks(payload: bytes) -> Tuple[List[Tuple[UUID, str, str]], List[Context]]:
+    """msgpack array of [user_id, resource, action(, context)]; user_id as 16 raw bytes or a UUID string"""
+    try:
+        items = msgpack.unpackb(payload, raw=False)
+        if not isinstance(items, list) or len(items) > CHECK_BATCH_LIMIT:
+            raise ValueError
+        checks = []
+        contexts = []
+        for item in items:
+            if not isinstance(item, list) or len(item) not in (3, 4):
+                raise ValueError
+            user_id, resource, action = item[:3]
+            context = item[3] if len(item) == 4 else None
+            if not isinstance(resource, str) or not isinstance(action, str) or not isinstance(context, (dict, type(None))):
+                raise ValueError
+            checks.append((_as_uuid(user_id), resource, action))
+            contexts.append(context)
+        return checks, contexts
+    except (ValueError, TypeError, msgpack.UnpackException) as exc:
+        raise ValueError(
+            f"Expected a msgpack array of up to {CHECK_BATCH_LIMIT} [user_id, resource, action, context?] items"
+        ) from exc
+
+
+def check_many_msgpack(payload: bytes, db: Optional[Session] = None) -> bytes:
+    """Binary check_many: msgpack request in, msgpack array of booleans out"""
+    checks, contexts = decode_checks(payload)
+    return msgpack.packb(check_many(checks, db=db, contexts=contexts))
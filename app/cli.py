@@ -0,0 +1,94 @@
+"""Maintenance commands: python -m app.cli <command> --help"""
+import argparse
+import sys
+import time
+from uuid import UUID
+
+from app.database import SessionLocal
+from app.services.access_review_service import AccessReviewService
+from app.services.effective_permission_service import EffectivePermissionService
+from app.services.permission_cache_service import PermissionCacheService
+
+
+def rebuild_effective_permissions(args) -> int:
+    db = SessionLocal()
+    try:
+        count = EffectivePermissionService.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"Rebuilt user_effective_permission: {count} rows")
+    return 0
+
+def check_effective_permissions(args) -> int:
+    db = SessionLocal()
+    try:
+        result = EffectivePermissionService.check_consistency(db, limit=args.limit)
+
+        for user_id, permission_id in result["missing"]:
+            print(f"missing user={user_id} permission={permission_id}")
+        for user_id, permission_id in result["extra"]:
+            print(f"extra   user={user_id} permission={permission_id}")
+
+        if not result["missing"] and not result["extra"]:
+            print("user_effective_permission is consistent")
+            return 0
+
+        if args.repair:
+            user_ids = {user_id for user_id, _ in result["missing"] + result["extra"]}
+            PermissionCacheService.mark_changed(db, user_ids)
+            db.commit()
+            print(f"Repaired {len(user_ids)} users; re-run until consistent")
+        return 1
+    finally:
+        db.close()
+
+def export_access_matrix(args) -> int:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        matrix, users, permissions = AccessReviewService.build_access_matrix(db, args.tenant_id)
+    finally:
+        db.close()
+    built = time.perf_counter()
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        for chunk in AccessReviewService.iter_csv(matrix, users, permissions):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(
+        f"{len(users)} users x {len(permissions)} permissions, {matrix.grant_count} grants "
+        f"(built in {built - started:.2f}s, written in {time.perf_counter() - built:.2f}s)",
+        file=sys.stderr
+    )
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-effective-permissions", help="Repopulate user_effective_permission from the grant mappings")
+    rebuild.set_defaults(handler=rebuild_effective_permissions)
+
+    check = commands.add_parser("check-effective-permissions", help="Report rows that disagree with the grant mappings")
+    check.add_argument("--limit", type=int, default=100, help="Maximum differences to report per direction")
+    check.add_argument("--repair", action="store_true", help="Recompute the affected users")
+    check.set_defaults(handler=check_effective_permissions)
+
+    matrix = commands.add_parser("access-matrix", help="Export a tenant's effective user x permission grants as CSV")
+    matrix.add_argument("tenant_id", type=UUID)
+    matrix.add_argument("--output", "-o", help="CSV file to write (default: stdout)")
+    matrix.set_defaults(handler=export_access_matrix)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
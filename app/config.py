@@ -1,16 +1,82 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    
+
+    # Asymmetric signing (ALGORITHM=RS256/ES256): directory of <kid>.pem keys
+    JWT_KEYS_DIR: Optional[str] = None
+    JWT_ACTIVE_KID: Optional[str] = None
+    JWKS_MAX_AGE_SECONDS: int = 300
+
+    # Password hashing pool
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 256
+
+    # Password hashing policy: "bcrypt" or "argon2" (argon2id, needs argon2-cffi).
+    # With a TARGET_MS budget the cost is calibrated at startup, otherwise
+    # PASSWORD_HASH_COST (or the scheme default) is used.
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    PASSWORD_HASH_TARGET_MS: int = 0
+    PASSWORD_HASH_COST: Optional[int] = None
+    PASSWORD_HASH_ARGON2_MEMORY_KIB: int = 65536
+
+    # Login admission control (failed attempts per sliding window)
+    LOGIN_MAX_FAILURES_PER_EMAIL: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 50
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 300
+    LOGIN_LIMITER_MAX_KEYS: int = 100000
+    # Header a trusted reverse proxy sets to the client address (e.g. X-Forwarded-For);
+    # its last entry is used. Unset uses the peer address. Only set it when every
+    # request passes through that proxy, or clients can spoof their IP.
+    TRUSTED_PROXY_IP_HEADER: Optional[str] = None
+
+    # Write-behind buffer for last_login
+    LAST_LOGIN_FLUSH_SECONDS: int = 5
+    LAST_LOGIN_FLUSH_MAX_PENDING: int = 5000
+    LAST_LOGIN_BATCH_SIZE: int = 1000
+
+    # Refresh sessions and the in-memory revocation filter
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    REVOCATION_SYNC_SECONDS: int = 5
+    REVOCATION_REBUILD_SECONDS: int = 3600
+
+    # Authenticated principal resolution
+    TOKEN_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # Embed the effective-permission bitmap in access tokens
+    ACCESS_TOKEN_PERMISSION_BITMAP: bool = False
+    PERMISSION_CATALOG_TTL_SECONDS: int = 60
+
+    # Gate routers with require_permission(); off keeps the API open as before
+    ENFORCE_AUTHORIZATION: bool = False
+
+    # Per-process effective-permission cache; the TTL bounds staleness across workers
+    PERMISSION_CACHE_SIZE: int = 10000
+    PERMISSION_CACHE_TTL_SECONDS: int = 300
+
+    # Per-tenant in-memory RBAC snapshots; tenant versions are re-read at most every CHECK_SECONDS
+    RBAC_SNAPSHOT_ENABLED: bool = True
+    RBAC_SNAPSHOT_MAX_TENANTS: int = 100
+    RBAC_SNAPSHOT_CHECK_SECONDS: float = 5
+    # Directory of memory-mapped snapshot files shared by all workers (unset: per-process memory only)
+    RBAC_SNAPSHOT_DIR: Optional[str] = None
+
+    # Per-tenant set of subscribed modules gating module permissions; the TTL bounds staleness across workers
+    MODULE_ENTITLEMENT_TTL_SECONDS: int = 60
+
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 @lru_cache()
 def get_settings():
-    return Settings()
\ No newline at end of file
+    return Settings()
@@ -1,9 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import engine, Base
 from app.api.v1 import users, roles, permissions, tenants
 from app.api.v1 import connectors, modules, subscriptions
 from app.api.v1 import groups
+from app.utils.password_hasher import password_hasher
+from app.services.last_login_buffer import last_login_buffer
+from app.services.session_service import revocation_filter
+from app.utils.security import key_ring, setup_password_hashing
+from app.utils.metrics import collect_stats
+from app.config import get_settings
+
+settings = get_settings()
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
@@ -34,6 +42,32 @@ app.include_router(subscriptions.router, prefix="/api/v1/subscriptions", tags=["
 app.include_router(groups.router, prefix="/api/v1/groups", tags=["Groups"])
 
 
+@app.on_event("startup")
+def setup_password_hashing_policy():
+    # Before the hashing pool starts, so its workers inherit the policy
+    setup_password_hashing()
+
+@app.on_event("startup")
+def start_last_login_buffer():
+    last_login_buffer.start()
+
+@app.on_event("startup")
+def start_revocation_filter():
+    revocation_filter.start()
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+def flush_last_login_buffer():
+    last_login_buffer.stop()
+
+@app.on_event("shutdown")
+def stop_revocation_filter():
+    revocation_filter.stop()
+
+
 @app.get("/")
 async def root():
     return {
@@ -44,4 +78,21 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics")
+async def metrics():
+    """In-process counters (login limiter, caches) for monitoring"""
+    return collect_stats()
+
+@app.get("/.well-known/jwks.json")
+async def jwks(response: Response):
+    """Public keys for verifying access tokens locally"""
+    if key_ring is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tokens are not signed with an asymmetric key"
+        )
+    
+    response.headers["Cache-Control"] = f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}"
+    return key_ring.jwks()
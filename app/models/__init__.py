@@ -1,6 +1,12 @@
+from app.models.tenant import TenantMaster
+from app.models.user import UserDetails
+from app.models.role import RoleMaster, UserRoleMapping, RolePermissionMapping, GroupRoleMapping, RoleInheritance, RoleClosure
+from app.models.permission import PermissionMaster, PermissionUserMapping, GroupPermissionMapping, UserEffectivePermission
+from app.models.group import GroupMaster, GroupUserMapping
 from app.models.connector import ConnectorMaster
 from app.models.module import ModuleMaster
 from app.models.tenant_subscription import TenantSubscription
+from app.models.session import UserSession
 
 __all__ = [
     "TenantMaster",
@@ -13,8 +19,12 @@ __all__ = [
     "RolePermissionMapping",
     "GroupUserMapping",
     "GroupRoleMapping",
+    "RoleInheritance",
+    "RoleClosure",
     "GroupPermissionMapping",
+    "UserEffectivePermission",
     "ConnectorMaster",
     "ModuleMaster",
-    "TenantSubscription"
-]
\ No newline at end of file
+    "TenantSubscription",
+    "UserSession"
+]
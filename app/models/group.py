@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, func, UniqueConstraint, Boolean
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, func, UniqueConstraint, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -37,6 +37,8 @@ class GroupUserMapping(Base):
     
     __table_args__ = (
         UniqueConstraint('group_id', 'user_id', name='uq_group_user'),
+        # who-can: members of a group
+        Index('ix_group_user_mapping_group_user_active', 'group_id', 'user_id', postgresql_where=text('is_active')),
     )
     
     # Relationships
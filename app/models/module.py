@@ -17,4 +17,6 @@ class ModuleMaster(Base):
     updated_by = Column(UUID(as_uuid=True), nullable=True)
     
     # Relationships
-    tenant_subscriptions = relationship("TenantSubscription", back_populates="module", cascade="all, delete-orphan")
\ No newline at end of file
+    tenant_subscriptions = relationship("TenantSubscription", back_populates="module", cascade="all, delete-orphan")
+    # "all": never null permission_master.module_id on delete, even for loaded permissions; the FK restricts
+    permissions = relationship("PermissionMaster", back_populates="module", passive_deletes="all")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, func, UniqueConstraint, Boolean
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, func, UniqueConstraint, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -14,12 +14,16 @@ class PermissionMaster(Base):
     description = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Module whose subscription the permission needs; NULL for core permissions every tenant has.
+    # RESTRICT: deleting the module must not turn its permissions into core ones
+    module_id = Column(UUID(as_uuid=True), ForeignKey("module_master.module_id", ondelete="RESTRICT"), nullable=True, index=True)
     
     __table_args__ = (
         UniqueConstraint('resource', 'action', name='uq_resource_action'),
     )
     
     # Relationships
+    module = relationship("ModuleMaster", back_populates="permissions")
     user_mappings = relationship("PermissionUserMapping", back_populates="permission", cascade="all, delete-orphan")
     role_mappings = relationship("RolePermissionMapping", back_populates="permission", cascade="all, delete-orphan")
     group_mappings = relationship("GroupPermissionMapping", back_populates="permission", cascade="all, delete-orphan")
@@ -33,9 +37,13 @@ class PermissionUserMapping(Base):
     is_active = Column(Boolean, default=True, nullable=False)
     assigned_at = Column(DateTime(timezone=True), server_default=func.now())
     assigned_by = Column(UUID(as_uuid=True), ForeignKey("user_details.user_id"), nullable=True)
+    # Optional attribute condition (app/utils/conditions.py); conditional grants are checked per request, not materialized
+    condition = Column(Text, nullable=True)
     
     __table_args__ = (
         UniqueConstraint('permission_id', 'user_id', name='uq_permission_user'),
+        # who-can: direct grantees of a permission
+        Index('ix_permission_user_mapping_permission_user_active', 'permission_id', 'user_id', postgresql_where=text('is_active')),
     )
     
     # Relationships - FIX: Specify foreign_keys to avoid ambiguity
@@ -54,8 +62,22 @@ class GroupPermissionMapping(Base):
     
     __table_args__ = (
         UniqueConstraint('group_id', 'permission_id', name='uq_group_permission'),
+        # who-can: groups granted a permission
+        Index('ix_group_permission_mapping_permission_group_active', 'permission_id', 'group_id', postgresql_where=text('is_active')),
     )
     
     # Relationships
     group = relationship("GroupMaster", back_populates="group_permissions")
-    permission = relationship("PermissionMaster", back_populates="group_mappings")
\ No newline at end of file
+    permission = relationship("PermissionMaster", back_populates="group_mappings")
+
+class UserEffectivePermission(Base):
+    """Materialized (user, permission) pairs from every active grant path.
+
+    Maintained by EffectivePermissionService whenever a grant changes;
+    rows exist only for active permissions.
+    """
+    __tablename__ = "user_effective_permission"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user_details.user_id", ondelete="CASCADE"), primary_key=True)
+    permission_id = Column(UUID(as_uuid=True), ForeignKey("permission_master.permission_id", ondelete="CASCADE"), primary_key=True, index=True)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, func, UniqueConstraint
+from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, func, UniqueConstraint, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -39,6 +39,8 @@ class UserRoleMapping(Base):
     
     __table_args__ = (
         UniqueConstraint('user_id', 'role_id', name='uq_user_role'),
+        # who-can: users holding a role
+        Index('ix_user_role_mapping_role_user_active', 'role_id', 'user_id', postgresql_where=text('is_active')),
     )
     
     # Relationships
@@ -54,9 +56,13 @@ class RolePermissionMapping(Base):
     permission_id = Column(UUID(as_uuid=True), ForeignKey("permission_master.permission_id", ondelete="CASCADE"), nullable=False, index=True)
     assigned_at = Column(DateTime(timezone=True), server_default=func.now())
     is_active = Column(Boolean, default=True, nullable=False)
+    # Optional attribute condition (app/utils/conditions.py); conditional grants are checked per request, not materialized
+    condition = Column(Text, nullable=True)
     
     __table_args__ = (
         UniqueConstraint('role_id', 'permission_id', name='uq_role_permission'),
+        # who-can: roles granting a permission
+        Index('ix_role_permission_mapping_permission_role_active', 'permission_id', 'role_id', postgresql_where=text('is_active')),
     )
     
     # Relationships
@@ -75,8 +81,41 @@ class GroupRoleMapping(Base):
     
     __table_args__ = (
         UniqueConstraint('group_id', 'role_id', name='uq_group_role'),
+        # who-can: groups holding a role
+        Index('ix_group_role_mapping_role_group_active', 'role_id', 'group_id', postgresql_where=text('is_active')),
     )
     
     # Relationships
     group = relationship("GroupMaster", back_populates="group_roles")
-    role = relationship("RoleMaster", back_populates="group_mappings")
\ No newline at end of file
+    role = relationship("RoleMaster", back_populates="group_mappings")
+
+class RoleInheritance(Base):
+    """Direct inheritance edge: the child role also gets every permission of the parent"""
+    __tablename__ = "role_inheritance"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    parent_role_id = Column(UUID(as_uuid=True), ForeignKey("role_master.role_id", ondelete="CASCADE"), nullable=False, index=True)
+    child_role_id = Column(UUID(as_uuid=True), ForeignKey("role_master.role_id", ondelete="CASCADE"), nullable=False, index=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    assigned_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('parent_role_id', 'child_role_id', name='uq_role_inheritance'),
+    )
+
+class RoleClosure(Base):
+    """Transitive closure of active edges between active roles, including (role, role) self rows.
+
+    path_count is the number of distinct paths from ancestor to descendant,
+    so removing one edge of a diamond only decrements it.
+    """
+    __tablename__ = "role_closure"
+    
+    ancestor_role_id = Column(UUID(as_uuid=True), ForeignKey("role_master.role_id", ondelete="CASCADE"), primary_key=True)
+    descendant_role_id = Column(UUID(as_uuid=True), ForeignKey("role_master.role_id", ondelete="CASCADE"), primary_key=True)
+    path_count = Column(Integer, nullable=False, default=1)
+    
+    __table_args__ = (
+        # Resolution starts from an assigned (descendant) role
+        Index('ix_role_closure_descendant_ancestor', 'descendant_role_id', 'ancestor_role_id'),
+    )
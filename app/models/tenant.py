@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, func
+from sqlalchemy import Column, String, Boolean, DateTime, BigInteger, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -10,6 +10,8 @@ class TenantMaster(Base):
     tenant_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tenant_name = Column(String(255), nullable=False, unique=True, index=True)
     is_active = Column(Boolean, default=True, index=True)
+    # Bumped in the same transaction as any grant change affecting the tenant's users
+    authz_version = Column(BigInteger, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     created_by = Column(UUID(as_uuid=True), nullable=True)
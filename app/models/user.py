@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, func
+from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -11,7 +11,7 @@ class UserDetails(Base):
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenant_master.tenant_id", ondelete="CASCADE"), nullable=False, index=True)
     firstname = Column(String(100), nullable=False)
     lastname = Column(String(100), nullable=False)
-    email = Column(String(255), nullable=False, index=True)
+    email = Column(String(255), nullable=False)
     phone_number = Column(String(20), nullable=True)
     address = Column(Text, nullable=True)
     password_hash = Column(String(255), nullable=False)
@@ -21,6 +21,15 @@ class UserDetails(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        # One account per email per tenant, case-insensitive; also serves tenant-scoped logins
+        Index('uq_user_details_tenant_email_lower', tenant_id, func.lower(email), unique=True),
+        # Logins that don't name a tenant
+        Index('ix_user_details_email_lower', func.lower(email)),
+        # Tenant-scoped keyset pagination by user_id (who-can)
+        Index('ix_user_details_tenant_user', tenant_id, user_id),
+    )
+    
     # Relationships - FIX: Specify foreign_keys to avoid ambiguity
     tenant = relationship("TenantMaster", back_populates="users")
     user_roles = relationship(
@@ -1,5 +1,6 @@
 from app.schemas.user import (
-    UserCreate, UserUpdate, UserResponse, UserLogin, Token, TokenData
+    UserCreate, UserUpdate, UserResponse, UserLogin, Token, TokenData, Principal,
+    RefreshTokenRequest
 )
 from app.schemas.tenant import TenantCreate, TenantUpdate, TenantResponse
 from app.schemas.role import (
@@ -16,7 +17,7 @@ from app.schemas.group import (
 from app.schemas.common import ResponseBase, ErrorResponse, PaginationParams, PaginatedResponse
 
 __all__ = [
-    "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token", "TokenData",
+    "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token", "TokenData", "Principal", "RefreshTokenRequest",
     "TenantCreate", "TenantUpdate", "TenantResponse",
     "RoleCreate", "RoleUpdate", "RoleResponse", "AssignRoleToUser", "AssignRoleToGroup",
     "PermissionCreate", "PermissionUpdate", "PermissionResponse",
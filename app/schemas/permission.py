@@ -1,40 +1,125 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from uuid import UUID
 from app.schemas.common import TimestampMixin
+from app.utils.conditions import MAX_CONDITION_LENGTH, validate_condition
+from app.utils.permission_matcher import validate_action_pattern, validate_resource_pattern
 
 class PermissionBase(BaseModel):
     permission_name: str = Field(..., min_length=1, max_length=100)
     resource: str = Field(..., min_length=1, max_length=100)
     action: str = Field(..., min_length=1, max_length=50)
     description: Optional[str] = None
+    module_id: Optional[UUID] = None  # only granted while the tenant is subscribed to this module
 
 class PermissionCreate(PermissionBase):
-    pass
+    # "reports/finance/*" covers every resource under reports/finance; action "*" covers every action
+    @field_validator("resource")
+    @classmethod
+    def check_resource(cls, value: str) -> str:
+        return validate_resource_pattern(value)
+
+    @field_validator("action")
+    @classmethod
+    def check_action(cls, value: str) -> str:
+        return validate_action_pattern(value)
 
 class PermissionUpdate(BaseModel):
     permission_name: Optional[str] = Field(None, min_length=1, max_length=100)
     resource: Optional[str] = Field(None, min_length=1, max_length=100)
     action: Optional[str] = Field(None, min_length=1, max_length=50)
     description: Optional[str] = None
+    module_id: Optional[UUID] = None
     is_active: Optional[bool] = None
 
+    @field_validator("resource")
+    @classmethod
+    def check_resource(cls, value: Optional[str]) -> Optional[str]:
+        return value if value is None else validate_resource_pattern(value)
+
+    @field_validator("action")
+    @classmethod
+    def check_action(cls, value: Optional[str]) -> Optional[str]:
+        return value if value is None else validate_action_pattern(value)
+
 class PermissionResponse(PermissionBase, TimestampMixin):
     permission_id: UUID
     is_active: bool
     
     model_config = ConfigDict(from_attributes=True)
 
+# Effective permissions, optionally with the grant paths behind each one
+class PermissionGrantSource(BaseModel):
+    source: str  # direct | role | group | group_role
+    role_id: Optional[UUID] = None
+    group_id: Optional[UUID] = None
+    condition: Optional[str] = None  # set on conditional grants
+    permission_id: Optional[UUID] = None  # who-can: the (possibly wildcard) permission granted
+
+class EffectivePermissionResponse(PermissionResponse):
+    sources: Optional[List[PermissionGrantSource]] = None
+
+# Batch authorization checks
+class PermissionCheckItem(BaseModel):
+    user_id: UUID
+    resource: str
+    action: str
+    # Attributes for conditional grants: {"resource": {...}, "request": {...}, "user": {...}}
+    context: Optional[Dict[str, Dict[str, Any]]] = None
+
+# Checks accepted per batch, JSON or msgpack
+CHECK_BATCH_LIMIT = 1000
+
+class PermissionCheckRequest(BaseModel):
+    checks: List[PermissionCheckItem] = Field(..., max_length=CHECK_BATCH_LIMIT)
+
+class PermissionCheckResponse(BaseModel):
+    results: List[bool]  # same order as the request's checks
+
+# Reverse lookup: users holding a permission in a tenant
+class WhoCanUser(BaseModel):
+    user_id: UUID
+    email: str
+    firstname: str
+    lastname: str
+    sources: Optional[List[PermissionGrantSource]] = None
+
+class WhoCanResponse(BaseModel):
+    permission_id: Optional[UUID] = None  # the exact permission, if one is defined
+    permission_ids: List[UUID]  # every permission covering the request, wildcards included
+    users: List[WhoCanUser]
+    next_after: Optional[UUID] = None  # pass as ?after= for the next page
+
 # Permission Assignment Schemas
-class AssignPermissionToUser(BaseModel):
+class ConditionalAssignment(BaseModel):
+    # e.g. "resource.owner_id == user.id and ip_in(request.ip, '10.0.0.0/8')"
+    condition: Optional[str] = Field(None, min_length=1, max_length=MAX_CONDITION_LENGTH)
+
+    @field_validator("condition")
+    @classmethod
+    def check_condition(cls, value: Optional[str]) -> Optional[str]:
+        return validate_condition(value)
+
+class AssignPermissionToUser(ConditionalAssignment):
     user_id: UUID
     permission_id: UUID
 
-class AssignPermissionToRole(BaseModel):
+class AssignPermissionToRole(ConditionalAssignment):
     role_id: UUID
     permission_id: UUID
 
 class AssignPermissionToGroup(BaseModel):
     group_id: UUID
-    permission_id: UUID
\ No newline at end of file
+    permission_id: UUID
+
+# Permission Catalog (bit positions for token permission bitmaps)
+class PermissionCatalogEntry(BaseModel):
+    bit: int
+    permission_id: UUID
+    resource: str
+    action: str
+
+class PermissionCatalogResponse(BaseModel):
+    version: str
+    permissions: List[PermissionCatalogEntry]
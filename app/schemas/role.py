@@ -41,4 +41,18 @@ class UserRoleMappingResponse(BaseModel):
     is_active: bool # Added to see status
     assigned_at: datetime
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# Role Inheritance Schemas
+class RoleInheritanceCreate(BaseModel):
+    parent_role_id: UUID
+    child_role_id: UUID
+
+class RoleInheritanceResponse(BaseModel):
+    id: UUID
+    parent_role_id: UUID
+    child_role_id: UUID
+    is_active: bool
+    assigned_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import List, Literal, Optional
 from uuid import UUID
 from app.schemas.common import TimestampMixin
 
@@ -17,4 +17,113 @@ class TenantResponse(TenantBase, TimestampMixin):
     tenant_id: UUID
     is_active: bool
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# Access review: tenant-wide user x permission matrix
+class AccessMatrixPermission(BaseModel):
+    permission_id: UUID
+    permission_name: str
+    resource: str
+    action: str
+    user_count: int
+
+class AccessMatrixUser(BaseModel):
+    user_id: UUID
+    email: str
+    permission_indices: List[int]  # positions in AccessMatrixResponse.permissions
+
+class AccessMatrixResponse(BaseModel):
+    tenant_id: UUID
+    grant_count: int
+    permissions: List[AccessMatrixPermission]
+    users: List[AccessMatrixUser]
+
+# What-if simulation: ids each kind of mapping change needs
+SIMULATION_CHANGE_FIELDS = {
+    "user_permission": ("user_id", "permission_id"),
+    "user_role": ("user_id", "role_id"),
+    "group_user": ("user_id", "group_id"),
+    "group_role": ("group_id", "role_id"),
+    "group_permission": ("group_id", "permission_id"),
+    "role_permission": ("role_id", "permission_id"),
+    "role_inheritance": ("role_id", "parent_role_id"),  # role_id inherits from parent_role_id
+}
+
+class SimulatedChange(BaseModel):
+    op: Literal["add", "remove"]
+    kind: Literal["user_permission", "user_role", "group_user", "group_role", "group_permission", "role_permission", "role_inheritance"]
+    user_id: Optional[UUID] = None
+    group_id: Optional[UUID] = None
+    role_id: Optional[UUID] = None
+    parent_role_id: Optional[UUID] = None
+    permission_id: Optional[UUID] = None
+
+    @model_validator(mode="after")
+    def check_ids(self) -> "SimulatedChange":
+        missing = [field for field in SIMULATION_CHANGE_FIELDS[self.kind] if getattr(self, field) is None]
+        if missing:
+            raise ValueError(f"{self.kind} changes need {', '.join(missing)}")
+        return self
+
+class SimulationRequest(BaseModel):
+    changes: List[SimulatedChange] = Field(..., min_length=1, max_length=1000)
+
+class SimulationPermission(BaseModel):
+    permission_id: UUID
+    permission_name: str
+    resource: str
+    action: str
+
+class SimulationUser(BaseModel):
+    user_id: UUID
+    email: str
+    gained: List[int]  # positions in SimulationResponse.permissions
+    lost: List[int]
+
+class SimulationResponse(BaseModel):
+    tenant_id: UUID
+    affected_user_count: int
+    gained_count: int
+    lost_count: int
+    permissions: List[SimulationPermission]
+    users: List[SimulationUser]
+
+# Declarative RBAC sync: the complete desired edge set of each kind sent; kinds left out are not touched
+RBAC_SYNC_MAX_EDGES = 100000
+
+class RbacUserRole(BaseModel):
+    user_id: UUID
+    role_id: UUID
+
+class RbacGroupUser(BaseModel):
+    user_id: UUID
+    group_id: UUID
+
+class RbacGroupRole(BaseModel):
+    group_id: UUID
+    role_id: UUID
+
+class RbacGroupPermission(BaseModel):
+    group_id: UUID
+    permission_id: UUID
+
+class RbacSyncRequest(BaseModel):
+    user_roles: Optional[List[RbacUserRole]] = Field(None, max_length=RBAC_SYNC_MAX_EDGES)
+    group_users: Optional[List[RbacGroupUser]] = Field(None, max_length=RBAC_SYNC_MAX_EDGES)
+    group_roles: Optional[List[RbacGroupRole]] = Field(None, max_length=RBAC_SYNC_MAX_EDGES)
+    group_permissions: Optional[List[RbacGroupPermission]] = Field(None, max_length=RBAC_SYNC_MAX_EDGES)
+
+class RbacSyncCounts(BaseModel):
+    added: int
+    reactivated: int
+    deactivated: int
+    unchanged: int
+
+class RbacSyncResponse(BaseModel):
+    tenant_id: UUID
+    dry_run: bool
+    affected_user_count: int
+    user_roles: Optional[RbacSyncCounts] = None
+    group_users: Optional[RbacSyncCounts] = None
+    group_roles: Optional[RbacSyncCounts] = None
+    group_permissions: Optional[RbacSyncCounts] = None
@@ -35,12 +35,25 @@ class UserResponse(UserBase, TimestampMixin):
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
+    tenant_id: Optional[UUID] = None
 
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
     user: UserResponse
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str = Field(..., min_length=1)
+
 class TokenData(BaseModel):
     user_id: Optional[UUID] = None
-    email: Optional[str] = None
\ No newline at end of file
+    email: Optional[str] = None
+
+class Principal(BaseModel):
+    """Authenticated caller resolved from an access token"""
+    user_id: UUID
+    tenant_id: UUID
+    is_active: bool
+
+    model_config = ConfigDict(frozen=True)
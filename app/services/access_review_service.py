@@ -0,0 +1,170 @@
+import csv
+import io
+from typing import Iterator, List, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from app.models.group import GroupMaster, GroupUserMapping
+from app.models.permission import PermissionMaster, PermissionUserMapping, GroupPermissionMapping
+from app.models.role import RoleMaster, UserRoleMapping, RolePermissionMapping, GroupRoleMapping, RoleClosure
+from app.models.tenant import TenantMaster
+from app.models.user import UserDetails
+from app.utils.access_matrix import AccessMatrix, incidence
+
+# Grants written per chunk when streaming CSV
+CSV_CHUNK_ROWS = 5000
+
+CSV_HEADER = ("user_id", "email", "permission_id", "permission_name", "resource", "action")
+
+# Permission columns loaded by default; callers may ask for more
+MATRIX_PERMISSION_COLUMNS = ("permission_id", "permission_name", "resource", "action")
+
+class AccessReviewService:
+    @staticmethod
+    def build_access_matrix(
+        db: Session,
+        tenant_id: UUID,
+        permission_columns: Sequence[str] = MATRIX_PERMISSION_COLUMNS
+    ) -> Tuple[AccessMatrix, List, List]:
+        """Tenant-wide user x permission matrix; returns (matrix, users, permissions)"""
+        tenant = db.query(TenantMaster.tenant_id).filter(TenantMaster.tenant_id == tenant_id).first()
+        if not tenant:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tenant not found"
+            )
+
+        # One query per table; inactive rows are dropped here or by missing from an index
+        users = db.execute(
+            select(UserDetails.user_id, UserDetails.email).where(
+                UserDetails.tenant_id == tenant_id,
+                UserDetails.is_active == True
+            ).order_by(UserDetails.email)
+        ).all()
+        permissions = db.execute(
+            select(
+                *[getattr(PermissionMaster, name) for name in permission_columns]
+            ).where(PermissionMaster.is_active == True).order_by(PermissionMaster.resource, PermissionMaster.action)
+        ).all()
+        role_ids = db.execute(
+            select(RoleMaster.role_id).where(RoleMaster.tenant_id == tenant_id, RoleMaster.is_active == True)
+        ).scalars().all()
+        group_ids = db.execute(
+            select(GroupMaster.group_id).where(GroupMaster.tenant_id == tenant_id, GroupMaster.is_active == True)
+        ).scalars().all()
+
+        user_index = {row.user_id: i for i, row in enumerate(users)}
+        permission_index = {row.permission_id: i for i, row in enumerate(permissions)}
+        role_index = {role_id: i for i, role_id in enumerate(role_ids)}
+        group_index = {group_id: i for i, group_id in enumerate(group_ids)}
+
+        user_permission = db.execute(
+            select(PermissionUserMapping.user_id, PermissionUserMapping.permission_id).join(
+                UserDetails, UserDetails.user_id == PermissionUserMapping.user_id
+            ).where(
+                UserDetails.tenant_id == tenant_id,
+                PermissionUserMapping.is_active == True,
+                # Conditional grants depend on request attributes; the matrix holds unconditional ones
+                PermissionUserMapping.condition.is_(None)
+            )
+        ).all()
+        user_role = db.execute(
+            select(UserRoleMapping.user_id, UserRoleMapping.role_id).join(
+                RoleMaster, RoleMaster.role_id == UserRoleMapping.role_id
+            ).where(RoleMaster.tenant_id == tenant_id, UserRoleMapping.is_active == True)
+        ).all()
+        role_permission = db.execute(
+            select(RolePermissionMapping.role_id, RolePermissionMapping.permission_id).join(
+                RoleMaster, RoleMaster.role_id == RolePermissionMapping.role_id
+            ).where(
+                RoleMaster.tenant_id == tenant_id,
+                RolePermissionMapping.is_active == True,
+                RolePermissionMapping.condition.is_(None)
+            )
+        ).all()
+        role_closure = db.execute(
+            select(RoleClosure.descendant_role_id, RoleClosure.ancestor_role_id).join(
+                RoleMaster, RoleMaster.role_id == RoleClosure.descendant_role_id
+            ).where(RoleMaster.tenant_id == tenant_id)
+        ).all()
+        user_group = db.execute(
+            select(GroupUserMapping.user_id, GroupUserMapping.group_id).join(
+                GroupMaster, GroupMaster.group_id == GroupUserMapping.group_id
+            ).where(GroupMaster.tenant_id == tenant_id, GroupUserMapping.is_active == True)
+        ).all()
+        group_role = db.execute(
+            select(GroupRoleMapping.group_id, GroupRoleMapping.role_id).join(
+                GroupMaster, GroupMaster.group_id == GroupRoleMapping.group_id
+            ).where(GroupMaster.tenant_id == tenant_id, GroupRoleMapping.is_active == True)
+        ).all()
+        group_permission = db.execute(
+            select(GroupPermissionMapping.group_id, GroupPermissionMapping.permission_id).join(
+                GroupMaster, GroupMaster.group_id == GroupPermissionMapping.group_id
+            ).where(GroupMaster.tenant_id == tenant_id, GroupPermissionMapping.is_active == True)
+        ).all()
+
+        matrix = AccessMatrix(
+            user_ids=[row.user_id for row in users],
+            permission_ids=[row.permission_id for row in permissions],
+            user_permission=incidence(user_permission, user_index, permission_index),
+            user_role=incidence(user_role, user_index, role_index),
+            role_permission=incidence(role_permission, role_index, permission_index),
+            role_closure=incidence(role_closure, role_index, role_index),
+            user_group=incidence(user_group, user_index, group_index),
+            group_permission=incidence(group_permission, group_index, permission_index),
+            group_role=incidence(group_role, group_index, role_index)
+        )
+        return matrix, users, permissions
+
+    @staticmethod
+    def to_response(tenant_id: UUID, matrix: AccessMatrix, users: List, permissions: List) -> dict:
+        """JSON shape: users carry indices into the permissions list"""
+        user_counts = matrix.users_per_permission()
+        return {
+            "tenant_id": tenant_id,
+            "grant_count": matrix.grant_count,
+            "permissions": [
+                {
+                    "permission_id": row.permission_id,
+                    "permission_name": row.permission_name,
+                    "resource": row.resource,
+                    "action": row.action,
+                    "user_count": user_counts[j]
+                }
+                for j, row in enumerate(permissions)
+            ],
+            "users": [
+                {
+                    "user_id": row.user_id,
+                    "email": row.email,
+                    "permission_indices": matrix.permission_indices(i).tolist()
+                }
+                for i, row in enumerate(users)
+            ],
+        }
+
+    @staticmethod
+    def iter_csv(matrix: AccessMatrix, users: List, permissions: List) -> Iterator[str]:
+        """One CSV line per (user, permission) grant, in chunks"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_HEADER)
+        pending = 0
+
+        for i, user in enumerate(users):
+            for j in matrix.permission_indices(i):
+                permission = permissions[j]
+                writer.writerow((
+                    user.user_id, user.email, permission.permission_id,
+                    permission.permission_name, permission.resource, permission.action
+                ))
+                pending += 1
+
+            if pending >= CSV_CHUNK_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+
+        yield buffer.getvalue()
@@ -0,0 +1,254 @@
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from app.models.group import GroupMaster, GroupUserMapping
+from app.models.permission import PermissionMaster, PermissionUserMapping, GroupPermissionMapping
+from app.models.role import RoleMaster, UserRoleMapping, RolePermissionMapping, GroupRoleMapping, RoleInheritance
+from app.models.tenant import TenantMaster
+from app.models.user import UserDetails
+from app.schemas.tenant import SIMULATION_CHANGE_FIELDS, SimulatedChange
+from app.utils.access_matrix import AccessMatrix, closure, incidence
+
+# Affected users loaded per round trip
+SIMULATION_BATCH_SIZE = 1000
+
+# Mapping kinds that only involve roles, groups and permissions (small, loaded whole)
+GRAPH_KINDS = ("group_role", "group_permission", "role_permission", "role_inheritance")
+USER_KINDS = ("user_permission", "user_role", "group_user")
+
+Pairs = Dict[str, Set[Tuple[UUID, UUID]]]
+
+def _changed_rows(before: sparse.csr_matrix, after: sparse.csr_matrix) -> np.ndarray:
+    """Row numbers whose entries differ between two 0/1 matrices"""
+    diff = (before != after).tocsr()
+    return np.flatnonzero(np.diff(diff.indptr))
+
+class AccessSimulationService:
+    @staticmethod
+    def _load_graph(db: Session, role_ids: List[UUID], group_ids: List[UUID]) -> Pairs:
+        """Tenant's role/group/permission mappings (active, unconditional rows) as id pairs"""
+        queries = {
+            "role_permission": select(RolePermissionMapping.role_id, RolePermissionMapping.permission_id).where(
+                RolePermissionMapping.role_id.in_(role_ids),
+                RolePermissionMapping.is_active == True,
+                RolePermissionMapping.condition.is_(None)
+            ),
+            "group_permission": select(GroupPermissionMapping.group_id, GroupPermissionMapping.permission_id).where(
+                GroupPermissionMapping.group_id.in_(group_ids), GroupPermissionMapping.is_active == True
+            ),
+            "group_role": select(GroupRoleMapping.group_id, GroupRoleMapping.role_id).where(
+                GroupRoleMapping.group_id.in_(group_ids), GroupRoleMapping.is_active == True
+            ),
+            "role_inheritance": select(RoleInheritance.child_role_id, RoleInheritance.parent_role_id).where(
+                RoleInheritance.child_role_id.in_(role_ids),
+                RoleInheritance.parent_role_id.in_(role_ids),
+                RoleInheritance.is_active == True
+            ),
+        }
+        return {kind: set(map(tuple, db.execute(query).all())) for kind, query in queries.items()}
+
+    @staticmethod
+    def _load_user_pairs(db: Session, user_ids: List[UUID]) -> Pairs:
+        """User-level mappings for the given users only"""
+        pairs = {kind: set() for kind in USER_KINDS}
+        for start in range(0, len(user_ids), SIMULATION_BATCH_SIZE):
+            batch = user_ids[start:start + SIMULATION_BATCH_SIZE]
+            queries = {
+                "user_permission": select(PermissionUserMapping.user_id, PermissionUserMapping.permission_id).where(
+                    PermissionUserMapping.user_id.in_(batch),
+                    PermissionUserMapping.is_active == True,
+                    PermissionUserMapping.condition.is_(None)
+                ),
+                "user_role": select(UserRoleMapping.user_id, UserRoleMapping.role_id).where(
+                    UserRoleMapping.user_id.in_(batch), UserRoleMapping.is_active == True
+                ),
+                "group_user": select(GroupUserMapping.user_id, GroupUserMapping.group_id).where(
+                    GroupUserMapping.user_id.in_(batch), GroupUserMapping.is_active == True
+                ),
+            }
+            for kind, query in queries.items():
+                pairs[kind].update(map(tuple, db.execute(query).all()))
+        return pairs
+
+    @staticmethod
+    def _apply(pairs: Pairs, changes: List[SimulatedChange], kinds: Tuple[str, ...]) -> Pairs:
+        result = {kind: set(pairs[kind]) for kind in kinds}
+        for change in changes:
+            if change.kind in kinds:
+                pair = tuple(getattr(change, field) for field in SIMULATION_CHANGE_FIELDS[change.kind])
+                if change.op == "add":
+                    result[change.kind].add(pair)
+                else:
+                    result[change.kind].discard(pair)
+        return result
+
+    @staticmethod
+    def simulate(db: Session, tenant_id: UUID, changes: List[SimulatedChange]) -> dict:
+        """Permissions each user would gain or lose if the changes were applied; nothing is written"""
+        tenant = db.query(TenantMaster.tenant_id).filter(TenantMaster.tenant_id == tenant_id).first()
+        if not tenant:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tenant not found"
+            )
+
+        permissions = db.execute(
+            select(
+                PermissionMaster.permission_id,
+                PermissionMaster.permission_name,
+                PermissionMaster.resource,
+                PermissionMaster.action
+            ).where(PermissionMaster.is_active == True).order_by(PermissionMaster.resource, PermissionMaster.action)
+        ).all()
+        role_ids = db.execute(
+            select(RoleMaster.role_id).where(RoleMaster.tenant_id == tenant_id, RoleMaster.is_active == True)
+        ).scalars().all()
+        group_ids = db.execute(
+            select(GroupMaster.group_id).where(GroupMaster.tenant_id == tenant_id, GroupMaster.is_active == True)
+        ).scalars().all()
+
+        permission_index = {row.permission_id: i for i, row in enumerate(permissions)}
+        role_index = {role_id: i for i, role_id in enumerate(role_ids)}
+        group_index = {group_id: i for i, group_id in enumerate(group_ids)}
+
+        # Every id must name an active entity of this tenant, as the real services require
+        direct_users = {change.user_id for change in changes if change.user_id is not None}
+        tenant_users = set(db.execute(
+            select(UserDetails.user_id).where(
+                UserDetails.user_id.in_(direct_users),
+                UserDetails.tenant_id == tenant_id,
+                UserDetails.is_active == True
+            )
+        ).scalars()) if direct_users else set()
+        known = {
+            "user_id": tenant_users,
+            "group_id": group_index,
+            "role_id": role_index,
+            "parent_role_id": role_index,
+            "permission_id": permission_index,
+        }
+        for position, change in enumerate(changes):
+            for field in SIMULATION_CHANGE_FIELDS[change.kind]:
+                if getattr(change, field) not in known[field]:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Change {position}: {field} not found or inactive in this tenant"
+                    )
+
+        graph_before = AccessSimulationService._load_graph(db, role_ids, group_ids)
+        graph_after = AccessSimulationService._apply(graph_before, changes, GRAPH_KINDS)
+
+        def role_group_matrices(graph: Pairs):
+            try:
+                role_closure = closure(incidence(graph["role_inheritance"], role_index, role_index))
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Changes would create a role inheritance cycle"
+                )
+            role_permission = incidence(graph["role_permission"], role_index, permission_index)
+            group_permission = incidence(graph["group_permission"], group_index, permission_index)
+            group_role = incidence(graph["group_role"], group_index, role_index)
+            return role_closure, role_permission, group_permission, group_role
+
+        before_parts = role_group_matrices(graph_before)
+        after_parts = role_group_matrices(graph_after)
+
+        # Roles and groups whose effective permissions move; only their holders can be affected
+        def role_and_group_effective(parts):
+            role_closure, role_permission, group_permission, group_role = parts
+            role_effective = (role_closure @ role_permission).astype(bool).astype(np.int8)
+            group_effective = (group_permission + group_role @ role_effective).astype(bool).astype(np.int8)
+            return role_effective, group_effective
+
+        role_before, group_before = role_and_group_effective(before_parts)
+        role_after, group_after = role_and_group_effective(after_parts)
+        affected_roles = [role_ids[i] for i in _changed_rows(role_before, role_after)]
+        affected_groups = [group_ids[i] for i in _changed_rows(group_before, group_after)]
+
+        holders = set(direct_users)
+        if affected_roles or affected_groups:
+            holders.update(db.execute(union(
+                select(UserRoleMapping.user_id).where(
+                    UserRoleMapping.role_id.in_(affected_roles), UserRoleMapping.is_active == True
+                ),
+                select(GroupUserMapping.user_id).where(
+                    GroupUserMapping.group_id.in_(affected_groups), GroupUserMapping.is_active == True
+                )
+            )).scalars())
+
+        users = []
+        holder_ids = list(holders)
+        for start in range(0, len(holder_ids), SIMULATION_BATCH_SIZE):
+            users.extend(db.execute(
+                select(UserDetails.user_id, UserDetails.email).where(
+                    UserDetails.user_id.in_(holder_ids[start:start + SIMULATION_BATCH_SIZE]),
+                    UserDetails.tenant_id == tenant_id,
+                    UserDetails.is_active == True
+                )
+            ).all())
+        users.sort(key=lambda row: row.email)
+        user_index = {row.user_id: i for i, row in enumerate(users)}
+
+        users_before = AccessSimulationService._load_user_pairs(db, list(user_index))
+        users_after = AccessSimulationService._apply(users_before, changes, USER_KINDS)
+
+        def effective(user_pairs: Pairs, parts) -> sparse.csr_matrix:
+            role_closure, role_permission, group_permission, group_role = parts
+            matrix = AccessMatrix(
+                user_ids=list(user_index),
+                permission_ids=[row.permission_id for row in permissions],
+                user_permission=incidence(user_pairs["user_permission"], user_index, permission_index),
+                user_role=incidence(user_pairs["user_role"], user_index, role_index),
+                role_permission=role_permission,
+                role_closure=role_closure,
+                user_group=incidence(user_pairs["group_user"], user_index, group_index),
+                group_permission=group_permission,
+                group_role=group_role
+            )
+            return matrix.matrix.astype(np.int8)
+
+        before = effective(users_before, before_parts)
+        after = effective(users_after, after_parts)
+        gained = (after - after.multiply(before)).tocsr()
+        lost = (before - before.multiply(after)).tocsr()
+        gained.eliminate_zeros()
+        lost.eliminate_zeros()
+
+        # Only permissions that moved for someone are listed
+        changed_columns = np.union1d(gained.indices, lost.indices)
+        position = {int(j): k for k, j in enumerate(changed_columns)}
+
+        def positions(matrix: sparse.csr_matrix, i: int) -> List[int]:
+            return [position[int(j)] for j in matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]]]
+
+        affected_users = []
+        for i in _changed_rows(before, after):
+            row = users[i]
+            affected_users.append({
+                "user_id": row.user_id,
+                "email": row.email,
+                "gained": positions(gained, i),
+                "lost": positions(lost, i),
+            })
+
+        return {
+            "tenant_id": tenant_id,
+            "affected_user_count": len(affected_users),
+            "gained_count": int(gained.nnz),
+            "lost_count": int(lost.nnz),
+            "permissions": [
+                {
+                    "permission_id": permissions[j].permission_id,
+                    "permission_name": permissions[j].permission_name,
+                    "resource": permissions[j].resource,
+                    "action": permissions[j].action
+                }
+                for j in changed_columns
+            ],
+            "users": affected_users,
+        }
@@ -0,0 +1,70 @@
+import hashlib
+import time
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.user import UserDetails
+from app.schemas.user import Principal
+from app.utils.cache import TTLCache
+from app.utils.security import decode_access_token
+
+settings = get_settings()
+
+# Decoded claims keyed by sha256(token); entries live until the token's exp
+_claims_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
+# Per-process and TTL-bounded: other workers pick up changes within the TTL
+_principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+class AuthService:
+    @staticmethod
+    def get_token_claims(token: str) -> Optional[dict]:
+        """Verify a JWT, reusing the decoded claims for repeat presentations"""
+        key = hashlib.sha256(token.encode()).digest()
+        claims = _claims_cache.get(key)
+
+        if claims is None:
+            claims = decode_access_token(token)
+            if claims is None or "exp" not in claims:
+                return None
+
+            remaining = claims["exp"] - time.time()
+            if remaining <= 0:
+                return None
+
+            _claims_cache.set(key, claims, ttl=remaining)
+
+        return claims
+
+    @staticmethod
+    def get_principal(db: Session, user_id: UUID) -> Optional[Principal]:
+        """Resolve the minimal user identity, from cache when possible"""
+        principal = _principal_cache.get(user_id)
+
+        if principal is None:
+            row = db.query(
+                UserDetails.user_id,
+                UserDetails.tenant_id,
+                UserDetails.is_active
+            ).filter(UserDetails.user_id == user_id).first()
+
+            if not row:
+                return None
+
+            principal = Principal(
+                user_id=row.user_id,
+                tenant_id=row.tenant_id,
+                is_active=bool(row.is_active)
+            )
+            _principal_cache.set(user_id, principal)
+
+        return principal
+
+    @staticmethod
+    def invalidate_principal(user_id: UUID) -> None:
+        """Drop a cached principal after the user row changes"""
+        _principal_cache.pop(user_id)
@@ -0,0 +1,247 @@
+import glob
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, Iterable, List, Set
+from uuid import UUID
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.tenant import TenantMaster
+from app.models.user import UserDetails
+from app.services.access_review_service import AccessReviewService
+from app.services.effective_permission_service import PERMISSION_COLUMNS
+from app.utils.authz_snapshot import TenantSnapshot
+from app.utils.cache import TTLCache
+from app.utils.metrics import register_stats
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Permission rows decoded from snapshot files; same positions and names as query rows
+PermissionRow = namedtuple("PermissionRow", PERMISSION_COLUMNS)
+_PERMISSION_ID = PERMISSION_COLUMNS.index("permission_id")
+_CREATED_AT = PERMISSION_COLUMNS.index("created_at")
+_MODULE_ID = PERMISSION_COLUMNS.index("module_id")
+
+# Session.info key holding tenant ids whose authz_version the open transaction bumped
+PENDING_TENANTS_KEY = "authz_changed_tenants"
+
+# Users looked up per tenant-resolution query
+TENANT_LOOKUP_BATCH_SIZE = 1000
+
+# user_id -> tenant_id never changes, so entries only leave through LRU eviction
+_user_tenants = TTLCache(maxsize=100000)
+
+_snapshots = TTLCache(maxsize=settings.RBAC_SNAPSHOT_MAX_TENANTS)
+
+# One loader per tenant at a time; other tenants keep loading and reading
+_load_locks: Dict[UUID, threading.Lock] = {}
+_load_locks_guard = threading.Lock()
+
+# Bumped on local invalidation so a load that raced a commit is not stored
+_generation = 0
+_generation_lock = threading.Lock()
+
+_counters = {"loads": 0, "file_loads": 0, "version_checks": 0}
+
+
+def _stats() -> dict:
+    snapshots = _snapshots.values()
+    return {
+        **_snapshots.stats(),
+        **_counters,
+        "users": sum(snapshot.user_count for snapshot in snapshots),
+        "grants": sum(snapshot.grant_count for snapshot in snapshots),
+        "mapped": sum(snapshot.mapped for snapshot in snapshots),
+    }
+
+def _decode_permission(values: List) -> PermissionRow:
+    values[_PERMISSION_ID] = UUID(values[_PERMISSION_ID])
+    if values[_CREATED_AT] is not None:
+        values[_CREATED_AT] = datetime.fromisoformat(values[_CREATED_AT])
+    if values[_MODULE_ID] is not None:
+        values[_MODULE_ID] = UUID(values[_MODULE_ID])
+    return PermissionRow(*values)
+
+register_stats("authz_snapshots", _stats)
+
+
+class AuthzSnapshotService:
+    @staticmethod
+    def current_version(db: Session, tenant_id: UUID) -> int:
+        return db.query(TenantMaster.authz_version).filter(TenantMaster.tenant_id == tenant_id).scalar()
+
+    @staticmethod
+    def snapshot_path(tenant_id: UUID, version: int) -> str:
+        return os.path.join(settings.RBAC_SNAPSHOT_DIR, f"{tenant_id}-{version}.snap")
+
+    @staticmethod
+    def load(db: Session, tenant_id: UUID) -> TenantSnapshot:
+        """Map the tenant's current snapshot file, or build one from the mapping tables"""
+        # Version first: data committed after this read only makes the snapshot newer than its stamp
+        version = AuthzSnapshotService.current_version(db, tenant_id)
+
+        if settings.RBAC_SNAPSHOT_DIR:
+            path = AuthzSnapshotService.snapshot_path(tenant_id, version)
+            if os.path.exists(path):
+                try:
+                    snapshot = TenantSnapshot.read(path, _decode_permission)
+                    _counters["file_loads"] += 1
+                    return snapshot
+                except (OSError, ValueError):
+                    logger.exception("Unreadable RBAC snapshot %s; rebuilding", path)
+
+        matrix, _, permissions = AccessReviewService.build_access_matrix(
+            db, tenant_id, permission_columns=PERMISSION_COLUMNS
+        )
+        _counters["loads"] += 1
+        snapshot = TenantSnapshot.from_matrix(tenant_id, version, matrix, permissions)
+
+        if settings.RBAC_SNAPSHOT_DIR:
+            try:
+                os.makedirs(settings.RBAC_SNAPSHOT_DIR, exist_ok=True)
+                snapshot.write(path)
+                AuthzSnapshotService.remove_old_files(tenant_id, version)
+                # Serve from the mapping so this worker shares pages with the others
+                snapshot = TenantSnapshot.read(path, _decode_permission)
+            except OSError:
+                logger.exception("Could not write RBAC snapshot %s; serving from memory", path)
+
+        return snapshot
+
+    @staticmethod
+    def remove_old_files(tenant_id: UUID, version: int) -> None:
+        """Unlink older versions; workers that still map them keep their pages until they swap"""
+        for path in glob.glob(os.path.join(settings.RBAC_SNAPSHOT_DIR, f"{tenant_id}-*.snap")):
+            try:
+                file_version = int(path[:-len(".snap")].rsplit("-", 1)[1])
+                if file_version < version:
+                    os.unlink(path)
+            except (ValueError, OSError):
+                continue
+
+    @staticmethod
+    def get(db: Session, tenant_id: UUID) -> TenantSnapshot:
+        """Current snapshot of a tenant, reloading it when its version moved"""
+        snapshot = _snapshots.get(tenant_id)
+        if snapshot is not None:
+            if time.monotonic() - snapshot.checked_at < settings.RBAC_SNAPSHOT_CHECK_SECONDS:
+                return snapshot
+            _counters["version_checks"] += 1
+            if AuthzSnapshotService.current_version(db, tenant_id) == snapshot.version:
+                snapshot.checked_at = time.monotonic()
+                return snapshot
+
+        with _load_locks_guard:
+            lock = _load_locks.setdefault(tenant_id, threading.Lock())
+
+        with lock:
+            # Another request may have swapped a fresh one in while we waited
+            current = _snapshots.get(tenant_id)
+            if current is not None and current is not snapshot:
+                return current
+
+            generation = _generation
+            snapshot = AuthzSnapshotService.load(db, tenant_id)
+            with _generation_lock:
+                if generation == _generation:
+                    _snapshots.set(tenant_id, snapshot)
+            return snapshot
+
+    @staticmethod
+    def user_tenants(db: Session, user_ids: Iterable[UUID]) -> Dict[UUID, UUID]:
+        tenants = {}
+        missing = []
+        for user_id in user_ids:
+            tenant_id = _user_tenants.get(user_id)
+            if tenant_id is None:
+                missing.append(user_id)
+            else:
+                tenants[user_id] = tenant_id
+
+        for start in range(0, len(missing), TENANT_LOOKUP_BATCH_SIZE):
+            rows = db.execute(
+                select(UserDetails.user_id, UserDetails.tenant_id).where(
+                    UserDetails.user_id.in_(missing[start:start + TENANT_LOOKUP_BATCH_SIZE])
+                )
+            ).all()
+            for user_id, tenant_id in rows:
+                _user_tenants.set(user_id, tenant_id)
+                tenants[user_id] = tenant_id
+
+        return tenants
+
+    @staticmethod
+    def users_permissions(db: Session, user_ids: Iterable[UUID]) -> Dict[UUID, tuple]:
+        """Permission rows for the users their tenant's snapshot covers (active users)"""
+        snapshots = {}
+        permissions = {}
+        for user_id, tenant_id in AuthzSnapshotService.user_tenants(db, user_ids).items():
+            snapshot = snapshots.get(tenant_id)
+            if snapshot is None:
+                snapshot = snapshots[tenant_id] = AuthzSnapshotService.get(db, tenant_id)
+            user_permissions = snapshot.user_permissions(user_id)
+            if user_permissions is not None:
+                permissions[user_id] = user_permissions
+        return permissions
+
+    @staticmethod
+    def lock_tenants(db: Session, tenant_ids: Iterable[UUID]) -> None:
+        """Row-lock tenants in id order; grant writers take these before any per-user lock"""
+        tenant_ids = sorted(set(tenant_ids))
+        if tenant_ids:
+            db.execute(
+                select(TenantMaster.tenant_id).where(
+                    TenantMaster.tenant_id.in_(tenant_ids)
+                ).order_by(TenantMaster.tenant_id).with_for_update()
+            ).all()
+
+    @staticmethod
+    def bump_versions(db: Session, user_ids: Iterable[UUID]) -> None:
+        """Lock and advance authz_version of the users' tenants inside the caller's transaction"""
+        user_ids = list(user_ids)
+        tenant_ids: Set[UUID] = set()
+        for start in range(0, len(user_ids), TENANT_LOOKUP_BATCH_SIZE):
+            tenant_ids.update(db.execute(
+                select(UserDetails.tenant_id).where(
+                    UserDetails.user_id.in_(user_ids[start:start + TENANT_LOOKUP_BATCH_SIZE])
+                ).distinct()
+            ).scalars())
+        if not tenant_ids:
+            return
+
+        AuthzSnapshotService.lock_tenants(db, tenant_ids)
+        db.execute(
+            update(TenantMaster).where(
+                TenantMaster.tenant_id.in_(tenant_ids)
+            ).values(
+                authz_version=TenantMaster.authz_version + 1,
+                # Not a tenant edit; keep updated_at as it was
+                updated_at=TenantMaster.updated_at
+            ).execution_options(synchronize_session=False)
+        )
+        db.info.setdefault(PENDING_TENANTS_KEY, set()).update(tenant_ids)
+
+    @staticmethod
+    def invalidate_tenants(tenant_ids: Iterable[UUID]) -> None:
+        global _generation
+        with _generation_lock:
+            _generation += 1
+            for tenant_id in tenant_ids:
+                _snapshots.pop(tenant_id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    tenant_ids: Set[UUID] = session.info.pop(PENDING_TENANTS_KEY, None)
+    if tenant_ids:
+        AuthzSnapshotService.invalidate_tenants(tenant_ids)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(PENDING_TENANTS_KEY, None)
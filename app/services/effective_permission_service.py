@@ -0,0 +1,230 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import Text, cast, delete, insert, literal, null, select, text, union_all
+from sqlalchemy.dialects.postgresql import UUID as UUID_TYPE
+from sqlalchemy.orm import Session, aliased
+from app.models.permission import PermissionMaster, PermissionUserMapping, GroupPermissionMapping, UserEffectivePermission
+from app.models.role import RolePermissionMapping, RoleMaster, UserRoleMapping, GroupRoleMapping, RoleClosure
+from app.models.group import GroupMaster, GroupUserMapping
+
+# Users refreshed per DELETE/INSERT round trip
+REFRESH_BATCH_SIZE = 1000
+
+# Columns served by effective-permission lookups; avoids loading full ORM objects
+PERMISSION_COLUMNS = ("permission_id", "permission_name", "resource", "action", "description", "is_active", "created_at", "module_id")
+
+def _lock_key(user_id: UUID) -> int:
+    """Advisory lock key of a user: the id's high 64 bits as a signed bigint"""
+    key = user_id.int >> 64
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+class EffectivePermissionService:
+    @staticmethod
+    def effective_grants(
+        user_ids: Optional[List[UUID]] = None,
+        permission_ids: Optional[List[UUID]] = None,
+        conditional: Optional[bool] = False
+    ):
+        """Every active grant path as (user_id, permission_id, source, role_id, group_id, condition) rows.
+
+        Role paths go through role_closure, so role_id is the (possibly inherited)
+        role that holds the permission; both it and the assigned role must be active.
+        ``conditional`` picks unconditional grants (default), conditional ones (True) or both (None).
+        """
+        no_id = cast(null(), UUID_TYPE)
+        no_condition = cast(null(), Text)
+        AssignedRole = aliased(RoleMaster)
+
+        # Filters go into each branch so every path can use its own indexes
+        def narrow(query, user_column, permission_column, condition_column=None):
+            if user_ids is not None:
+                query = query.where(user_column.in_(user_ids))
+            if permission_ids is not None:
+                query = query.where(permission_column.in_(permission_ids))
+            if condition_column is not None and conditional is not None:
+                query = query.where(condition_column.isnot(None) if conditional else condition_column.is_(None))
+            return query
+
+        direct = narrow(
+            select(
+                PermissionUserMapping.user_id,
+                PermissionUserMapping.permission_id,
+                literal("direct").label("source"),
+                no_id.label("role_id"),
+                no_id.label("group_id"),
+                PermissionUserMapping.condition
+            ).where(PermissionUserMapping.is_active == True),
+            PermissionUserMapping.user_id,
+            PermissionUserMapping.permission_id,
+            PermissionUserMapping.condition
+        )
+
+        via_role = narrow(
+            select(
+                UserRoleMapping.user_id,
+                RolePermissionMapping.permission_id,
+                literal("role").label("source"),
+                RoleMaster.role_id,
+                no_id.label("group_id"),
+                RolePermissionMapping.condition
+            ).join(
+                AssignedRole, AssignedRole.role_id == UserRoleMapping.role_id
+            ).join(
+                RoleClosure, RoleClosure.descendant_role_id == AssignedRole.role_id
+            ).join(
+                RoleMaster, RoleMaster.role_id == RoleClosure.ancestor_role_id
+            ).join(
+                RolePermissionMapping, RolePermissionMapping.role_id == RoleMaster.role_id
+            ).where(
+                UserRoleMapping.is_active == True,
+                AssignedRole.is_active == True,
+                RoleMaster.is_active == True,
+                RolePermissionMapping.is_active == True
+            ),
+            UserRoleMapping.user_id,
+            RolePermissionMapping.permission_id,
+            RolePermissionMapping.condition
+        )
+
+        via_group = narrow(
+            select(
+                GroupUserMapping.user_id,
+                GroupPermissionMapping.permission_id,
+                literal("group").label("source"),
+                no_id.label("role_id"),
+                GroupMaster.group_id,
+                no_condition.label("condition")
+            ).join(
+                GroupMaster, GroupMaster.group_id == GroupUserMapping.group_id
+            ).join(
+                GroupPermissionMapping, GroupPermissionMapping.group_id == GroupMaster.group_id
+            ).where(
+                GroupUserMapping.is_active == True,
+                GroupMaster.is_active == True,
+                GroupPermissionMapping.is_active == True
+            ),
+            GroupUserMapping.user_id,
+            GroupPermissionMapping.permission_id
+        )
+
+        via_group_role = narrow(
+            select(
+                GroupUserMapping.user_id,
+                RolePermissionMapping.permission_id,
+                literal("group_role").label("source"),
+                RoleMaster.role_id,
+                GroupMaster.group_id,
+                RolePermissionMapping.condition
+            ).join(
+                GroupMaster, GroupMaster.group_id == GroupUserMapping.group_id
+            ).join(
+                GroupRoleMapping, GroupRoleMapping.group_id == GroupMaster.group_id
+            ).join(
+                AssignedRole, AssignedRole.role_id == GroupRoleMapping.role_id
+            ).join(
+                RoleClosure, RoleClosure.descendant_role_id == AssignedRole.role_id
+            ).join(
+                RoleMaster, RoleMaster.role_id == RoleClosure.ancestor_role_id
+            ).join(
+                RolePermissionMapping, RolePermissionMapping.role_id == RoleMaster.role_id
+            ).where(
+                GroupUserMapping.is_active == True,
+                GroupMaster.is_active == True,
+                GroupRoleMapping.is_active == True,
+                AssignedRole.is_active == True,
+                RoleMaster.is_active == True,
+                RolePermissionMapping.is_active == True
+            ),
+            GroupUserMapping.user_id,
+            RolePermissionMapping.permission_id,
+            RolePermissionMapping.condition
+        )
+
+        # Group grants carry no condition
+        branches = [direct, via_role, via_group_role] if conditional else [direct, via_role, via_group, via_group_role]
+        return union_all(*branches).subquery("effective_grants")
+
+    @staticmethod
+    def expected_pairs(user_ids: Optional[List[UUID]] = None):
+        """Distinct (user_id, permission_id) pairs the grant mappings currently imply"""
+        grants = EffectivePermissionService.effective_grants(user_ids)
+        return select(grants.c.user_id, grants.c.permission_id).join(
+            PermissionMaster, PermissionMaster.permission_id == grants.c.permission_id
+        ).where(
+            PermissionMaster.is_active == True
+        ).distinct()
+
+    @staticmethod
+    def conditional_grants(db: Session, user_ids: List[UUID]) -> Dict[UUID, List[Tuple[str, str, str, Optional[UUID]]]]:
+        """(resource, action, condition, module_id) of each user's active conditional grants"""
+        grants = EffectivePermissionService.effective_grants(user_ids, conditional=True)
+        rows = db.execute(
+            select(
+                grants.c.user_id,
+                PermissionMaster.resource,
+                PermissionMaster.action,
+                grants.c.condition,
+                PermissionMaster.module_id
+            ).join(
+                PermissionMaster, PermissionMaster.permission_id == grants.c.permission_id
+            ).where(
+                PermissionMaster.is_active == True
+            ).distinct()
+        ).all()
+
+        by_user = {}
+        for user_id, *grant in rows:
+            by_user.setdefault(user_id, []).append(tuple(grant))
+        return by_user
+
+    @staticmethod
+    def refresh_users(db: Session, user_ids: Iterable[UUID]) -> None:
+        """Recompute materialized rows for users whose grants changed, inside the caller's transaction"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+
+        # Pending mapping changes must be visible to the recompute
+        db.flush()
+
+        # One refresh per user at a time, held until commit: a concurrent refresh of the same
+        # user waits, then recomputes from the committed mappings instead of racing on the PK.
+        # Keys are taken in sorted order so overlapping refreshes can't deadlock.
+        keys = sorted({_lock_key(user_id) for user_id in user_ids})
+        for start in range(0, len(keys), REFRESH_BATCH_SIZE):
+            db.execute(
+                text("SELECT pg_advisory_xact_lock(key) FROM unnest(CAST(:keys AS bigint[])) AS key"),
+                {"keys": keys[start:start + REFRESH_BATCH_SIZE]}
+            )
+
+        for start in range(0, len(user_ids), REFRESH_BATCH_SIZE):
+            batch = user_ids[start:start + REFRESH_BATCH_SIZE]
+            db.execute(delete(UserEffectivePermission).where(UserEffectivePermission.user_id.in_(batch)))
+            db.execute(insert(UserEffectivePermission).from_select(
+                ["user_id", "permission_id"],
+                EffectivePermissionService.expected_pairs(batch)
+            ))
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Repopulate the whole table from the mappings; the caller commits"""
+        db.execute(delete(UserEffectivePermission))
+        db.execute(insert(UserEffectivePermission).from_select(
+            ["user_id", "permission_id"],
+            EffectivePermissionService.expected_pairs()
+        ))
+        return db.query(UserEffectivePermission).count()
+
+    @staticmethod
+    def check_consistency(db: Session, limit: int = 100) -> dict:
+        """Compare the table with the mappings; returns up to ``limit`` missing and extra pairs"""
+        expected = EffectivePermissionService.expected_pairs()
+        actual = select(UserEffectivePermission.user_id, UserEffectivePermission.permission_id)
+
+        missing = db.execute(expected.except_(actual).limit(limit)).all()
+        extra = db.execute(actual.except_(expected).limit(limit)).all()
+
+        return {
+            "missing": [(row.user_id, row.permission_id) for row in missing],
+            "extra": [(row.user_id, row.permission_id) for row in extra],
+        }
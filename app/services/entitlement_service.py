@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, FrozenSet, Iterable, Optional, Sequence
+from uuid import UUID
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.module import ModuleMaster
+from app.models.tenant_subscription import TenantSubscription
+from app.services.authz_snapshot_service import AuthzSnapshotService
+from app.services.permission_cache_service import PermissionCacheService
+from app.utils.cache import TTLCache
+from app.utils.metrics import register_stats
+
+settings = get_settings()
+
+# tenant_id -> frozenset of module ids the tenant may use today
+_entitlements = TTLCache(maxsize=10000, ttl=settings.MODULE_ENTITLEMENT_TTL_SECONDS)
+register_stats("module_entitlements", _entitlements.stats)
+
+# Bumped on invalidation so a load that raced a subscription change is not stored
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class EntitlementService:
+    @staticmethod
+    def entitled_modules_query(tenant_id: UUID, today=None):
+        """Modules with an active subscription covering ``today`` (UTC); dates are inclusive"""
+        today = today or _now().date()
+        return select(TenantSubscription.module_id).join(
+            ModuleMaster, ModuleMaster.module_id == TenantSubscription.module_id
+        ).where(
+            TenantSubscription.tenant_id == tenant_id,
+            TenantSubscription.is_active == True,
+            ModuleMaster.is_active == True,
+            or_(TenantSubscription.subscription_start_date.is_(None), TenantSubscription.subscription_start_date <= today),
+            or_(TenantSubscription.subscription_end_date.is_(None), TenantSubscription.subscription_end_date >= today)
+        )
+
+    @staticmethod
+    def entitled_modules(db: Session, tenant_id: UUID) -> FrozenSet[UUID]:
+        """Cached set of modules the tenant is subscribed to right now"""
+        modules = _entitlements.get(tenant_id)
+        if modules is not None:
+            return modules
+
+        generation = _generation
+        now = _now()
+        modules = frozenset(db.execute(EntitlementService.entitled_modules_query(tenant_id, now.date())).scalars())
+
+        # Subscriptions start and lapse at midnight UTC; never serve a set past the day it was computed for
+        midnight = datetime.combine(now.date() + timedelta(days=1), time(), tzinfo=timezone.utc)
+        ttl = min(settings.MODULE_ENTITLEMENT_TTL_SECONDS, (midnight - now).total_seconds())
+        with _generation_lock:
+            if generation == _generation:
+                _entitlements.set(tenant_id, modules, ttl=ttl)
+        return modules
+
+    @staticmethod
+    def filter_by_module(db: Session, rows_by_user: Dict[UUID, Sequence], module_key) -> Dict[UUID, tuple]:
+        """Drop rows whose module (``row[module_key]``) the user's tenant is not subscribed to.
+
+        Core rows (no module) always pass; users holding only core permissions
+        cost no tenant or subscription lookup.
+        """
+        gated = [
+            user_id for user_id, rows in rows_by_user.items()
+            if any(row[module_key] is not None for row in rows)
+        ]
+        if not gated:
+            return rows_by_user
+
+        filtered = dict(rows_by_user)
+        tenants = AuthzSnapshotService.user_tenants(db, gated)
+        modules_by_tenant: Dict[UUID, FrozenSet[UUID]] = {}
+        for user_id in gated:
+            tenant_id = tenants.get(user_id)
+            modules = modules_by_tenant.get(tenant_id)
+            if modules is None:
+                modules = frozenset() if tenant_id is None else EntitlementService.entitled_modules(db, tenant_id)
+                modules_by_tenant[tenant_id] = modules
+            filtered[user_id] = tuple(
+                row for row in rows_by_user[user_id]
+                if row[module_key] is None or row[module_key] in modules
+            )
+        return filtered
+
+    @staticmethod
+    def invalidate(tenant_ids: Optional[Iterable[UUID]] = None) -> None:
+        """Forget entitlements (of some tenants, or all) and the matchers compiled from them; call after commit"""
+        global _generation
+        with _generation_lock:
+            _generation += 1
+            if tenant_ids is None:
+                _entitlements.clear()
+            else:
+                for tenant_id in tenant_ids:
+                    _entitlements.pop(tenant_id)
+        PermissionCacheService.invalidate_matchers()
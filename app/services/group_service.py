@@ -16,6 +16,8 @@ from app.models.permission import PermissionMaster, GroupPermissionMapping
 from app.models.user import UserDetails
 from app.models.tenant import TenantMaster
 from app.schemas.group import GroupCreate, GroupUpdate
+from app.services.authz_snapshot_service import AuthzSnapshotService
+from app.services.permission_cache_service import PermissionCacheService
 
 class GroupService:
     @staticmethod
@@ -85,6 +87,10 @@ class GroupService:
         for field, value in update_data.items():
             setattr(db_group, field, value)
         
+        if "is_active" in update_data:
+            GroupService._lock_members(db, group_id)
+            PermissionCacheService.mark_changed(db, PermissionCacheService.users_in_group(db, group_id))
+        
         try:
             db.commit()
             db.refresh(db_group)
@@ -112,9 +118,17 @@ class GroupService:
             )
         
         db_group.is_active = False
+        GroupService._lock_members(db, group_id)
+        PermissionCacheService.mark_changed(db, PermissionCacheService.users_in_group(db, group_id))
         db.commit()
         return True
     
+    @staticmethod
+    def _lock_members(db: Session, group_id: UUID) -> None:
+        """Lock the group's tenant before looking up its members, so a concurrent join can't miss the change"""
+        tenant_id = db.query(GroupMaster.tenant_id).filter(GroupMaster.group_id == group_id).scalar()
+        AuthzSnapshotService.lock_tenants(db, [tenant_id])
+    
     # ============ USER MAPPINGS ============
     @staticmethod
     def assign_user_to_group(db: Session, user_id: UUID, group_id: UUID) -> GroupUserMapping:
@@ -163,6 +177,7 @@ class GroupService:
             else:
                 # Reactivate assignment
                 existing.is_active = True
+                PermissionCacheService.mark_changed(db, [user_id])
                 db.commit()
                 db.refresh(existing)
                 return existing
@@ -174,6 +189,7 @@ class GroupService:
             )
             
             db.add(mapping)
+            PermissionCacheService.mark_changed(db, [user_id])
             db.commit()
             db.refresh(mapping)
             
@@ -202,6 +218,7 @@ class GroupService:
             )
         
         mapping.is_active = False
+        PermissionCacheService.mark_changed(db, [user_id])
         db.commit()
         return True
     
@@ -259,6 +276,7 @@ class GroupService:
                 detail="Group and role must belong to the same tenant"
             )
         
+        GroupService._lock_members(db, group_id)
         existing = db.query(GroupRoleMapping).filter(
             GroupRoleMapping.group_id == group_id,
             GroupRoleMapping.role_id == role_id
@@ -273,6 +291,7 @@ class GroupService:
             else:
                 # Reactivate assignment
                 existing.is_active = True
+                PermissionCacheService.mark_changed(db, PermissionCacheService.users_in_group(db, group_id))
                 db.commit()
                 db.refresh(existing)
                 return existing
@@ -284,6 +303,7 @@ class GroupService:
             )
             
             db.add(mapping)
+            PermissionCacheService.mark_changed(db, PermissionCacheService.users_in_group(db, group_id))
             db.commit()
             db.refresh(mapping)
             
@@ -312,6 +332,8 @@ class GroupService:
             )
         
         mapping.is_active = False
+        GroupService._lock_members(db, group_id)
+        PermissionCacheService.mark_changed(db, PermissionCacheService.users_in_group(db, group_id))
         db.commit()
         return True
     
@@ -352,6 +374,7 @@ class GroupService:
                 detail="Permission not found or inactive"
             )
         
+        GroupService._lock_members(db, group_id)
         existing = db.query(GroupPermissionMapping).filter(
             GroupPermissionMapping.group_id == group_id,
             GroupPermissionMapping.permission_id == permission_id
@@ -366,6 +389,7 @@ class GroupService:
             else:
                 # Reactivate assignment
                 existing.is_active = True
+                PermissionCacheService.mark_changed(db, PermissionCacheService.users_in_group(db, group_id))
                 db.commit()
                 db.refresh(existing)
                 return existing
@@ -377,6 +401,7 @@ class GroupService:
             )
             
             db.add(mapping)
+            PermissionCacheService.mark_changed(db, PermissionCacheService.users_in_group(db, group_id))
             db.commit()
             db.refresh(mapping)
             
@@ -405,6 +430,8 @@ class GroupService:
             )
         
         mapping.is_active = False
+        GroupService._lock_members(db, group_id)
+        PermissionCacheService.mark_changed(db, PermissionCacheService.users_in_group(db, group_id))
         db.commit()
         return True
     
@@ -0,0 +1,133 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+from sqlalchemy import DateTime, column, or_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from app.config import get_settings
+from app.database import engine
+from app.models.user import UserDetails
+from app.utils.metrics import register_stats
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class LastLoginBuffer:
+    """Write-behind buffer for user_details.last_login.
+
+    Logins only record (user_id, timestamp) in memory; a background thread
+    flushes the latest timestamp per user every ``flush_interval`` seconds
+    (sooner once ``max_pending`` users are waiting) as batched
+    ``UPDATE ... FROM (VALUES ...)`` statements. ``stop`` flushes whatever is
+    left, so a clean shutdown loses nothing.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int, batch_size: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending: Dict[UUID, datetime] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+        self.requeued_rows = 0
+
+    def _merge(self, user_id: UUID, logged_in_at: datetime) -> None:
+        # Caller holds self._lock
+        previous = self._pending.get(user_id)
+        if previous is None or previous < logged_in_at:
+            self._pending[user_id] = logged_in_at
+
+    def record(self, user_id: UUID, logged_in_at: datetime) -> None:
+        with self._lock:
+            self._merge(user_id, logged_in_at)
+            self.recorded += 1
+            full = len(self._pending) >= self.max_pending
+
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write all pending timestamps; returns the number of users flushed"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        items = list(pending.items())
+        try:
+            with engine.begin() as connection:
+                for start in range(0, len(items), self.batch_size):
+                    connection.execute(self._batch_update(items[start:start + self.batch_size]))
+        except Exception:
+            logger.exception("Failed to flush %d last_login updates", len(items))
+            # Put them back for the next attempt, keeping any newer logins; these are not new logins
+            with self._lock:
+                for user_id, logged_in_at in items:
+                    self._merge(user_id, logged_in_at)
+                self.failed_flushes += 1
+                self.requeued_rows += len(items)
+            return 0
+
+        self.flushes += 1
+        self.flushed_rows += len(items)
+        return len(items)
+
+    @staticmethod
+    def _batch_update(rows):
+        batch = values(
+            column("user_id", PG_UUID(as_uuid=True)),
+            column("last_login", DateTime(timezone=True)),
+            name="login_batch"
+        ).data(rows)
+
+        return update(UserDetails).where(
+            UserDetails.user_id == batch.c.user_id,
+            # Never move last_login backwards (e.g. a retried older batch)
+            or_(UserDetails.last_login.is_(None), UserDetails.last_login < batch.c.last_login)
+        ).values(last_login=batch.c.last_login)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="last-login-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+            "requeued_rows": self.requeued_rows,
+        }
+
+
+last_login_buffer = LastLoginBuffer(
+    flush_interval=settings.LAST_LOGIN_FLUSH_SECONDS,
+    max_pending=settings.LAST_LOGIN_FLUSH_MAX_PENDING,
+    batch_size=settings.LAST_LOGIN_BATCH_SIZE
+)
+register_stats("last_login_buffer", last_login_buffer.stats)
@@ -5,6 +5,7 @@ from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from app.models.module import ModuleMaster
 from app.schemas.module import ModuleCreate, ModuleUpdate
+from app.services.entitlement_service import EntitlementService
 
 class ModuleService:
     @staticmethod
@@ -59,6 +60,8 @@ class ModuleService:
         
         try:
             db.commit()
+            # Deactivating a module ends every tenant's entitlement to it
+            EntitlementService.invalidate()
             db.refresh(db_module)
             return db_module
         
@@ -82,4 +85,5 @@ class ModuleService:
         
         db_module.is_active = False
         db.commit()
+        EntitlementService.invalidate()
         return True
\ No newline at end of file
@@ -0,0 +1,144 @@
+import threading
+from typing import Any, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from sqlalchemy import event, select, union
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.group import GroupUserMapping
+from app.models.permission import PermissionUserMapping, GroupPermissionMapping
+from app.models.role import UserRoleMapping, RolePermissionMapping, GroupRoleMapping, RoleClosure
+from app.services.authz_snapshot_service import AuthzSnapshotService
+from app.services.effective_permission_service import EffectivePermissionService
+from app.utils.cache import TTLCache
+from app.utils.metrics import register_stats
+from app.utils.permission_matcher import PermissionMatcher
+
+settings = get_settings()
+
+# Session.info key holding user ids whose grants the open transaction touched
+PENDING_KEY = "permission_changed_users"
+
+_permission_cache = TTLCache(
+    maxsize=settings.PERMISSION_CACHE_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL_SECONDS
+)
+register_stats("permission_cache", _permission_cache.stats)
+
+# (PermissionMatcher, stamp) per user; invalidated together with _permission_cache.
+# PermissionService checks the stamp against the current tenant state before using it.
+_matcher_cache = TTLCache(
+    maxsize=settings.PERMISSION_CACHE_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL_SECONDS
+)
+register_stats("permission_matcher_cache", _matcher_cache.stats)
+
+# Bumped on every invalidation so a lookup that raced a grant change never caches its result
+_generation = 0
+_generation_lock = threading.Lock()
+
+class PermissionCacheService:
+    @staticmethod
+    def generation() -> int:
+        return _generation
+
+    @staticmethod
+    def get(user_id: UUID) -> Optional[list]:
+        return _permission_cache.get(user_id)
+
+    @staticmethod
+    def set(user_id: UUID, permissions: list, generation: int) -> None:
+        """Cache a user's permissions unless an invalidation happened since ``generation``"""
+        with _generation_lock:
+            if generation == _generation:
+                _permission_cache.set(user_id, permissions)
+
+    @staticmethod
+    def get_matcher(user_id: UUID) -> Optional[Tuple[PermissionMatcher, Any]]:
+        return _matcher_cache.get(user_id)
+
+    @staticmethod
+    def set_matcher(user_id: UUID, entry: Tuple[PermissionMatcher, Any], generation: int) -> None:
+        with _generation_lock:
+            if generation == _generation:
+                _matcher_cache.set(user_id, entry)
+
+    @staticmethod
+    def invalidate_users(user_ids: Iterable[UUID]) -> None:
+        global _generation
+        with _generation_lock:
+            _generation += 1
+            for user_id in user_ids:
+                _permission_cache.pop(user_id)
+                _matcher_cache.pop(user_id)
+
+    @staticmethod
+    def invalidate_matchers() -> None:
+        """Drop every compiled matcher, e.g. after a change in what tenants are entitled to"""
+        global _generation
+        with _generation_lock:
+            _generation += 1
+            _matcher_cache.clear()
+
+    @staticmethod
+    def mark_changed(db: Session, user_ids: Iterable[UUID]) -> None:
+        """Bump tenant versions and refresh materialized grants now; drop cache entries on commit"""
+        user_ids = set(user_ids)
+        # Tenant rows before the per-user refresh locks, the order hierarchy changes and syncs use
+        AuthzSnapshotService.bump_versions(db, user_ids)
+        EffectivePermissionService.refresh_users(db, user_ids)
+        db.info.setdefault(PENDING_KEY, set()).update(user_ids)
+
+    # Affected-user lookups ignore is_active so they are correct before or after the flag flips.
+    # Callers lock the tenant first (AuthzSnapshotService.lock_tenants); otherwise a concurrent
+    # assignment commits unseen by the lookup and its own refresh misses this change.
+
+    @staticmethod
+    def users_with_role(db: Session, role_id: UUID) -> List[UUID]:
+        """Users holding a role, or a role inheriting from it, directly or through a group"""
+        holders = select(RoleClosure.descendant_role_id).where(RoleClosure.ancestor_role_id == role_id)
+        return db.execute(union(
+            select(UserRoleMapping.user_id).where(UserRoleMapping.role_id.in_(holders)),
+            select(GroupUserMapping.user_id).join(
+                GroupRoleMapping, GroupRoleMapping.group_id == GroupUserMapping.group_id
+            ).where(GroupRoleMapping.role_id.in_(holders))
+        )).scalars().all()
+
+    @staticmethod
+    def users_in_group(db: Session, group_id: UUID) -> List[UUID]:
+        return db.execute(
+            select(GroupUserMapping.user_id).where(GroupUserMapping.group_id == group_id)
+        ).scalars().all()
+
+    @staticmethod
+    def users_with_permission(db: Session, permission_id: UUID) -> List[UUID]:
+        """Users granted a permission through any path"""
+        return db.execute(union(
+            select(PermissionUserMapping.user_id).where(PermissionUserMapping.permission_id == permission_id),
+            select(UserRoleMapping.user_id).join(
+                RoleClosure, RoleClosure.descendant_role_id == UserRoleMapping.role_id
+            ).join(
+                RolePermissionMapping, RolePermissionMapping.role_id == RoleClosure.ancestor_role_id
+            ).where(RolePermissionMapping.permission_id == permission_id),
+            select(GroupUserMapping.user_id).join(
+                GroupPermissionMapping, GroupPermissionMapping.group_id == GroupUserMapping.group_id
+            ).where(GroupPermissionMapping.permission_id == permission_id),
+            select(GroupUserMapping.user_id).join(
+                GroupRoleMapping, GroupRoleMapping.group_id == GroupUserMapping.group_id
+            ).join(
+                RoleClosure, RoleClosure.descendant_role_id == GroupRoleMapping.role_id
+            ).join(
+                RolePermissionMapping, RolePermissionMapping.role_id == RoleClosure.ancestor_role_id
+            ).where(RolePermissionMapping.permission_id == permission_id)
+        )).scalars().all()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    user_ids: Set[UUID] = session.info.pop(PENDING_KEY, None)
+    if user_ids:
+        PermissionCacheService.invalidate_users(user_ids)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
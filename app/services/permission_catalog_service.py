@@ -0,0 +1,61 @@
+import threading
+import time
+from typing import Iterable, Optional
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.permission import PermissionMaster
+from app.utils.permission_bitmap import PermissionCatalog
+
+settings = get_settings()
+
+_lock = threading.Lock()
+_catalog: Optional[PermissionCatalog] = None
+_loaded_at = 0.0
+
+class PermissionCatalogService:
+    @staticmethod
+    def get_catalog(db: Session) -> PermissionCatalog:
+        """Current permission catalog, reloaded at most every PERMISSION_CATALOG_TTL_SECONDS"""
+        global _catalog, _loaded_at
+
+        catalog = _catalog
+        if catalog is not None and time.monotonic() - _loaded_at < settings.PERMISSION_CATALOG_TTL_SECONDS:
+            return catalog
+
+        # Inactive permissions keep their bit so later positions never shift
+        rows = db.query(
+            PermissionMaster.permission_id,
+            PermissionMaster.resource,
+            PermissionMaster.action
+        ).order_by(
+            PermissionMaster.created_at,
+            PermissionMaster.permission_id
+        ).all()
+
+        catalog = PermissionCatalog([(str(row.permission_id), row.resource, row.action) for row in rows])
+
+        with _lock:
+            _catalog = catalog
+            _loaded_at = time.monotonic()
+
+        return catalog
+
+    @staticmethod
+    def invalidate() -> None:
+        """Force a reload after a permission is created or changed"""
+        global _catalog
+        with _lock:
+            _catalog = None
+
+    @staticmethod
+    def build_token_claims(db: Session, permission_ids: Iterable) -> dict:
+        """Permission bitmap and catalog version claims for an access token"""
+        permission_ids = [str(pid) for pid in permission_ids]
+        catalog = PermissionCatalogService.get_catalog(db)
+
+        # A permission created on another worker may postdate our cached copy
+        if any(pid not in catalog.bit_by_id for pid in permission_ids):
+            PermissionCatalogService.invalidate()
+            catalog = PermissionCatalogService.get_catalog(db)
+
+        return catalog.claims_for(permission_ids)
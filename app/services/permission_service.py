@@ -1,28 +1,75 @@
-from typing import List, Optional
+import csv
+import io
+import logging
+from operator import itemgetter
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 from uuid import UUID
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
-from app.models.permission import PermissionMaster, PermissionUserMapping, GroupPermissionMapping
-from app.models.role import RolePermissionMapping, RoleMaster, UserRoleMapping
+from app.database import SessionLocal
+from app.models.permission import PermissionMaster, PermissionUserMapping, UserEffectivePermission
+from app.models.module import ModuleMaster
+from app.models.role import RolePermissionMapping, RoleMaster
 from app.models.user import UserDetails
-from app.models.group import GroupMaster
+from app.models.tenant import TenantMaster
+from app.config import get_settings
 from app.schemas.permission import PermissionCreate, PermissionUpdate
+from app.services.permission_catalog_service import PermissionCatalogService
+from app.services.permission_cache_service import PermissionCacheService
+from app.services.effective_permission_service import EffectivePermissionService, PERMISSION_COLUMNS
+from app.services.authz_snapshot_service import AuthzSnapshotService
+from app.services.entitlement_service import EntitlementService
+from app.utils.conditions import get_evaluator
+from app.utils.permission_matcher import PermissionMatcher, SEPARATOR, WILDCARD
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when streaming who-can results
+WHO_CAN_CHUNK_ROWS = 1000
+
+# Positional access; named attribute lookups on result rows dominate large batch checks
+_resource_action = itemgetter(PERMISSION_COLUMNS.index("resource"), PERMISSION_COLUMNS.index("action"))
+_MODULE_ID = PERMISSION_COLUMNS.index("module_id")
 
 class PermissionService:
+    @staticmethod
+    def _check_module(db: Session, module_id: Optional[UUID]) -> None:
+        if module_id is None:
+            return
+        module = db.query(ModuleMaster.module_id).filter(
+            ModuleMaster.module_id == module_id,
+            ModuleMaster.is_active == True
+        ).first()
+        if not module:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Module not found or inactive"
+            )
+
+    @staticmethod
+    def _lock_all_tenants(db: Session) -> None:
+        """A catalog permission may be granted in any tenant; lock them all before looking up holders"""
+        AuthzSnapshotService.lock_tenants(db, db.execute(select(TenantMaster.tenant_id)).scalars().all())
+    
     @staticmethod
     def create_permission(db: Session, permission_data: PermissionCreate) -> PermissionMaster:
-        """Create a new permission"""
+        """Create a new permission, optionally tied to a module"""
+        PermissionService._check_module(db, permission_data.module_id)
         try:
             db_permission = PermissionMaster(
                 permission_name=permission_data.permission_name,
                 resource=permission_data.resource,
                 action=permission_data.action,
-                description=permission_data.description
+                description=permission_data.description,
+                module_id=permission_data.module_id
             )
             
             db.add(db_permission)
             db.commit()
+            PermissionCatalogService.invalidate()
             db.refresh(db_permission)
             
             return db_permission
@@ -71,11 +118,15 @@ class PermissionService:
             )
         
         update_data = permission_data.model_dump(exclude_unset=True)
+        PermissionService._check_module(db, update_data.get("module_id"))
         
         for field, value in update_data.items():
             setattr(db_permission, field, value)
         
+        PermissionService._lock_all_tenants(db)
+        PermissionCacheService.mark_changed(db, PermissionCacheService.users_with_permission(db, permission_id))
         db.commit()
+        PermissionCatalogService.invalidate()
         db.refresh(db_permission)
         return db_permission
     
@@ -94,12 +145,20 @@ class PermissionService:
             )
         
         db_permission.is_active = False
+        PermissionService._lock_all_tenants(db)
+        PermissionCacheService.mark_changed(db, PermissionCacheService.users_with_permission(db, permission_id))
         db.commit()
         return True
     
     @staticmethod
-    def assign_permission_to_user(db: Session, user_id: UUID, permission_id: UUID, assigned_by: Optional[UUID] = None) -> PermissionUserMapping:
-        """Assign permission directly to user"""
+    def assign_permission_to_user(
+        db: Session,
+        user_id: UUID,
+        permission_id: UUID,
+        assigned_by: Optional[UUID] = None,
+        condition: Optional[str] = None
+    ) -> PermissionUserMapping:
+        """Assign permission directly to user, optionally only while a condition holds"""
         # Verify user exists AND is active
         user = db.query(UserDetails).filter(
             UserDetails.user_id == user_id,
@@ -129,15 +188,17 @@ class PermissionService:
         ).first()
         
         if existing:
-            if existing.is_active:
+            if existing.is_active and existing.condition == condition:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Permission already assigned to user"
                 )
             else:
-                # Reactivate if it was soft-deleted
+                # Reactivate if it was soft-deleted, or swap the condition in place
                 existing.is_active = True
                 existing.assigned_by = assigned_by # Update who assigned it
+                existing.condition = condition
+                PermissionCacheService.mark_changed(db, [user_id])
                 db.commit()
                 db.refresh(existing)
                 return existing
@@ -146,10 +207,12 @@ class PermissionService:
             mapping = PermissionUserMapping(
                 user_id=user_id,
                 permission_id=permission_id,
-                assigned_by=assigned_by
+                assigned_by=assigned_by,
+                condition=condition
             )
             
             db.add(mapping)
+            PermissionCacheService.mark_changed(db, [user_id])
             db.commit()
             db.refresh(mapping)
             
@@ -163,8 +226,13 @@ class PermissionService:
             )
     
     @staticmethod
-    def assign_permission_to_role(db: Session, role_id: UUID, permission_id: UUID) -> RolePermissionMapping:
-        """Assign permission to role"""
+    def assign_permission_to_role(
+        db: Session,
+        role_id: UUID,
+        permission_id: UUID,
+        condition: Optional[str] = None
+    ) -> RolePermissionMapping:
+        """Assign permission to role, optionally only while a condition holds"""
         # Verify role exists AND is active
         role = db.query(RoleMaster).filter(
             RoleMaster.role_id == role_id,
@@ -187,6 +255,9 @@ class PermissionService:
                 detail="Permission not found or inactive"
             )
         
+        # Holders are looked up below; lock first so a concurrent role assignment can't slip past
+        AuthzSnapshotService.lock_tenants(db, [role.tenant_id])
+        
         # FIX: Check for ANY existing mapping (Active or Inactive)
         existing = db.query(RolePermissionMapping).filter(
             RolePermissionMapping.role_id == role_id,
@@ -194,14 +265,16 @@ class PermissionService:
         ).first()
         
         if existing:
-            if existing.is_active:
+            if existing.is_active and existing.condition == condition:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Permission already assigned to role"
                 )
             else:
-                # Reactivate if it was soft-deleted
+                # Reactivate if it was soft-deleted, or swap the condition in place
                 existing.is_active = True
+                existing.condition = condition
+                PermissionCacheService.mark_changed(db, PermissionCacheService.users_with_role(db, role_id))
                 db.commit()
                 db.refresh(existing)
                 return existing
@@ -209,10 +282,12 @@ class PermissionService:
         try:
             mapping = RolePermissionMapping(
                 role_id=role_id,
-                permission_id=permission_id
+                permission_id=permission_id,
+                condition=condition
             )
             
             db.add(mapping)
+            PermissionCacheService.mark_changed(db, PermissionCacheService.users_with_role(db, role_id))
             db.commit()
             db.refresh(mapping)
             
@@ -226,33 +301,310 @@ class PermissionService:
             )
     
     @staticmethod
-    def get_user_permissions(db: Session, user_id: UUID) -> List[PermissionMaster]:
-        """Get all permissions for a user (direct + through roles)"""
-        
-        # Direct permissions
-        direct_perms = db.query(PermissionMaster).join(
-            PermissionUserMapping, 
-            PermissionUserMapping.permission_id == PermissionMaster.permission_id
+    def get_user_permissions(db: Session, user_id: UUID, include_sources: bool = False) -> List:
+        """Get all permissions for a user (direct, roles, groups and group roles) in one query"""
+        if not include_sources:
+            return list(PermissionService.get_users_permissions(db, [user_id])[user_id])
+
+        # Grant paths are not materialized; resolve them live, conditional ones included
+        grants = EffectivePermissionService.effective_grants([user_id], conditional=None)
+        columns = [getattr(PermissionMaster, name) for name in PERMISSION_COLUMNS]
+        rows = db.query(
+            *columns, grants.c.source, grants.c.role_id, grants.c.group_id, grants.c.condition
+        ).join(
+            grants, grants.c.permission_id == PermissionMaster.permission_id
         ).filter(
-            PermissionUserMapping.user_id == user_id,
-            PermissionUserMapping.is_active == True,
             PermissionMaster.is_active == True
         ).all()
-        
-        # Permissions through roles
-        role_perms = db.query(PermissionMaster).join(
-            RolePermissionMapping,
-            RolePermissionMapping.permission_id == PermissionMaster.permission_id
-        ).join(
-            UserRoleMapping,
-            UserRoleMapping.role_id == RolePermissionMapping.role_id
-        ).filter(
-            UserRoleMapping.user_id == user_id,
-            PermissionMaster.is_active == True,
-            RolePermissionMapping.is_active == True, 
-            UserRoleMapping.is_active == True
+
+        permissions = {}
+        for row in rows:
+            entry = permissions.get(row.permission_id)
+            if entry is None:
+                entry = {name: getattr(row, name) for name in PERMISSION_COLUMNS}
+                entry["sources"] = []
+                permissions[row.permission_id] = entry
+            entry["sources"].append({
+                "source": row.source,
+                "role_id": row.role_id,
+                "group_id": row.group_id,
+                "condition": row.condition
+            })
+
+        return list(EntitlementService.filter_by_module(db, {user_id: list(permissions.values())}, "module_id")[user_id])
+    
+    @staticmethod
+    def get_users_permissions(db: Session, user_ids: Iterable[UUID]) -> Dict[UUID, List]:
+        """Effective permissions for many users: snapshot or cache hits plus one query for the rest"""
+        # Cached rows are ungated; subscriptions lapse by date, so gate on every read
+        return EntitlementService.filter_by_module(db, PermissionService._granted_permissions(db, user_ids), _MODULE_ID)
+    
+    @staticmethod
+    def _granted_permissions(db: Session, user_ids: Iterable[UUID]) -> Dict[UUID, tuple]:
+        """Every permission granted to each user, before the subscription gate"""
+        user_ids = set(user_ids)
+        permissions = {}
+        if settings.RBAC_SNAPSHOT_ENABLED:
+            # Active users of snapshotted tenants; anyone else falls through to the cache and table
+            permissions.update(AuthzSnapshotService.users_permissions(db, user_ids))
+
+        missing = []
+        for user_id in user_ids:
+            if user_id in permissions:
+                continue
+            cached = PermissionCacheService.get(user_id)
+            if cached is None:
+                missing.append(user_id)
+            else:
+                permissions[user_id] = cached
+
+        if missing:
+            generation = PermissionCacheService.generation()
+            columns = [getattr(PermissionMaster, name) for name in PERMISSION_COLUMNS]
+            rows = db.query(*columns, UserEffectivePermission.user_id.label("grantee_id")).join(
+                PermissionMaster,
+                PermissionMaster.permission_id == UserEffectivePermission.permission_id
+            ).filter(
+                UserEffectivePermission.user_id.in_(missing)
+            ).all()
+
+            loaded = {user_id: [] for user_id in missing}
+            for row in rows:
+                loaded[row.grantee_id].append(row)
+
+            for user_id, user_permissions in loaded.items():
+                user_permissions = tuple(user_permissions)
+                PermissionCacheService.set(user_id, user_permissions, generation)
+                permissions[user_id] = user_permissions
+
+        return permissions
+    
+    @staticmethod
+    def get_users_matchers(db: Session, user_ids: Iterable[UUID]) -> Dict[UUID, PermissionMatcher]:
+        """Compiled wildcard- and condition-aware matchers for many users, cached like their permissions.
+
+        Each cached matcher is stamped with what it was compiled against: its
+        tenant's authz_version (with snapshots enabled) and, for users holding
+        module permissions, the tenant's entitled modules. It is recompiled once
+        either moves, so matchers are as fresh as the snapshots and the
+        entitlement cache (which never outlives its UTC day).
+        """
+        user_ids = set(user_ids)
+        tenants = AuthzSnapshotService.user_tenants(db, user_ids)
+        versions: Dict[UUID, int] = {}
+
+        def current_version(user_id: UUID) -> Optional[int]:
+            tenant_id = tenants.get(user_id)
+            if tenant_id is None or not settings.RBAC_SNAPSHOT_ENABLED:
+                return None
+            if tenant_id not in versions:
+                versions[tenant_id] = AuthzSnapshotService.get(db, tenant_id).version
+            return versions[tenant_id]
+
+        def current_modules(user_id: UUID) -> FrozenSet[UUID]:
+            tenant_id = tenants.get(user_id)
+            return frozenset() if tenant_id is None else EntitlementService.entitled_modules(db, tenant_id)
+
+        matchers = {}
+        missing = []
+        for user_id in user_ids:
+            cached = PermissionCacheService.get_matcher(user_id)
+            if cached is not None:
+                matcher, version, modules = cached
+                if version == current_version(user_id) and (modules is None or modules == current_modules(user_id)):
+                    matchers[user_id] = matcher
+                    continue
+            missing.append(user_id)
+
+        if missing:
+            # Taken before loading so a grant change during compilation is never cached
+            generation = PermissionCacheService.generation()
+            versions_before = {user_id: current_version(user_id) for user_id in missing}
+            granted = PermissionService._granted_permissions(db, missing)
+            granted_conditional = EffectivePermissionService.conditional_grants(db, missing)
+            # Stamped before gating: if entitlements move in between, the stamp is the stale one
+            modules_before = {
+                user_id: current_modules(user_id)
+                for user_id in missing
+                if any(row[_MODULE_ID] is not None for row in granted.get(user_id, ()))
+                or any(grant[-1] is not None for grant in granted_conditional.get(user_id, ()))
+            }
+            by_user = EntitlementService.filter_by_module(db, granted, _MODULE_ID)
+            # module_id is the last field of each conditional grant
+            conditional = EntitlementService.filter_by_module(db, granted_conditional, -1)
+            for user_id, user_permissions in by_user.items():
+                matcher = PermissionMatcher(
+                    map(_resource_action, user_permissions),
+                    PermissionService._compile_conditions(conditional.get(user_id, ()))
+                )
+                PermissionCacheService.set_matcher(
+                    user_id, (matcher, versions_before[user_id], modules_before.get(user_id)), generation
+                )
+                matchers[user_id] = matcher
+
+        return matchers
+    
+    @staticmethod
+    def _compile_conditions(grants: Iterable[Tuple[str, str, str, Optional[UUID]]]) -> List[Tuple[str, str, Any]]:
+        compiled = []
+        for resource, action, condition, _ in grants:
+            try:
+                compiled.append((resource, action, get_evaluator(condition)))
+            except ValueError:
+                # Written around the API; a grant whose condition can't be compiled never applies
+                logger.warning("Ignoring grant on %s:%s with invalid condition %r", resource, action, condition)
+        return compiled
+
+    @staticmethod
+    def condition_context(user_id: UUID, context: Optional[Mapping[str, Any]]) -> dict:
+        """Evaluation context for a check; user.id is always the checked user"""
+        context = dict(context or {})
+        context["user"] = {**context.get("user", {}), "id": str(user_id)}
+        return context
+
+    @staticmethod
+    def check_permissions(
+        db: Session,
+        checks: List[Tuple[UUID, str, str]],
+        contexts: Optional[Sequence[Optional[Mapping[str, Any]]]] = None
+    ) -> List[bool]:
+        """Answer (user_id, resource, action) checks in request order.
+
+        ``contexts`` holds one optional attribute mapping per check ("resource",
+        "request", "user") for conditional grants; they are only built into an
+        evaluation context for users that have conditional grants.
+        """
+        matchers = PermissionService.get_users_matchers(db, [user_id for user_id, _, _ in checks])
+        if contexts is None:
+            contexts = [None] * len(checks)
+
+        results = []
+        for (user_id, resource, action), context in zip(checks, contexts):
+            matcher = matchers[user_id]
+            if matcher.conditional:
+                context = PermissionService.condition_context(user_id, context)
+            results.append(matcher.allows(resource, action, context))
+        return results
+    
+    @staticmethod
+    def _who_can_query(tenant_id: UUID, permission_ids: List[UUID]):
+        grants = EffectivePermissionService.effective_grants(permission_ids=permission_ids)
+        # Nobody holds a module permission while the tenant is not subscribed to the module
+        entitled = select(PermissionMaster.permission_id).where(
+            PermissionMaster.permission_id.in_(permission_ids),
+            or_(
+                PermissionMaster.module_id.is_(None),
+                PermissionMaster.module_id.in_(EntitlementService.entitled_modules_query(tenant_id))
+            )
+        )
+        return select(
+            UserDetails.user_id,
+            UserDetails.email,
+            UserDetails.firstname,
+            UserDetails.lastname
+        ).where(
+            UserDetails.tenant_id == tenant_id,
+            UserDetails.is_active == True,
+            UserDetails.user_id.in_(select(grants.c.user_id).where(grants.c.permission_id.in_(entitled)))
+        ).order_by(UserDetails.user_id)
+    
+    @staticmethod
+    def get_covering_permissions(db: Session, resource: str, action: str) -> List[PermissionMaster]:
+        """Active permissions granting a resource-action pair: the exact row plus every wildcard covering it"""
+        # "reports/*" covers what lies below reports, not reports itself
+        segments = resource.split(SEPARATOR)
+        resources = [WILDCARD] + [
+            SEPARATOR.join(segments[:depth] + [WILDCARD]) for depth in range(1, len(segments))
+        ] + [resource]
+        permissions = db.query(PermissionMaster).filter(
+            PermissionMaster.resource.in_(resources),
+            PermissionMaster.action.in_([action, WILDCARD]),
+            PermissionMaster.is_active == True
         ).all()
         
-        # Combine and deduplicate
-        all_perms = {perm.permission_id: perm for perm in direct_perms + role_perms}
-        return list(all_perms.values())
\ No newline at end of file
+        if not permissions:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No active permission covers this resource and action"
+            )
+        
+        return permissions
+    
+    @staticmethod
+    def who_can(
+        db: Session,
+        tenant_id: UUID,
+        resource: str,
+        action: str,
+        after: Optional[UUID] = None,
+        limit: int = 100,
+        include_sources: bool = False
+    ) -> dict:
+        """Active users in a tenant granted an action on a resource by any covering permission, keyset-paginated by user_id"""
+        permissions = PermissionService.get_covering_permissions(db, resource, action)
+        permission_ids = [permission.permission_id for permission in permissions]
+        query = PermissionService._who_can_query(tenant_id, permission_ids)
+        if after is not None:
+            query = query.where(UserDetails.user_id > after)
+        
+        rows = db.execute(query.limit(limit)).all()
+        users = [dict(row._mapping) for row in rows]
+        
+        if include_sources and users:
+            grants = EffectivePermissionService.effective_grants(
+                user_ids=[user["user_id"] for user in users],
+                permission_ids=permission_ids
+            )
+            sources = {}
+            for grant in db.execute(select(grants)).all():
+                sources.setdefault(grant.user_id, []).append({
+                    "source": grant.source,
+                    "role_id": grant.role_id,
+                    "group_id": grant.group_id,
+                    "permission_id": grant.permission_id
+                })
+            for user in users:
+                user["sources"] = sources.get(user["user_id"], [])
+        
+        exact = next(
+            (permission.permission_id for permission in permissions
+             if permission.resource == resource and permission.action == action),
+            None
+        )
+        return {
+            "permission_id": exact,
+            "permission_ids": permission_ids,
+            "users": users,
+            "next_after": users[-1]["user_id"] if len(users) == limit else None
+        }
+    
+    @staticmethod
+    def iter_who_can_csv(tenant_id: UUID, permission_ids: List[UUID]) -> Iterator[str]:
+        """Every matching user as CSV, streamed from a server-side cursor on its own session"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(("user_id", "email", "firstname", "lastname"))
+        
+        # The request's session is closed before a streamed body is sent
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                PermissionService._who_can_query(tenant_id, permission_ids).execution_options(yield_per=WHO_CAN_CHUNK_ROWS)
+            )
+            for partition in result.partitions():
+                writer.writerows(partition)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        finally:
+            db.close()
+        
+        yield buffer.getvalue()
+    
+    @staticmethod
+    def get_permission_claims(db: Session, user_id: UUID) -> dict:
+        """User's effective permissions as compact access token claims"""
+        permissions = PermissionService.get_user_permissions(db, user_id)
+        return PermissionCatalogService.build_token_claims(
+            db, [perm.permission_id for perm in permissions]
+        )
@@ -0,0 +1,164 @@
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from app.models.group import GroupMaster, GroupUserMapping
+from app.models.permission import PermissionMaster, GroupPermissionMapping
+from app.models.role import RoleMaster, UserRoleMapping, GroupRoleMapping
+from app.models.tenant import TenantMaster
+from app.models.user import UserDetails
+from app.schemas.tenant import RbacSyncRequest
+from app.services.permission_cache_service import PermissionCacheService
+
+# Ids per UPDATE ... WHERE id IN (...) and per member lookup
+SYNC_BATCH_SIZE = 1000
+
+# Request field -> (mapping model, left id column, right id column, column whose role/group scopes rows to a tenant)
+SYNC_KINDS = {
+    "user_roles": (UserRoleMapping, "user_id", "role_id", "role_id"),
+    "group_users": (GroupUserMapping, "user_id", "group_id", "group_id"),
+    "group_roles": (GroupRoleMapping, "group_id", "role_id", "group_id"),
+    "group_permissions": (GroupPermissionMapping, "group_id", "permission_id", "group_id"),
+}
+
+Pair = Tuple[UUID, UUID]
+
+def _batches(items: List, size: int = SYNC_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class RbacSyncService:
+    @staticmethod
+    def _active_ids(db: Session, tenant_id: UUID) -> Dict[str, Set[UUID]]:
+        """Ids a desired edge may reference: the tenant's active users, roles and groups, and active permissions"""
+        return {
+            "user_id": set(db.execute(
+                select(UserDetails.user_id).where(UserDetails.tenant_id == tenant_id, UserDetails.is_active == True)
+            ).scalars()),
+            "role_id": set(db.execute(
+                select(RoleMaster.role_id).where(RoleMaster.tenant_id == tenant_id, RoleMaster.is_active == True)
+            ).scalars()),
+            "group_id": set(db.execute(
+                select(GroupMaster.group_id).where(GroupMaster.tenant_id == tenant_id, GroupMaster.is_active == True)
+            ).scalars()),
+            "permission_id": set(db.execute(
+                select(PermissionMaster.permission_id).where(PermissionMaster.is_active == True)
+            ).scalars()),
+        }
+
+    @staticmethod
+    def _current_rows(db: Session, tenant_id: UUID, kind: str) -> Dict[Pair, Tuple[UUID, bool]]:
+        """Every mapping row of a kind in the tenant, active or not: (left, right) -> (id, is_active)"""
+        model, left, right, scope_field = SYNC_KINDS[kind]
+        scope = RoleMaster if scope_field == "role_id" else GroupMaster
+        rows = db.execute(
+            select(model.id, getattr(model, left), getattr(model, right), model.is_active).join(
+                scope, getattr(scope, scope_field) == getattr(model, scope_field)
+            ).where(scope.tenant_id == tenant_id)
+        ).all()
+        return {(row[1], row[2]): (row[0], row[3]) for row in rows}
+
+    @staticmethod
+    def sync(db: Session, tenant_id: UUID, desired: RbacSyncRequest, dry_run: bool = False) -> dict:
+        """Make the tenant's mappings of each sent kind match the desired edges exactly, in one transaction.
+
+        Only the difference is written: missing edges are inserted or reactivated,
+        extra ones deactivated. Rows pointing at inactive users, roles or groups
+        are outside the desired state and left as they are.
+        """
+        # Serializes syncs and hierarchy changes of the tenant
+        tenant = db.query(TenantMaster.tenant_id).filter(TenantMaster.tenant_id == tenant_id).with_for_update().first()
+        if not tenant:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tenant not found"
+            )
+
+        kinds = [kind for kind in SYNC_KINDS if getattr(desired, kind) is not None]
+        active = RbacSyncService._active_ids(db, tenant_id) if kinds else {}
+
+        plans = {}
+        for kind in kinds:
+            _, left, right, _ = SYNC_KINDS[kind]
+            wanted: Set[Pair] = set()
+            for position, edge in enumerate(getattr(desired, kind)):
+                pair = (getattr(edge, left), getattr(edge, right))
+                for field, value in zip((left, right), pair):
+                    if value not in active[field]:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"{kind}[{position}]: {field} not found or inactive in this tenant"
+                        )
+                wanted.add(pair)
+
+            current = RbacSyncService._current_rows(db, tenant_id, kind)
+            # Only rows between active entities are managed
+            managed = {
+                pair for pair, (_, is_active) in current.items()
+                if is_active and pair[0] in active[left] and pair[1] in active[right]
+            }
+            missing = wanted - managed
+            plans[kind] = {
+                "insert": [pair for pair in missing if pair not in current],
+                "reactivate": [current[pair][0] for pair in missing if pair in current],
+                "deactivate": [current[pair][0] for pair in managed - wanted],
+                "changed": missing | (managed - wanted),
+                "unchanged": len(wanted & managed),
+            }
+
+        # Users whose effective permissions can move: direct holders, plus members of touched groups
+        affected: Set[UUID] = set()
+        touched_groups: Set[UUID] = set()
+        for kind, plan in plans.items():
+            _, left, _, _ = SYNC_KINDS[kind]
+            if left == "user_id":
+                affected.update(user_id for user_id, _ in plan["changed"])
+            else:
+                touched_groups.update(group_id for group_id, _ in plan["changed"])
+        for batch in _batches(list(touched_groups)):
+            affected.update(db.execute(
+                select(GroupUserMapping.user_id).where(GroupUserMapping.group_id.in_(batch))
+            ).scalars())
+
+        result = {
+            "tenant_id": tenant_id,
+            "dry_run": dry_run,
+            "affected_user_count": len(affected),
+        }
+        for kind, plan in plans.items():
+            result[kind] = {
+                "added": len(plan["insert"]),
+                "reactivated": len(plan["reactivate"]),
+                "deactivated": len(plan["deactivate"]),
+                "unchanged": plan["unchanged"],
+            }
+
+        if dry_run:
+            db.rollback()
+            return result
+
+        try:
+            for kind, plan in plans.items():
+                model, left, right, _ = SYNC_KINDS[kind]
+                for is_active, ids in ((True, plan["reactivate"]), (False, plan["deactivate"])):
+                    for batch in _batches(ids):
+                        db.execute(
+                            update(model).where(model.id.in_(batch)).values(is_active=is_active)
+                            .execution_options(synchronize_session=False)
+                        )
+                if plan["insert"]:
+                    # executemany; the driver batches the rows into multi-row INSERTs
+                    db.execute(insert(model), [{left: a, right: b} for a, b in plan["insert"]])
+
+            PermissionCacheService.mark_changed(db, affected)
+            db.commit()
+        except IntegrityError:
+            # Single-edge assign routes don't take the tenant lock; one of them won the race for a pair
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Mappings changed while syncing; retry the sync"
+            )
+        return result
@@ -3,11 +3,13 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
-from app.models.role import RoleMaster, UserRoleMapping, RolePermissionMapping
+from app.models.role import RoleMaster, UserRoleMapping, RolePermissionMapping, RoleInheritance, RoleClosure
 from app.models.user import UserDetails
 from app.models.permission import PermissionMaster
 from app.models.tenant import TenantMaster  # <--- Added Import
 from app.schemas.role import RoleCreate, RoleUpdate
+from app.services.authz_snapshot_service import AuthzSnapshotService
+from app.services.permission_cache_service import PermissionCacheService
 
 class RoleService:
     @staticmethod
@@ -34,6 +36,9 @@ class RoleService:
             )
             
             db.add(db_role)
+            db.flush()
+            # Every role is its own ancestor, so resolution needs one closure join
+            db.add(RoleClosure(ancestor_role_id=db_role.role_id, descendant_role_id=db_role.role_id, path_count=1))
             db.commit()
             db.refresh(db_role)
             
@@ -80,10 +85,26 @@ class RoleService:
                  )
         
         update_data = role_data.model_dump(exclude_unset=True)
+        if "is_active" in update_data:
+            RoleService._lock_hierarchy(db, db_role.tenant_id)
+            # Re-read under the lock: a concurrent (de)activation may have committed meanwhile
+            db.refresh(db_role)
+        was_active = db_role.is_active
         
         for field, value in update_data.items():
             setattr(db_role, field, value)
         
+        if "is_active" in update_data:
+            # Inheritance only flows through active roles; descendants are looked up while linked
+            if was_active and not db_role.is_active:
+                affected = PermissionCacheService.users_with_role(db, role_id)
+                RoleService._apply_role_edges(db, role_id, -1)
+            else:
+                if db_role.is_active and not was_active:
+                    RoleService._apply_role_edges(db, role_id, 1)
+                affected = PermissionCacheService.users_with_role(db, role_id)
+            PermissionCacheService.mark_changed(db, affected)
+        
         try:
             db.commit()
             db.refresh(db_role)
@@ -116,7 +137,18 @@ class RoleService:
                 detail="Cannot delete system role"
             )
         
+        RoleService._lock_hierarchy(db, db_role.tenant_id)
+        db.refresh(db_role)
+        if not db_role.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Role not found"
+            )
+        
+        affected = PermissionCacheService.users_with_role(db, role_id)
         db_role.is_active = False
+        RoleService._apply_role_edges(db, role_id, -1)
+        PermissionCacheService.mark_changed(db, affected)
         db.commit()
         return True
     
@@ -168,6 +200,7 @@ class RoleService:
                 # Reactivate assignment
                 existing.is_active = True
                 existing.assigned_by = assigned_by
+                PermissionCacheService.mark_changed(db, [user_id])
                 db.commit()
                 db.refresh(existing)
                 return existing
@@ -180,6 +213,7 @@ class RoleService:
             )
             
             db.add(mapping)
+            PermissionCacheService.mark_changed(db, [user_id])
             db.commit()
             db.refresh(mapping)
             
@@ -208,6 +242,7 @@ class RoleService:
             )
         
         mapping.is_active = False
+        PermissionCacheService.mark_changed(db, [user_id])
         db.commit()
         return True
     
@@ -220,4 +255,198 @@ class RoleService:
             UserRoleMapping.user_id == user_id,
             UserRoleMapping.is_active == True,
             RoleMaster.is_active == True
-        ).all()
\ No newline at end of file
+        ).all()
+    
+    @staticmethod
+    def _apply_inheritance_edge(db: Session, parent_role_id: UUID, child_role_id: UUID, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) the closure paths that run through one edge"""
+        db.flush()
+        ancestors = db.query(RoleClosure.ancestor_role_id, RoleClosure.path_count).filter(
+            RoleClosure.descendant_role_id == parent_role_id
+        ).all()
+        descendants = db.query(RoleClosure.descendant_role_id, RoleClosure.path_count).filter(
+            RoleClosure.ancestor_role_id == child_role_id
+        ).all()
+        
+        existing = {
+            (row.ancestor_role_id, row.descendant_role_id): row
+            for row in db.query(RoleClosure).filter(
+                RoleClosure.ancestor_role_id.in_([a.ancestor_role_id for a in ancestors]),
+                RoleClosure.descendant_role_id.in_([d.descendant_role_id for d in descendants])
+            )
+        }
+        
+        # Every path ancestor -> parent -> child -> descendant gains or loses one count
+        for ancestor in ancestors:
+            for descendant in descendants:
+                delta = sign * ancestor.path_count * descendant.path_count
+                row = existing.get((ancestor.ancestor_role_id, descendant.descendant_role_id))
+                if row is None:
+                    # A path that was never counted has nothing to remove
+                    if sign > 0:
+                        db.add(RoleClosure(
+                            ancestor_role_id=ancestor.ancestor_role_id,
+                            descendant_role_id=descendant.descendant_role_id,
+                            path_count=delta
+                        ))
+                elif row.path_count + delta > 0:
+                    row.path_count += delta
+                else:
+                    db.delete(row)
+    
+    @staticmethod
+    def _creates_cycle(db: Session, parent_role_id: UUID, child_role_id: UUID) -> bool:
+        """Whether adding parent -> child closes a loop in the current closure"""
+        db.flush()
+        return parent_role_id == child_role_id or db.query(RoleClosure.path_count).filter(
+            RoleClosure.ancestor_role_id == child_role_id,
+            RoleClosure.descendant_role_id == parent_role_id
+        ).first() is not None
+    
+    @staticmethod
+    def _lock_hierarchy(db: Session, tenant_id: UUID) -> None:
+        """Serialize hierarchy and grant changes per tenant so closure counts stay exact"""
+        AuthzSnapshotService.lock_tenants(db, [tenant_id])
+    
+    @staticmethod
+    def _lock_role_hierarchy(db: Session, role_id: UUID) -> None:
+        """Lock the hierarchy of the role's tenant; an unknown role locks nothing"""
+        tenant_id = db.query(RoleMaster.tenant_id).filter(RoleMaster.role_id == role_id).scalar()
+        if tenant_id is not None:
+            RoleService._lock_hierarchy(db, tenant_id)
+    
+    @staticmethod
+    def _apply_role_edges(db: Session, role_id: UUID, sign: int) -> None:
+        """Add or remove a role's active edges to/from active roles, as it is (de)activated.
+
+        Edges stored while the role was inactive were never cycle-checked
+        against it, so reactivation checks each one and rejects with 409.
+        """
+        edges = db.query(RoleInheritance).filter(
+            RoleInheritance.is_active == True,
+            (RoleInheritance.parent_role_id == role_id) | (RoleInheritance.child_role_id == role_id)
+        ).all()
+        others = [edge.child_role_id if edge.parent_role_id == role_id else edge.parent_role_id for edge in edges]
+        active = {
+            other_id for (other_id,) in db.query(RoleMaster.role_id).filter(
+                RoleMaster.role_id.in_(others),
+                RoleMaster.is_active == True
+            )
+        }
+        
+        for edge, other_id in zip(edges, others):
+            if other_id in active:
+                if sign > 0 and RoleService._creates_cycle(db, edge.parent_role_id, edge.child_role_id):
+                    db.rollback()
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"Reactivating the role would create an inheritance cycle through "
+                               f"{edge.parent_role_id} -> {edge.child_role_id}; remove that inheritance first"
+                    )
+                RoleService._apply_inheritance_edge(db, edge.parent_role_id, edge.child_role_id, sign)
+    
+    @staticmethod
+    def add_role_inheritance(db: Session, parent_role_id: UUID, child_role_id: UUID) -> RoleInheritance:
+        """Make child_role inherit every permission of parent_role"""
+        # Lock before reading: a concurrent change may (de)activate either role or the edge
+        RoleService._lock_role_hierarchy(db, parent_role_id)
+        roles = {
+            role.role_id: role
+            for role in db.query(RoleMaster).filter(
+                RoleMaster.role_id.in_([parent_role_id, child_role_id]),
+                RoleMaster.is_active == True
+            ).populate_existing()
+        }
+        parent = roles.get(parent_role_id)
+        child = roles.get(child_role_id)
+        if not parent or not child:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Role not found or inactive"
+            )
+        
+        if parent.tenant_id != child.tenant_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Parent and child roles must belong to the same tenant"
+            )
+        
+        if RoleService._creates_cycle(db, parent_role_id, child_role_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Role inheritance would create a cycle"
+            )
+        
+        existing = db.query(RoleInheritance).filter(
+            RoleInheritance.parent_role_id == parent_role_id,
+            RoleInheritance.child_role_id == child_role_id
+        ).populate_existing().first()
+        
+        if existing:
+            if existing.is_active:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Role already inherits from this parent"
+                )
+            # Reactivate edge
+            existing.is_active = True
+            edge = existing
+        else:
+            edge = RoleInheritance(parent_role_id=parent_role_id, child_role_id=child_role_id)
+            db.add(edge)
+        
+        try:
+            RoleService._apply_inheritance_edge(db, parent_role_id, child_role_id, 1)
+            PermissionCacheService.mark_changed(db, PermissionCacheService.users_with_role(db, child_role_id))
+            db.commit()
+            db.refresh(edge)
+            return edge
+        
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to add role inheritance"
+            )
+    
+    @staticmethod
+    def remove_role_inheritance(db: Session, parent_role_id: UUID, child_role_id: UUID) -> bool:
+        """Soft remove an inheritance edge"""
+        # Lock before reading, so two concurrent removals can't both see the edge active
+        RoleService._lock_role_hierarchy(db, parent_role_id)
+        edge = db.query(RoleInheritance).filter(
+            RoleInheritance.parent_role_id == parent_role_id,
+            RoleInheritance.child_role_id == child_role_id,
+            RoleInheritance.is_active == True
+        ).populate_existing().first()
+        
+        if not edge:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Role inheritance not found"
+            )
+        
+        roles = db.query(RoleMaster.is_active).filter(
+            RoleMaster.role_id.in_([parent_role_id, child_role_id])
+        ).all()
+        
+        edge.is_active = False
+        # Edges touching an inactive role are already out of the closure
+        if all(role.is_active for role in roles):
+            # Users are looked up first: the child's descendants don't depend on this edge
+            affected = PermissionCacheService.users_with_role(db, child_role_id)
+            RoleService._apply_inheritance_edge(db, parent_role_id, child_role_id, -1)
+            PermissionCacheService.mark_changed(db, affected)
+        db.commit()
+        return True
+    
+    @staticmethod
+    def get_inherited_roles(db: Session, role_id: UUID) -> List[RoleMaster]:
+        """Get all active roles a role inherits from, directly or transitively"""
+        return db.query(RoleMaster).join(
+            RoleClosure, RoleClosure.ancestor_role_id == RoleMaster.role_id
+        ).filter(
+            RoleClosure.descendant_role_id == role_id,
+            RoleClosure.ancestor_role_id != role_id,
+            RoleMaster.is_active == True
+        ).all()
@@ -0,0 +1,258 @@
+import hashlib
+import logging
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from uuid import UUID
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.session import UserSession
+from app.models.user import UserDetails
+from app.utils.bloom import BloomFilter
+from app.utils.metrics import register_stats
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+def _hash_refresh_token(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+class RevocationFilter:
+    """In-memory Bloom filter of revoked, still-unexpired session ids.
+
+    ``is_revoked`` answers the common not-revoked case from memory; only a
+    Bloom hit (a real revocation or a rare false positive) is confirmed
+    against user_session. A background thread folds in sessions revoked
+    since the last sync every ``sync_interval`` seconds and rebuilds the
+    filter from scratch every ``rebuild_interval`` so expired sessions age out.
+    """
+
+    # Re-scan this far behind the watermark to catch late-committing revocations
+    SYNC_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, capacity: int, error_rate: float, sync_interval: float, rebuild_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._watermark: Optional[datetime] = None
+        self._rebuilt_at = 0.0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.checks = 0
+        self.bloom_hits = 0
+        self.confirmed = 0
+
+    def add(self, session_id: UUID) -> None:
+        with self._lock:
+            self._bloom.add(session_id.bytes)
+
+    def _load(self, db: Session, since: Optional[datetime]):
+        query = db.query(UserSession.session_id, UserSession.revoked_at).filter(
+            UserSession.revoked_at.isnot(None),
+            UserSession.expires_at > datetime.now(timezone.utc)
+        )
+        if since is not None:
+            query = query.filter(UserSession.revoked_at > since - self.SYNC_OVERLAP)
+        return query.all()
+
+    def rebuild(self) -> None:
+        """Replace the filter with one built from every unexpired revoked session"""
+        db = SessionLocal()
+        try:
+            rows = self._load(db, None)
+        finally:
+            db.close()
+
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+        for row in rows:
+            bloom.add(row.session_id.bytes)
+
+        with self._lock:
+            # Revocations added locally while loading may be missing; re-sync covers them
+            self._bloom = bloom
+            self._watermark = max((row.revoked_at for row in rows), default=None)
+            self._rebuilt_at = time.monotonic()
+
+    def sync(self) -> None:
+        """Add sessions revoked since the last sync"""
+        db = SessionLocal()
+        try:
+            rows = self._load(db, self._watermark)
+        finally:
+            db.close()
+
+        with self._lock:
+            for row in rows:
+                self._bloom.add(row.session_id.bytes)
+                if self._watermark is None or row.revoked_at > self._watermark:
+                    self._watermark = row.revoked_at
+
+    def is_revoked(self, db: Session, session_id: UUID) -> bool:
+        self.checks += 1
+        if session_id.bytes not in self._bloom:
+            return False
+
+        self.bloom_hits += 1
+        revoked_at = db.query(UserSession.revoked_at).filter(
+            UserSession.session_id == session_id
+        ).scalar()
+
+        if revoked_at is not None:
+            self.confirmed += 1
+            return True
+        return False
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.sync_interval):
+            try:
+                if time.monotonic() - self._rebuilt_at >= self.rebuild_interval:
+                    self.rebuild()
+                self.sync()
+            except Exception:
+                logger.exception("Failed to refresh the session revocation filter")
+
+    def start(self) -> None:
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Initial revocation filter load failed; retrying in background")
+
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="revocation-filter", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "entries": self._bloom.count,
+            "capacity": self._bloom.capacity,
+            "checks": self.checks,
+            "bloom_hits": self.bloom_hits,
+            "confirmed_revoked": self.confirmed,
+        }
+
+
+revocation_filter = RevocationFilter(
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.REVOCATION_FILTER_ERROR_RATE,
+    sync_interval=settings.REVOCATION_SYNC_SECONDS,
+    rebuild_interval=settings.REVOCATION_REBUILD_SECONDS
+)
+register_stats("revocation_filter", revocation_filter.stats)
+
+class SessionService:
+    @staticmethod
+    def create_session(db: Session, user_id: UUID) -> Tuple[UUID, str]:
+        """Open a refresh session; returns (session_id, refresh_token)"""
+        refresh_token = secrets.token_urlsafe(32)
+
+        db_session = UserSession(
+            user_id=user_id,
+            refresh_token_hash=_hash_refresh_token(refresh_token),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        )
+
+        db.add(db_session)
+        db.commit()
+
+        return db_session.session_id, refresh_token
+
+    @staticmethod
+    def rotate_session(db: Session, refresh_token: str) -> Tuple[UserDetails, UUID, str]:
+        """Exchange a refresh token for a new one; returns (user, session_id, refresh_token).
+
+        The swap is a single conditional UPDATE, so of two concurrent refreshes
+        with the same token only one wins. Presenting the token a session was
+        just rotated away from revokes that session: either the loser of such a
+        race or someone replaying a stolen token.
+        """
+        now = datetime.now(timezone.utc)
+        token_hash = _hash_refresh_token(refresh_token)
+        new_refresh_token = secrets.token_urlsafe(32)
+
+        rotated = db.execute(
+            update(UserSession).where(
+                UserSession.refresh_token_hash == token_hash,
+                UserSession.revoked_at.is_(None),
+                UserSession.expires_at > now
+            ).values(
+                refresh_token_hash=_hash_refresh_token(new_refresh_token),
+                previous_token_hash=token_hash,
+                last_used_at=now
+            ).returning(UserSession.session_id, UserSession.user_id).execution_options(synchronize_session=False)
+        ).first()
+
+        if not rotated:
+            SessionService._revoke_reused(db, token_hash, now)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        user = db.query(UserDetails).filter(
+            UserDetails.user_id == rotated.user_id,
+            UserDetails.is_active == True
+        ).first()
+
+        if not user:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found or inactive",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        db.commit()
+
+        return user, rotated.session_id, new_refresh_token
+
+    @staticmethod
+    def _revoke_reused(db: Session, token_hash: str, now: datetime) -> None:
+        """Revoke the live session whose previous refresh token this is, if any"""
+        revoked = db.execute(
+            update(UserSession).where(
+                UserSession.previous_token_hash == token_hash,
+                UserSession.revoked_at.is_(None)
+            ).values(revoked_at=now).returning(UserSession.session_id).execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.commit()
+
+        for session_id in revoked:
+            logger.warning("Refresh token reused; revoked session %s", session_id)
+            revocation_filter.add(session_id)
+
+    @staticmethod
+    def revoke_session(db: Session, refresh_token: str) -> bool:
+        """Revoke the session behind a refresh token (logout)"""
+        db_session = db.query(UserSession).filter(
+            UserSession.refresh_token_hash == _hash_refresh_token(refresh_token),
+            UserSession.revoked_at.is_(None)
+        ).first()
+
+        if not db_session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+
+        db_session.revoked_at = datetime.now(timezone.utc)
+        db.commit()
+
+        # Effective immediately here; other workers pick it up on their next sync
+        revocation_filter.add(db_session.session_id)
+        return True
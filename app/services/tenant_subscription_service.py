@@ -7,6 +7,7 @@ from app.models.tenant_subscription import TenantSubscription
 from app.models.tenant import TenantMaster
 from app.models.module import ModuleMaster
 from app.schemas.tenant_subscription import TenantSubscriptionCreate, TenantSubscriptionUpdate
+from app.services.entitlement_service import EntitlementService
 
 class TenantSubscriptionService:
     @staticmethod
@@ -51,6 +52,7 @@ class TenantSubscriptionService:
             
             db.add(db_subscription)
             db.commit()
+            EntitlementService.invalidate([db_subscription.tenant_id])
             db.refresh(db_subscription)
             
             return db_subscription
@@ -96,6 +98,7 @@ class TenantSubscriptionService:
         
         try:
             db.commit()
+            EntitlementService.invalidate([db_subscription.tenant_id])
             db.refresh(db_subscription)
             return db_subscription
         
@@ -119,6 +122,7 @@ class TenantSubscriptionService:
         
         db_subscription.is_active = False
         db.commit()
+        EntitlementService.invalidate([db_subscription.tenant_id])
         return True
     
     @staticmethod
@@ -1,17 +1,30 @@
 from typing import Optional, List
+from datetime import datetime, timezone
 from uuid import UUID
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from app.models.user import UserDetails
 from app.models.tenant import TenantMaster
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
-from app.utils.security import get_password_hash, verify_password
+from app.utils.security import get_password_hash, verify_and_update_password
+from app.utils.password_hasher import password_hasher
+from app.services.auth_service import AuthService
+from app.services.last_login_buffer import last_login_buffer
+
+EMAIL_UNIQUE_INDEX = "uq_user_details_tenant_email_lower"
+
+def _violated_constraint(error: IntegrityError) -> Optional[str]:
+    """Name of the constraint behind an IntegrityError, when the driver reports it"""
+    diag = getattr(error.orig, "diag", None)
+    return getattr(diag, "constraint_name", None)
 
 class UserService:
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> UserDetails:
-        """Create a new user"""
+    def create_user(db: Session, user_data: UserCreate, password_hash: Optional[str] = None) -> UserDetails:
+        """Create a new user (pass a precomputed password_hash to skip hashing here)"""
         # Check if tenant exists
         tenant = db.query(TenantMaster).filter(
             TenantMaster.tenant_id == user_data.tenant_id
@@ -29,18 +42,6 @@ class UserService:
                 detail="Tenant is not active"
             )
         
-        # Check if email already exists for this tenant
-        existing_user = db.query(UserDetails).filter(
-            UserDetails.tenant_id == user_data.tenant_id,
-            UserDetails.email == user_data.email
-        ).first()
-        
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered for this tenant"
-            )
-        
         try:
             # Create user
             db_user = UserDetails(
@@ -50,7 +51,7 @@ class UserService:
                 email=user_data.email,
                 phone_number=user_data.phone_number,
                 address=user_data.address,
-                password_hash=get_password_hash(user_data.password)
+                password_hash=password_hash or get_password_hash(user_data.password)
             )
             
             db.add(db_user)
@@ -61,6 +62,12 @@ class UserService:
         
         except IntegrityError as e:
             db.rollback()
+            # Duplicate (tenant_id, lower(email)) is enforced by a unique index
+            if _violated_constraint(e) == EMAIL_UNIQUE_INDEX:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered for this tenant"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User creation failed due to database constraint"
@@ -73,8 +80,8 @@ class UserService:
     
     @staticmethod
     def get_user_by_email(db: Session, email: str, tenant_id: Optional[UUID] = None) -> Optional[UserDetails]:
-        """Get user by email"""
-        query = db.query(UserDetails).filter(UserDetails.email == email)
+        """Get user by email (case-insensitive)"""
+        query = db.query(UserDetails).filter(func.lower(UserDetails.email) == email.lower())
         
         if tenant_id:
             query = query.filter(UserDetails.tenant_id == tenant_id)
@@ -110,6 +117,7 @@ class UserService:
         
         try:
             db.commit()
+            AuthService.invalidate_principal(user_id)
             db.refresh(db_user)
             return db_user
         
@@ -133,20 +141,76 @@ class UserService:
         
         db_user.is_active = False
         db.commit()
+        AuthService.invalidate_principal(user_id)
         return True
     
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> Optional[UserDetails]:
+    def authenticate_user(db: Session, email: str, password: str, tenant_id: Optional[UUID] = None) -> Optional[UserDetails]:
         """Authenticate user"""
-        user = db.query(UserDetails).filter(UserDetails.email == email).first()
+        user = UserService.get_user_by_email(db, email, tenant_id)
         
         if not user:
             return None
         
-        if not verify_password(password, user.password_hash):
+        verified, new_hash = verify_and_update_password(password, user.password_hash)
+        if not verified:
             return None
         
         if not user.is_active:
             return None
         
-        return user
\ No newline at end of file
+        if new_hash:
+            # Stored hash predates the current scheme/cost; upgrade it now
+            user.password_hash = new_hash
+            db.commit()
+        
+        return user
+    
+    @staticmethod
+    def _load_login_candidate(db: Session, email: str, tenant_id: Optional[UUID] = None) -> Optional[UserDetails]:
+        """Fetch the user for a login attempt and hand the connection back to the pool"""
+        user = UserService.get_user_by_email(db, email, tenant_id)
+        
+        if user:
+            # Detach so ending the transaction doesn't expire the loaded attributes
+            db.expunge(user)
+        
+        db.rollback()
+        return user
+    
+    @staticmethod
+    async def authenticate_user_async(db: Session, email: str, password: str, tenant_id: Optional[UUID] = None) -> Optional[UserDetails]:
+        """Authenticate user, verifying the password on the hashing pool"""
+        user = await run_in_threadpool(UserService._load_login_candidate, db, email, tenant_id)
+        
+        if not user:
+            return None
+        
+        verified, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+        if not verified:
+            return None
+        
+        if not user.is_active:
+            return None
+        
+        if new_hash:
+            # Stored hash predates the current scheme/cost; upgrade it now
+            await run_in_threadpool(UserService.update_password_hash, db, user, new_hash)
+        
+        return user
+    
+    @staticmethod
+    def update_password_hash(db: Session, user: UserDetails, password_hash: str) -> None:
+        """Persist a rehashed password for a (detached) user"""
+        db.query(UserDetails).filter(UserDetails.user_id == user.user_id).update(
+            {UserDetails.password_hash: password_hash}, synchronize_session=False
+        )
+        db.commit()
+        user.password_hash = password_hash
+    
+    @staticmethod
+    def record_login(user: UserDetails) -> None:
+        """Stamp last_login; the write is batched by the last-login buffer"""
+        now = datetime.now(timezone.utc)
+        user.last_login = now
+        last_login_buffer.record(user.user_id, now)
@@ -0,0 +1,88 @@
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+def incidence(pairs: Iterable[Tuple[Hashable, Hashable]], rows: Dict[Hashable, int], cols: Dict[Hashable, int]) -> sparse.csr_matrix:
+    """Sparse 0/1 matrix with a 1 at (rows[a], cols[b]) for each pair; unknown ids are skipped"""
+    row_idx = []
+    col_idx = []
+    for a, b in pairs:
+        i = rows.get(a)
+        j = cols.get(b)
+        if i is not None and j is not None:
+            row_idx.append(i)
+            col_idx.append(j)
+
+    data = np.ones(len(row_idx), dtype=np.int32)
+    matrix = sparse.csr_matrix(
+        (data, (np.asarray(row_idx, dtype=np.int64), np.asarray(col_idx, dtype=np.int64))),
+        shape=(len(rows), len(cols))
+    )
+    # Duplicate pairs would otherwise sum; keep the matrix boolean
+    matrix.data[:] = 1
+    return matrix
+
+
+def closure(edges: sparse.csr_matrix) -> sparse.csr_matrix:
+    """Reflexive-transitive closure of a square 0/1 edge matrix; raises ValueError on a cycle"""
+    result = sparse.identity(edges.shape[0], dtype=np.int32, format="csr")
+    frontier = edges.tocsr()
+    # frontier holds the pairs joined by a path of exactly k edges; a DAG runs out of them
+    while frontier.nnz:
+        if frontier.diagonal().any():
+            raise ValueError("Edges contain a cycle")
+        result = result + frontier
+        frontier = frontier @ edges
+        frontier.data[:] = 1
+        frontier.eliminate_zeros()
+    result.data[:] = 1
+    return result
+
+
+class AccessMatrix:
+    """Boolean user x permission matrix computed from the grant incidence matrices.
+
+    effective = UP + UR·RR·RP + UG·GP + (UG·GR)·RR·RP, where U/R/G/P are users,
+    roles, groups and permissions and RR is the role closure (assigned role x
+    inherited role, including itself); any positive entry is a grant.
+    """
+
+    def __init__(
+        self,
+        user_ids: Sequence[Hashable],
+        permission_ids: Sequence[Hashable],
+        user_permission: sparse.csr_matrix,
+        user_role: sparse.csr_matrix,
+        role_permission: sparse.csr_matrix,
+        role_closure: sparse.csr_matrix,
+        user_group: sparse.csr_matrix,
+        group_permission: sparse.csr_matrix,
+        group_role: sparse.csr_matrix
+    ):
+        self.user_ids = list(user_ids)
+        self.permission_ids = list(permission_ids)
+
+        inherited_permission = role_closure @ role_permission
+        effective = (
+            user_permission
+            + user_role @ inherited_permission
+            + user_group @ group_permission
+            + (user_group @ group_role) @ inherited_permission
+        ).tocsr()
+        effective.sum_duplicates()
+        effective.eliminate_zeros()
+        effective.data = np.ones_like(effective.data, dtype=np.bool_)
+        self.matrix = effective
+
+    @property
+    def grant_count(self) -> int:
+        return int(self.matrix.nnz)
+
+    def permission_indices(self, user_index: int) -> np.ndarray:
+        start, end = self.matrix.indptr[user_index], self.matrix.indptr[user_index + 1]
+        return self.matrix.indices[start:end]
+
+    def users_per_permission(self) -> List[int]:
+        return np.asarray(self.matrix.sum(axis=0)).ravel().astype(int).tolist()
@@ -0,0 +1,136 @@
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Callable, Hashable, List, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from app.utils.access_matrix import AccessMatrix
+
+# File layout: header, then 8-byte aligned arrays user_hi, user_lo, indptr,
+# indices, then the permission rows as JSON. All integers little-endian.
+MAGIC = b"RBACSNP2"  # bumped whenever the permission row layout changes
+HEADER = struct.Struct("<8s16sqqqq")  # magic, tenant_id, version, users, grants, permissions json length
+
+
+def _split_uuids(user_ids: Sequence[UUID]):
+    as_ints = [user_id.int for user_id in user_ids]
+    hi = np.fromiter((value >> 64 for value in as_ints), dtype="<u8", count=len(as_ints))
+    lo = np.fromiter((value & 0xFFFFFFFFFFFFFFFF for value in as_ints), dtype="<u8", count=len(as_ints))
+    return hi, lo
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class TenantSnapshot:
+    """Effective permissions of one tenant at one authorization version.
+
+    Users are rows sorted by UUID (split into high/low 64-bit keys and found
+    by binary search); grants are CSR arrays, ``indptr`` per user into
+    ``indices`` of permission columns. The arrays are either in memory or
+    read-only views of a mapped snapshot file shared by every process that
+    maps it. Snapshots are never mutated apart from ``checked_at``, so
+    readers need no locking and a new version is swapped in by replacing
+    the reference.
+    """
+
+    __slots__ = ("tenant_id", "version", "user_hi", "user_lo", "indptr", "indices", "permissions", "checked_at", "_buffer")
+
+    def __init__(self, tenant_id: UUID, version: int, user_hi, user_lo, indptr, indices, permissions: Sequence, buffer=None):
+        self.tenant_id = tenant_id
+        self.version = version
+        self.user_hi = user_hi
+        self.user_lo = user_lo
+        self.indptr = indptr
+        self.indices = indices
+        self.permissions = tuple(permissions)
+        # Keeps the mapping open for as long as the arrays are in use
+        self._buffer = buffer
+        # Monotonic time the version was last confirmed current
+        self.checked_at = time.monotonic()
+
+    @classmethod
+    def from_matrix(cls, tenant_id: UUID, version: int, matrix: AccessMatrix, permissions: Sequence) -> "TenantSnapshot":
+        hi, lo = _split_uuids(matrix.user_ids)
+        order = np.lexsort((lo, hi))
+        rows = matrix.matrix[order]
+        return cls(
+            tenant_id, version, hi[order], lo[order],
+            rows.indptr.astype("<i8"), rows.indices.astype("<i4"), permissions
+        )
+
+    @property
+    def user_count(self) -> int:
+        return len(self.user_hi)
+
+    @property
+    def grant_count(self) -> int:
+        return len(self.indices)
+
+    @property
+    def mapped(self) -> bool:
+        return self._buffer is not None
+
+    def _row(self, user_id: UUID) -> Optional[int]:
+        value = user_id.int
+        # numpy scalars: plain ints above 2**63 would make numpy fall back to float comparisons
+        hi = np.uint64(value >> 64)
+        lo = np.uint64(value & 0xFFFFFFFFFFFFFFFF)
+        user_hi = self.user_hi
+        i = int(user_hi.searchsorted(hi))
+        # High halves of random UUIDs practically never collide; scan the run if they do
+        while i < len(user_hi) and user_hi[i] == hi:
+            if self.user_lo[i] == lo:
+                return i
+            i += 1
+        return None
+
+    def user_permissions(self, user_id: Hashable) -> Optional[tuple]:
+        """Permission rows granted to a user, or None if the user is not in the snapshot"""
+        i = self._row(user_id)
+        if i is None:
+            return None
+        permissions = self.permissions
+        return tuple(permissions[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]].tolist())
+
+    def write(self, path: str) -> None:
+        """Write the snapshot file atomically: readers see the old file or the complete new one"""
+        payload = json.dumps([list(row) for row in self.permissions], default=str).encode()
+        arrays = [self.user_hi, self.user_lo, self.indptr, self.indices]
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.tenant_id.bytes, self.version, self.user_count, self.grant_count, len(payload)))
+            for array in arrays:
+                f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def read(cls, path: str, decode_permission: Callable[[List[Any]], Any]) -> "TenantSnapshot":
+        """Map a snapshot file read-only; the arrays stay in the shared page cache"""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, tenant_bytes, version, users, grants, payload_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            buffer.close()
+            raise ValueError(f"{path} is not an RBAC snapshot file")
+
+        offset = HEADER.size
+        arrays = []
+        for dtype, count in (("<u8", users), ("<u8", users), ("<i8", users + 1), ("<i4", grants)):
+            offset = _aligned(offset)
+            arrays.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset))
+            offset += arrays[-1].nbytes
+
+        permissions = [decode_permission(values) for values in json.loads(buffer[offset:offset + payload_length])]
+        return cls(UUID(bytes=tenant_bytes), version, *arrays, permissions, buffer=buffer)
@@ -0,0 +1,242 @@
+import ast
+import hashlib
+import ipaddress
+import operator
+from datetime import datetime, time, timezone
+from typing import Any, Callable, Mapping, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.utils.cache import TTLCache
+from app.utils.metrics import register_stats
+
+# Attribute roots a condition may read; the caller supplies each as a mapping
+ROOTS = ("user", "resource", "request")
+
+MAX_CONDITION_LENGTH = 1000
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+Evaluator = Callable[[Mapping[str, Any]], bool]
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+
+# Compiled evaluators by SHA-256 of the expression; grants sharing a condition share one closure
+_evaluators = TTLCache(maxsize=10000)
+register_stats("condition_cache", _evaluators.stats)
+
+
+class _Undefined(Exception):
+    """An attribute the context does not carry; the condition evaluates to False"""
+
+
+def _now(context: Mapping[str, Any], zone: Optional[ZoneInfo]) -> datetime:
+    now = context.get("now") or datetime.now(timezone.utc)
+    return now.astimezone(zone) if zone else now
+
+
+def _zone(args: list) -> Optional[ZoneInfo]:
+    if not args:
+        return None
+    try:
+        return ZoneInfo(args[0])
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone {args[0]!r}")
+
+
+def _time(value: str) -> time:
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Expected HH:MM, got {value!r}")
+
+
+def _literal(node: ast.AST) -> Any:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool, type(None))):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) \
+            and isinstance(node.operand.value, (int, float)):
+        return -node.operand.value
+    raise ValueError(f"Expected a literal, got {ast.unparse(node)}")
+
+
+def _call(node: ast.Call) -> Callable:
+    if not isinstance(node.func, ast.Name) or node.keywords:
+        raise ValueError("Only ip_in(), time_between() and weekday_in() may be called")
+    name = node.func.id
+
+    if name == "ip_in":
+        if len(node.args) < 2:
+            raise ValueError("ip_in() takes an address and at least one CIDR range")
+        address = _compile(node.args[0])
+        try:
+            networks = tuple(ipaddress.ip_network(_literal(arg), strict=False) for arg in node.args[1:])
+        except (TypeError, ValueError):
+            raise ValueError("ip_in() ranges must be CIDR strings such as '10.0.0.0/8'")
+
+        def ip_in(context):
+            ip = ipaddress.ip_address(address(context))
+            return any(ip in network for network in networks)
+        return ip_in
+
+    if name == "time_between":
+        args = [_literal(arg) for arg in node.args]
+        if len(args) not in (2, 3) or not all(isinstance(arg, str) for arg in args):
+            raise ValueError("time_between() takes 'HH:MM' start and end and an optional time zone")
+        start, end, zone = _time(args[0]), _time(args[1]), _zone(args[2:])
+
+        def time_between(context):
+            now = _now(context, zone).time()
+            # A window such as 22:00-06:00 wraps past midnight
+            return start <= now < end if start <= end else now >= start or now < end
+        return time_between
+
+    if name == "weekday_in":
+        args = [_literal(arg) for arg in node.args]
+        zone = None
+        if args and isinstance(args[-1], str) and args[-1].lower() not in WEEKDAYS:
+            zone = _zone(args[-1:])
+            args = args[:-1]
+        if not args or not all(isinstance(arg, str) and arg.lower() in WEEKDAYS for arg in args):
+            raise ValueError("weekday_in() takes day names ('mon' ... 'sun') and an optional time zone")
+        days = frozenset(WEEKDAYS.index(arg.lower()) for arg in args)
+
+        def weekday_in(context):
+            return _now(context, zone).weekday() in days
+        return weekday_in
+
+    raise ValueError(f"Unknown function {name}()")
+
+
+def _attribute(node: ast.Attribute) -> Callable:
+    path = []
+    while isinstance(node, ast.Attribute):
+        path.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name) or node.id not in ROOTS:
+        raise ValueError(f"Attributes must start with one of {', '.join(ROOTS)}")
+    path.append(node.id)
+    path.reverse()
+
+    def lookup(context):
+        value = context
+        try:
+            for name in path:
+                value = value[name]
+        except (KeyError, TypeError, IndexError):
+            raise _Undefined(".".join(path))
+        return value
+    return lookup
+
+
+def _compile(node: ast.AST) -> Callable:
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def all_of(context):
+                for operand in operands:
+                    if not operand(context):
+                        return False
+                return True
+            return all_of
+
+        def any_of(context):
+            for operand in operands:
+                if operand(context):
+                    return True
+            return False
+        return any_of
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = _compile(node.operand)
+        return lambda context: not operand(context)
+
+    if isinstance(node, ast.Compare):
+        operands = [_compile(node.left)] + [_compile(value) for value in node.comparators]
+        operators = []
+        for op in node.ops:
+            if type(op) not in _COMPARISONS:
+                raise ValueError(f"Unsupported comparison {type(op).__name__}")
+            operators.append(_COMPARISONS[type(op)])
+
+        if len(operators) == 1:
+            compare_op, left_operand, right_operand = operators[0], operands[0], operands[1]
+            return lambda context: compare_op(left_operand(context), right_operand(context))
+
+        def compare(context):
+            left = operands[0](context)
+            for compare_op, right_operand in zip(operators, operands[1:]):
+                right = right_operand(context)
+                if not compare_op(left, right):
+                    return False
+                left = right
+            return True
+        return compare
+
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        items = [_compile(item) for item in node.elts]
+        return lambda context: [item(context) for item in items]
+
+    if isinstance(node, ast.Attribute):
+        return _attribute(node)
+
+    if isinstance(node, ast.Call):
+        return _call(node)
+
+    if isinstance(node, (ast.Constant, ast.UnaryOp)):
+        value = _literal(node)
+        return lambda context: value
+
+    raise ValueError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+def compile_condition(expression: str) -> Evaluator:
+    """Compile a grant condition into a closure over an evaluation context.
+
+    Conditions are boolean expressions over ``user.*``, ``resource.*`` and
+    ``request.*`` attributes with literals, comparisons, ``in``, ``and``,
+    ``or``, ``not`` and the helpers ``ip_in(request.ip, "10.0.0.0/8")``,
+    ``time_between("09:00", "17:00", "Europe/Berlin")`` and
+    ``weekday_in("mon", "fri")``. Nothing is ever passed to ``eval``.
+    A missing attribute or a type mismatch makes the condition False.
+    Raises ValueError for expressions outside the grammar.
+    """
+    if len(expression) > MAX_CONDITION_LENGTH:
+        raise ValueError(f"Conditions are limited to {MAX_CONDITION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as exc:
+        raise ValueError(f"Invalid condition: {exc.msg}")
+    body = _compile(tree.body)
+
+    def evaluate(context: Mapping[str, Any]) -> bool:
+        try:
+            return bool(body(context))
+        except (_Undefined, TypeError, ValueError, AttributeError):
+            return False
+
+    return evaluate
+
+
+def validate_condition(expression: Optional[str]) -> Optional[str]:
+    if expression is not None:
+        compile_condition(expression)
+    return expression
+
+
+def get_evaluator(expression: str) -> Evaluator:
+    """Compiled evaluator for an expression, compiled once per distinct expression"""
+    key = hashlib.sha256(expression.encode()).digest()
+    evaluator = _evaluators.get(key)
+    if evaluator is None:
+        evaluator = compile_condition(expression)
+        _evaluators.set(key, evaluator)
+    return evaluator
@@ -0,0 +1,85 @@
+import json
+import re
+import threading
+import time
+import urllib.request
+from typing import Callable, Dict, Optional, Sequence
+
+from jose import JWTError, jwt
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def fetch_jwks(url: str, timeout: float = 5.0):
+    """Fetch a JWKS document; returns (key set, max-age seconds or None)"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        match = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+        return json.load(response), int(match.group(1)) if match else None
+
+
+class JWKSVerifier:
+    """Verifies access tokens locally against a cached JWKS.
+
+    Keys are cached by ``kid`` for the endpoint's Cache-Control max-age. A
+    token with an unknown ``kid`` (i.e. after a rotation) triggers a refetch,
+    at most once per ``min_refresh_interval`` so forged kids can't turn into
+    a request flood against the key endpoint.
+
+        verifier = JWKSVerifier("https://users.internal/.well-known/jwks.json")
+        claims = verifier.decode(token)
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        algorithms: Sequence[str] = ("RS256", "ES256"),
+        default_max_age: float = 300,
+        min_refresh_interval: float = 30,
+        fetcher: Callable[[str], tuple] = fetch_jwks,
+    ):
+        self.jwks_url = jwks_url
+        self.algorithms = list(algorithms)
+        self.default_max_age = default_max_age
+        self.min_refresh_interval = min_refresh_interval
+        self._fetcher = fetcher
+        self._keys: Dict[str, dict] = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refresh(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if not force and now < self._expires_at:
+                return
+            if now - self._fetched_at < self.min_refresh_interval:
+                return
+
+            key_set, max_age = self._fetcher(self.jwks_url)
+            self._keys = {key["kid"]: key for key in key_set.get("keys", []) if "kid" in key}
+            self._fetched_at = now
+            self._expires_at = now + (max_age if max_age is not None else self.default_max_age)
+
+    def get_key(self, kid: Optional[str]) -> Optional[dict]:
+        if time.monotonic() >= self._expires_at:
+            self._refresh()
+
+        key = self._keys.get(kid)
+        if key is None:
+            self._refresh(force=True)
+            key = self._keys.get(kid)
+
+        return key
+
+    def decode(self, token: str, **options) -> dict:
+        """Verify signature and expiry; raises JWTError on any failure"""
+        kid = jwt.get_unverified_header(token).get("kid")
+        try:
+            key = self.get_key(kid)
+        except (OSError, ValueError, KeyError, AttributeError) as exc:
+            # URLError and timeouts are OSErrors; a malformed key set fails with the others
+            raise JWTError(f"Could not fetch signing keys: {exc}") from exc
+        if key is None:
+            raise JWTError(f"Unknown signing key {kid!r}")
+
+        return jwt.decode(token, key, algorithms=self.algorithms, **options)
@@ -0,0 +1,55 @@
+import os
+from typing import Dict, List, Optional
+
+from jose import jwk
+
+
+class KeyRing:
+    """Asymmetric JWT keys loaded from a directory of PEM files.
+
+    Each ``<kid>.pem`` file holds one key; the file name (without ``.pem``)
+    is its key id. Private keys can sign, public-only keys are kept so tokens
+    signed by a retired key still verify until they expire. To rotate, add
+    the new private key and point ``JWT_ACTIVE_KID`` at it (or let the last
+    private key in name order win), then delete the old file once its tokens
+    have expired.
+    """
+
+    def __init__(self, keys_dir: str, algorithm: str, active_kid: Optional[str] = None):
+        self.algorithm = algorithm
+        self._private_pems: Dict[str, str] = {}
+        self._public_jwks: Dict[str, dict] = {}
+
+        for file_name in sorted(os.listdir(keys_dir)):
+            if not file_name.endswith(".pem"):
+                continue
+
+            kid = file_name[:-len(".pem")]
+            with open(os.path.join(keys_dir, file_name)) as key_file:
+                pem = key_file.read()
+
+            if "PRIVATE KEY" in pem:
+                self._private_pems[kid] = pem
+
+            public_jwk = jwk.construct(pem, algorithm).public_key().to_dict()
+            public_jwk.update({"kid": kid, "use": "sig", "alg": algorithm})
+            self._public_jwks[kid] = public_jwk
+
+        if active_kid is None and self._private_pems:
+            active_kid = list(self._private_pems)[-1]
+
+        if active_kid not in self._private_pems:
+            raise ValueError(f"No private key for active kid {active_kid!r} in {keys_dir}")
+
+        self.active_kid = active_kid
+
+    @property
+    def signing_key(self) -> str:
+        return self._private_pems[self.active_kid]
+
+    def public_key(self, kid: Optional[str]) -> Optional[dict]:
+        return self._public_jwks.get(kid)
+
+    def jwks(self) -> Dict[str, List[dict]]:
+        """Public key set in JWKS form"""
+        return {"keys": list(self._public_jwks.values())}
@@ -0,0 +1,12 @@
+from typing import Callable, Dict
+
+# name -> zero-argument callable returning a dict of counters
+_providers: Dict[str, Callable[[], dict]] = {}
+
+def register_stats(name: str, provider: Callable[[], dict]) -> None:
+    """Expose a component's counters on GET /metrics"""
+    _providers[name] = provider
+
+def collect_stats() -> Dict[str, dict]:
+    """Snapshot of every registered component's counters"""
+    return {name: provider() for name, provider in _providers.items()}
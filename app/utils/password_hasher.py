@@ -0,0 +1,117 @@
+import asyncio
+import heapq
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.config import get_settings
+from app.utils import security
+from app.utils.security import (
+    configure_password_hashing,
+    get_password_hash,
+    verify_and_update_password,
+    verify_password,
+)
+
+settings = get_settings()
+
+# Lower value = served first when the pool is saturated
+PRIORITY_LOGIN = 0
+PRIORITY_REGISTER = 1
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing/verification on a dedicated process pool.
+
+    At most ``max_workers`` jobs are in flight; further callers wait in a
+    priority queue (logins ahead of registrations) bounded by ``queue_limit``.
+    Callers beyond that limit get a 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, queue_limit: int):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn so workers don't inherit the parent's DB connections;
+            # workers adopt the (possibly calibrated) policy of this process
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=configure_password_hashing,
+                initargs=security.password_policy
+            )
+        return self._executor
+
+    async def _acquire(self, priority: int) -> None:
+        if self._in_flight < self.max_workers and not self._waiters:
+            self._in_flight += 1
+            return
+
+        if len(self._waiters) >= self.queue_limit:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), waiter))
+        try:
+            # The slot is handed over by _release, so no increment here
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # We were granted a slot just before being cancelled
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    async def _run(self, priority: int, func, *args):
+        await self._acquire(priority)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._release()
+
+    async def hash(self, password: str, priority: int = PRIORITY_REGISTER) -> str:
+        """Hash a password off the event loop"""
+        return await self._run(priority, get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str, priority: int = PRIORITY_LOGIN) -> bool:
+        """Verify a password against its hash off the event loop"""
+        return await self._run(priority, verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str, priority: int = PRIORITY_LOGIN
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify a password, returning a replacement hash when the stored one is outdated"""
+        return await self._run(priority, verify_and_update_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT
+)
@@ -0,0 +1,135 @@
+import base64
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils.cache import TTLCache
+from app.utils.permission_matcher import SEPARATOR, WILDCARD, PermissionMatcher
+
+# JWT claim names
+PERMISSIONS_CLAIM = "perms"
+CATALOG_VERSION_CLAIM = "perm_ver"
+
+
+class StaleCatalogError(Exception):
+    """The token was issued against a different catalog version"""
+
+
+def encode_bitmap(positions: Iterable[int]) -> str:
+    """Pack bit positions into unpadded URL-safe base64 (bit i = byte i//8, mask 1 << i%8)"""
+    positions = list(positions)
+    bitmap = bytearray((max(positions) // 8 + 1) if positions else 0)
+    for position in positions:
+        bitmap[position // 8] |= 1 << (position % 8)
+    return base64.urlsafe_b64encode(bytes(bitmap)).rstrip(b"=").decode()
+
+
+def decode_bitmap(encoded: str) -> bytes:
+    """Inverse of encode_bitmap"""
+    return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+
+
+def bit_is_set(bitmap: bytes, position: int) -> bool:
+    byte = position // 8
+    return byte < len(bitmap) and bool(bitmap[byte] & (1 << (position % 8)))
+
+
+def _prefix_version(count: int, digest) -> str:
+    return f"{count}-{digest.copy().hexdigest()[:12]}"
+
+
+class PermissionCatalog:
+    """Stable bit position for every permission, stamped with a version.
+
+    Positions follow permission creation order and permissions are only ever
+    soft-deleted, so existing bits never move. The version is ``<count>-<hash>``
+    over the entries; adding permissions only appends, so a catalog still
+    accepts tokens stamped with any of its prefix versions, while changing an
+    existing permission's resource/action invalidates them. Downstream services
+    fetch the catalog (GET /api/v1/permissions/catalog) and check token claims
+    offline with ``allows``, which honors wildcard permissions like ``/check``.
+    """
+
+    def __init__(self, entries: List[Tuple[str, str, str]]):
+        # entries: (permission_id, resource, action) in bit order
+        self.entries = entries
+        self.bit_by_id: Dict[str, int] = {}
+        self.bit_by_key: Dict[Tuple[str, str], int] = {}
+        for bit, (permission_id, resource, action) in enumerate(entries):
+            self.bit_by_id[permission_id] = bit
+            self.bit_by_key[(resource, action)] = bit
+
+        # Bits of wildcard permissions; without any, an exact bit lookup is the whole answer
+        self.pattern_bits = [
+            bit for bit, (_, resource, action) in enumerate(entries)
+            if action == WILDCARD or resource.split(SEPARATOR)[-1] == WILDCARD
+        ]
+        # Matchers compiled from a token's set bits, by (bitmap, catalog prefix length)
+        self._matchers = TTLCache(maxsize=1024)
+
+        # Version of every prefix, so tokens from before an append still verify
+        self._prefix_lengths: Dict[str, int] = {}
+        digest = hashlib.sha256()
+        self.version = _prefix_version(0, digest)
+        self._prefix_lengths[self.version] = 0
+        for count, (permission_id, resource, action) in enumerate(entries, start=1):
+            digest.update(f"{permission_id}:{resource}:{action}\n".encode())
+            self.version = _prefix_version(count, digest)
+            self._prefix_lengths[self.version] = count
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PermissionCatalog":
+        """Rebuild from the catalog endpoint's JSON"""
+        ordered = sorted(data["permissions"], key=lambda p: p["bit"])
+        catalog = cls([(str(p["permission_id"]), p["resource"], p["action"]) for p in ordered])
+        if catalog.version != data["version"]:
+            raise ValueError("Catalog payload does not match its version")
+        return catalog
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "permissions": [
+                {"bit": bit, "permission_id": permission_id, "resource": resource, "action": action}
+                for bit, (permission_id, resource, action) in enumerate(self.entries)
+            ],
+        }
+
+    def encode(self, permission_ids: Iterable) -> str:
+        """Bitmap for a set of permission ids (unknown ids are ignored)"""
+        positions = [self.bit_by_id[str(pid)] for pid in permission_ids if str(pid) in self.bit_by_id]
+        return encode_bitmap(positions)
+
+    def claims_for(self, permission_ids: Iterable) -> dict:
+        return {
+            PERMISSIONS_CLAIM: self.encode(permission_ids),
+            CATALOG_VERSION_CLAIM: self.version,
+        }
+
+    def allows(self, claims: dict, resource: str, action: str) -> bool:
+        """Check a (resource, action) against a decoded token's claims"""
+        encoded: Optional[str] = claims.get(PERMISSIONS_CLAIM)
+        if encoded is None:
+            return False
+
+        token_length = self._prefix_lengths.get(claims.get(CATALOG_VERSION_CLAIM))
+        if token_length is None:
+            raise StaleCatalogError(
+                f"Token uses catalog {claims.get(CATALOG_VERSION_CLAIM)}, have {self.version}"
+            )
+
+        bitmap = decode_bitmap(encoded)
+        bit = self.bit_by_key.get((resource, action))
+        if bit is not None and bit < token_length and bit_is_set(bitmap, bit):
+            return True
+
+        if not any(bit < token_length and bit_is_set(bitmap, bit) for bit in self.pattern_bits):
+            return False
+        key = (encoded, token_length)
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            matcher = PermissionMatcher(
+                (resource, action) for bit, (_, resource, action) in enumerate(self.entries[:token_length])
+                if bit_is_set(bitmap, bit)
+            )
+            self._matchers.set(key, matcher)
+        return matcher.allows(resource, action)
@@ -0,0 +1,114 @@
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+WILDCARD = "*"
+SEPARATOR = "/"
+
+
+def validate_resource_pattern(resource: str) -> str:
+    """Reject empty path segments and wildcards anywhere but a whole final segment"""
+    segments = resource.split(SEPARATOR)
+    if any(not segment for segment in segments):
+        raise ValueError("Resource path segments must not be empty")
+    if any(WILDCARD in segment for segment in segments[:-1]) or (WILDCARD in segments[-1] and segments[-1] != WILDCARD):
+        raise ValueError("'*' is only allowed as the last path segment")
+    return resource
+
+
+def validate_action_pattern(action: str) -> str:
+    if WILDCARD in action and action != WILDCARD:
+        raise ValueError("'*' must be the whole action")
+    return action
+
+
+class _Node:
+    __slots__ = ("children", "exact", "subtree", "exact_when", "subtree_when")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # Actions granted on exactly this path, and on everything below it ("path/*")
+        self.exact: Set[str] = set()
+        self.subtree: Set[str] = set()
+        # Conditional grants as (action, evaluator); None until a node gets one
+        self.exact_when: Optional[List[Tuple[str, Callable]]] = None
+        self.subtree_when: Optional[List[Tuple[str, Callable]]] = None
+
+
+class PermissionMatcher:
+    """Compiled (resource, action) grants for one user.
+
+    Resources are "/"-separated paths; a trailing "*" segment grants every
+    path below the prefix ("reports/finance/*", or "*" for all resources)
+    and action "*" grants every action. ``allows`` walks at most one trie
+    node per path segment. Conditional grants hang off the same nodes with
+    their compiled evaluators and are only evaluated, against the caller's
+    context, when no unconditional grant matches.
+    """
+
+    __slots__ = ("_root", "conditional")
+
+    def __init__(
+        self,
+        grants: Iterable[Tuple[str, str]],
+        conditional_grants: Iterable[Tuple[str, str, Callable[[Mapping[str, Any]], bool]]] = ()
+    ):
+        self._root = _Node()
+        for resource, action in grants:
+            node, wildcard = self._node(resource)
+            (node.subtree if wildcard else node.exact).add(action)
+
+        self.conditional = False
+        for resource, action, evaluator in conditional_grants:
+            node, wildcard = self._node(resource)
+            if wildcard:
+                node.subtree_when = (node.subtree_when or []) + [(action, evaluator)]
+            else:
+                node.exact_when = (node.exact_when or []) + [(action, evaluator)]
+            self.conditional = True
+
+    def _node(self, resource: str) -> Tuple[_Node, bool]:
+        node = self._root
+        segments = resource.split(SEPARATOR)
+        wildcard = segments[-1] == WILDCARD
+        if wildcard:
+            segments = segments[:-1]
+        for segment in segments:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _Node()
+            node = child
+        return node, wildcard
+
+    def allows(self, resource: str, action: str, context: Optional[Mapping[str, Any]] = None) -> bool:
+        if self.conditional:
+            return self._allows_conditional(resource, action, context or {})
+        node = self._root
+        for segment in resource.split(SEPARATOR):
+            if node.subtree and (action in node.subtree or WILDCARD in node.subtree):
+                return True
+            node = node.children.get(segment)
+            if node is None:
+                return False
+        return action in node.exact or WILDCARD in node.exact
+
+    def _allows_conditional(self, resource: str, action: str, context: Mapping[str, Any]) -> bool:
+        candidates = []
+        node = self._root
+        for segment in resource.split(SEPARATOR):
+            if node.subtree and (action in node.subtree or WILDCARD in node.subtree):
+                return True
+            if node.subtree_when:
+                candidates.extend(node.subtree_when)
+            node = node.children.get(segment)
+            if node is None:
+                break
+        else:
+            if action in node.exact or WILDCARD in node.exact:
+                return True
+            if node.exact_when:
+                candidates.extend(node.exact_when)
+
+        return any(
+            evaluator(context)
+            for granted, evaluator in candidates
+            if granted == action or granted == WILDCARD
+        )
@@ -0,0 +1,154 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from fastapi import HTTPException, status
+
+
+class SlidingWindowCounter:
+    """Approximate per-key sliding-window event counter.
+
+    Keeps only the current and previous fixed-window counts per key and
+    weights the previous one by how much of it still overlaps the sliding
+    window, so memory is O(keys) and every operation is O(1). The least
+    recently touched keys are dropped beyond ``max_keys``.
+    """
+
+    def __init__(self, window_seconds: float, max_keys: int):
+        self.window = window_seconds
+        self.max_keys = max_keys
+        # key -> [window_index, current_count, previous_count]
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: Hashable, now: float, create: bool):
+        window_index = int(now // self.window)
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            if not create:
+                return None, window_index
+            bucket = [window_index, 0, 0]
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        elif bucket[0] != window_index:
+            # Roll forward; anything older than the previous window is gone
+            bucket[2] = bucket[1] if bucket[0] == window_index - 1 else 0
+            bucket[1] = 0
+            bucket[0] = window_index
+
+        self._buckets.move_to_end(key)
+        return bucket, window_index
+
+    def _weighted(self, bucket: list, window_index: int, now: float) -> float:
+        overlap = 1.0 - (now - window_index * self.window) / self.window
+        return bucket[1] + bucket[2] * overlap
+
+    def count(self, key: Hashable) -> float:
+        now = time.time()
+        with self._lock:
+            bucket, window_index = self._bucket(key, now, create=False)
+            if bucket is None:
+                return 0.0
+            return self._weighted(bucket, window_index, now)
+
+    def add(self, key: Hashable) -> None:
+        with self._lock:
+            bucket, _ = self._bucket(key, time.time(), create=True)
+            bucket[1] += 1
+
+    def try_add(self, key: Hashable, limit: float) -> bool:
+        """Count one event unless the key is already at ``limit``; check and add are atomic"""
+        now = time.time()
+        with self._lock:
+            bucket, window_index = self._bucket(key, now, create=True)
+            if self._weighted(bucket, window_index, now) >= limit:
+                return False
+            bucket[1] += 1
+            return True
+
+    def remove(self, key: Hashable) -> None:
+        """Take back one counted event, e.g. a reservation that turned out not to be a failure"""
+        with self._lock:
+            bucket, _ = self._bucket(key, time.time(), create=False)
+            if bucket is None:
+                return
+            if bucket[1]:
+                bucket[1] -= 1
+            elif bucket[2]:
+                bucket[2] -= 1
+
+    def reset(self, key: Hashable) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class LoginAttemptLimiter:
+    """Sheds login attempts for emails / client IPs with too many recent failures.
+
+    ``check`` runs before the user lookup and password verification, so a
+    credential-stuffing wave is rejected with a 429 without touching the
+    database or the hashing pool. It reserves a failure slot up front, which
+    ``record_success`` refunds: a concurrent burst can't all pass the check
+    before the first of its failures is recorded.
+    """
+
+    def __init__(self, max_failures_per_email: int, max_failures_per_ip: int, window_seconds: float, max_keys: int):
+        self.max_failures_per_email = max_failures_per_email
+        self.max_failures_per_ip = max_failures_per_ip
+        self.window = window_seconds
+        self._by_email = SlidingWindowCounter(window_seconds, max_keys)
+        self._by_ip = SlidingWindowCounter(window_seconds, max_keys)
+        self.allowed = 0
+        self.rejected_email = 0
+        self.rejected_ip = 0
+        self.failures = 0
+
+    def check(self, email_key: Hashable, client_ip: str) -> None:
+        """Reserve a failure slot for the email and the client IP; raise 429 if either budget is spent"""
+        if not self._by_ip.try_add(client_ip, self.max_failures_per_ip):
+            self.rejected_ip += 1
+            self._reject()
+
+        if not self._by_email.try_add(email_key, self.max_failures_per_email):
+            self._by_ip.remove(client_ip)
+            self.rejected_email += 1
+            self._reject()
+
+        self.allowed += 1
+
+    def _reject(self) -> None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(self.window))},
+        )
+
+    def record_failure(self) -> None:
+        """The attempt failed; the slots ``check`` reserved stay counted"""
+        self.failures += 1
+
+    def release(self, email_key: Hashable, client_ip: str) -> None:
+        """Refund the slots of an attempt that ended without a verdict (e.g. an overloaded hash pool)"""
+        self._by_email.remove(email_key)
+        self._by_ip.remove(client_ip)
+
+    def record_success(self, email_key: Hashable, client_ip: str) -> None:
+        self._by_email.reset(email_key)
+        self._by_ip.remove(client_ip)
+
+    def stats(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "rejected_email": self.rejected_email,
+            "rejected_ip": self.rejected_ip,
+            "failures": self.failures,
+            "tracked_emails": len(self._by_email),
+            "tracked_ips": len(self._by_ip),
+        }
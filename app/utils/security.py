@@ -1,29 +1,118 @@
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
+from jose.constants import ALGORITHMS
 from passlib.context import CryptContext
 from app.config import get_settings
+from app.utils.jwt_keys import KeyRing
 
 settings = get_settings()
 
-# Use bcrypt with explicit configuration to avoid compatibility issues
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=12,
-    bcrypt__ident="2b"
-)
+# RS*/ES* sign with the key ring so other services can verify with public keys only
+USES_KEY_RING = settings.ALGORITHM not in ALGORITHMS.HMAC
+key_ring: Optional[KeyRing] = None
+
+if USES_KEY_RING:
+    if not settings.JWT_KEYS_DIR:
+        raise RuntimeError(f"JWT_KEYS_DIR is required for {settings.ALGORITHM}")
+    key_ring = KeyRing(settings.JWT_KEYS_DIR, settings.ALGORITHM, settings.JWT_ACTIVE_KID)
+
+# Default cost per scheme when PASSWORD_HASH_COST isn't set and calibration is off
+DEFAULT_HASH_COSTS = {"bcrypt": 12, "argon2": 3}
+# Range searched by calibration (bcrypt log2 rounds / argon2 time_cost)
+CALIBRATION_COST_RANGE = {"bcrypt": (10, 16), "argon2": (1, 10)}
+
+def _build_context(scheme: str, cost: int) -> CryptContext:
+    """Context hashing with `scheme` at `cost`; only weaker hashes need an update.
+
+    Each worker calibrates on its own, so costs differ slightly across the
+    fleet. Hashes above the local cost are left alone so they are never
+    rewritten back and forth between nodes.
+    """
+    options = {
+        f"{scheme}__default_rounds": cost,
+        f"{scheme}__min_rounds": cost,
+    }
+    if scheme == "bcrypt":
+        # Use bcrypt with explicit configuration to avoid compatibility issues
+        options["bcrypt__ident"] = "2b"
+    else:
+        options["argon2__type"] = "ID"
+        options["argon2__memory_cost"] = settings.PASSWORD_HASH_ARGON2_MEMORY_KIB
+    
+    # Both schemes are always known, so hashes written under the other policy
+    # (e.g. before switching back) still verify; "auto" deprecates every scheme
+    # but the first, so they are rehashed with the configured one on login
+    schemes = [scheme] + [other for other in DEFAULT_HASH_COSTS if other != scheme]
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+password_policy = ("bcrypt", DEFAULT_HASH_COSTS["bcrypt"])
+pwd_context = _build_context(*password_policy)
+
+def configure_password_hashing(scheme: str, cost: int) -> None:
+    """Switch the module-wide hashing policy (also used as the hashing pool initializer)"""
+    global pwd_context, password_policy
+    pwd_context = _build_context(scheme, cost)
+    password_policy = (scheme, cost)
+
+def calibrate_password_cost(scheme: str, target_ms: float) -> int:
+    """Highest cost whose single hash fits within target_ms on this machine"""
+    low, high = CALIBRATION_COST_RANGE[scheme]
+    chosen = low
+    
+    for cost in range(low, high + 1):
+        context = _build_context(scheme, cost)
+        started = time.perf_counter()
+        context.hash("calibration-password")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        if elapsed_ms > target_ms:
+            break
+        chosen = cost
+    
+    return chosen
+
+def setup_password_hashing() -> tuple:
+    """Apply the configured scheme, calibrating its cost to the latency budget if set"""
+    scheme = settings.PASSWORD_HASH_SCHEME
+    if scheme not in DEFAULT_HASH_COSTS:
+        raise ValueError(f"Unsupported PASSWORD_HASH_SCHEME {scheme!r}")
+    
+    if settings.PASSWORD_HASH_TARGET_MS:
+        cost = calibrate_password_cost(scheme, settings.PASSWORD_HASH_TARGET_MS)
+    else:
+        cost = settings.PASSWORD_HASH_COST or DEFAULT_HASH_COSTS[scheme]
+    
+    configure_password_hashing(scheme, cost)
+    return password_policy
+
+def _normalize_password(password: str, scheme: Optional[str]) -> str:
+    # Truncate very long passwords to avoid bcrypt limitations
+    # (bcrypt ignores bytes past 72 anyway, so verification is unaffected).
+    # argon2 hashes the whole password.
+    if scheme == "bcrypt" and len(password) > 72:
+        password = password[:72]
+    return password
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    scheme = pwd_context.identify(hashed_password, required=False)
+    return pwd_context.verify(_normalize_password(plain_password, scheme), hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a fresh hash if the stored one is outdated"""
+    # Not pwd_context.verify_and_update: a bcrypt hash is verified with the truncated
+    # password, but its argon2 replacement must hash the full one
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if pwd_context.needs_update(hashed_password):
+        return True, get_password_hash(plain_password)
+    return True, None
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    # Truncate very long passwords to avoid bcrypt limitations
-    if len(password) > 72:
-        password = password[:72]
-    return pwd_context.hash(password)
+    return pwd_context.hash(_normalize_password(password, password_policy[0]))
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
@@ -35,14 +124,30 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    
+    if key_ring:
+        encoded_jwt = jwt.encode(
+            to_encode,
+            key_ring.signing_key,
+            algorithm=settings.ALGORITHM,
+            headers={"kid": key_ring.active_kid}
+        )
+    else:
+        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     return encoded_jwt
 
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode JWT access token"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        if key_ring:
+            key = key_ring.public_key(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                return None
+        else:
+            key = settings.SECRET_KEY
+        
+        payload = jwt.decode(token, key, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
         return None
\ No newline at end of file
@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils.conditions import MAX_CONDITION_LENGTH, compile_condition, get_evaluator
+
+
+def at(hour, minute=0, day=5):
+    # 2026-10-05 is a Monday
+    return datetime(2026, 10, day, hour, minute, tzinfo=timezone.utc)
+
+
+def test_attribute_comparison():
+    evaluate = compile_condition("resource.owner_id == user.id")
+    assert evaluate({"user": {"id": 1}, "resource": {"owner_id": 1}})
+    assert not evaluate({"user": {"id": 1}, "resource": {"owner_id": 2}})
+
+
+def test_missing_attribute_fails_closed():
+    evaluate = compile_condition("resource.owner_id == user.id")
+    assert not evaluate({"user": {"id": 1}})
+    assert not evaluate({})
+    # Even when the comparison would hold for a missing value
+    assert not compile_condition("resource.owner_id != user.id")({"user": {"id": 1}})
+    assert not compile_condition("not resource.archived")({})
+
+
+def test_type_mismatch_fails_closed():
+    assert not compile_condition("user.level > 3")({"user": {"level": "high"}})
+    assert not compile_condition("user.id in resource.members")({"user": {"id": 1}, "resource": {"members": 5}})
+
+
+def test_boolean_operators_and_membership():
+    evaluate = compile_condition("user.role in ['admin', 'owner'] and not resource.locked")
+    assert evaluate({"user": {"role": "owner"}, "resource": {"locked": False}})
+    assert not evaluate({"user": {"role": "owner"}, "resource": {"locked": True}})
+    assert not evaluate({"user": {"role": "guest"}, "resource": {"locked": False}})
+
+
+def test_chained_comparison():
+    evaluate = compile_condition("1 <= user.level < 5")
+    assert evaluate({"user": {"level": 1}})
+    assert not evaluate({"user": {"level": 5}})
+
+
+def test_ip_in():
+    evaluate = compile_condition("ip_in(request.ip, '10.0.0.0/8', '192.168.1.0/24')")
+    assert evaluate({"request": {"ip": "10.1.2.3"}})
+    assert evaluate({"request": {"ip": "192.168.1.9"}})
+    assert not evaluate({"request": {"ip": "172.16.0.1"}})
+    assert not evaluate({"request": {"ip": "not-an-ip"}})
+    assert not evaluate({"request": {"ip": None}})
+    assert not evaluate({})
+
+
+def test_time_between_within_a_day():
+    evaluate = compile_condition("time_between('09:00', '17:00')")
+    assert evaluate({"now": at(9)})
+    assert evaluate({"now": at(16, 59)})
+    assert not evaluate({"now": at(17)})
+    assert not evaluate({"now": at(8, 59)})
+
+
+def test_time_between_wraps_past_midnight():
+    evaluate = compile_condition("time_between('22:00', '06:00')")
+    assert evaluate({"now": at(22)})
+    assert evaluate({"now": at(23, 30)})
+    assert evaluate({"now": at(0)})
+    assert evaluate({"now": at(5, 59)})
+    assert not evaluate({"now": at(6)})
+    assert not evaluate({"now": at(12)})
+    assert not evaluate({"now": at(21, 59)})
+
+
+def test_time_between_in_time_zone():
+    # 07:30 UTC is 09:30 in Berlin in October (CEST)
+    evaluate = compile_condition("time_between('09:00', '17:00', 'Europe/Berlin')")
+    assert evaluate({"now": at(7, 30)})
+    assert not evaluate({"now": at(16)})
+
+
+def test_weekday_in():
+    evaluate = compile_condition("weekday_in('mon', 'fri')")
+    assert evaluate({"now": at(12, day=5)})
+    assert evaluate({"now": at(12, day=9)})
+    assert not evaluate({"now": at(12, day=6)})
+    # Monday 23:30 UTC is already Tuesday in Tokyo
+    assert not compile_condition("weekday_in('mon', 'Asia/Tokyo')")({"now": at(23, 30, day=5)})
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('true')",
+    "open('/etc/passwd')",
+    "user['id'] == 1",
+    "lambda: True",
+    "x == 1",
+    "user.id +",
+    "time_between('9am', '5pm')",
+    "time_between('09:00', '17:00', 'Mars/Olympus')",
+    "ip_in(request.ip, 'not-a-range')",
+    "weekday_in('someday')",
+])
+def test_rejects_expressions_outside_the_grammar(expression):
+    with pytest.raises(ValueError):
+        compile_condition(expression)
+
+
+def test_length_limit():
+    with pytest.raises(ValueError):
+        compile_condition("user.id == 1 or " * (MAX_CONDITION_LENGTH // 10) + "True")
+
+
+def test_get_evaluator_reuses_compiled_closure():
+    assert get_evaluator("user.id == 1") is get_evaluator("user.id == 1")
@@ -0,0 +1,118 @@
+import pytest
+
+from app.utils.permission_matcher import (
+    PermissionMatcher,
+    validate_action_pattern,
+    validate_resource_pattern,
+)
+
+
+def always(context):
+    return True
+
+
+def never(context):
+    return False
+
+
+def test_exact_grant():
+    matcher = PermissionMatcher([("reports/finance", "read")])
+    assert matcher.allows("reports/finance", "read")
+    assert not matcher.allows("reports/finance", "write")
+    assert not matcher.allows("reports", "read")
+    assert not matcher.allows("reports/finance/q1", "read")
+
+
+def test_subtree_wildcard_covers_paths_below_prefix():
+    matcher = PermissionMatcher([("reports/*", "read")])
+    assert matcher.allows("reports/finance", "read")
+    assert matcher.allows("reports/finance/q1", "read")
+    assert not matcher.allows("reports/finance", "write")
+
+
+def test_subtree_wildcard_does_not_cover_prefix_itself():
+    matcher = PermissionMatcher([("reports/*", "read")])
+    assert not matcher.allows("reports", "read")
+    assert not matcher.allows("reportsx", "read")
+
+
+def test_root_wildcard_and_action_wildcard():
+    assert PermissionMatcher([("*", "read")]).allows("anything/at/all", "read")
+    assert not PermissionMatcher([("*", "read")]).allows("anything", "write")
+    assert PermissionMatcher([("reports", "*")]).allows("reports", "delete")
+    assert PermissionMatcher([("reports/*", "*")]).allows("reports/finance", "delete")
+
+
+def test_no_grants():
+    assert not PermissionMatcher([]).allows("reports", "read")
+
+
+def test_unconditional_grant_wins_without_evaluating_conditions():
+    calls = []
+
+    def tracked(context):
+        calls.append(context)
+        return False
+
+    matcher = PermissionMatcher([("reports/*", "read")], [("reports/finance", "read", tracked)])
+    assert matcher.allows("reports/finance", "read", {})
+    assert calls == []
+
+
+def test_conditional_candidates_collected_along_path():
+    # A failing subtree condition higher up must not hide a passing one further down
+    matcher = PermissionMatcher([], [
+        ("*", "read", never),
+        ("reports/*", "read", never),
+        ("reports/finance/*", "read", always),
+    ])
+    assert matcher.allows("reports/finance/q1", "read")
+    assert not matcher.allows("reports/hr/q1", "read")
+
+
+def test_conditional_exact_grant_checked_at_leaf():
+    matcher = PermissionMatcher([], [("reports/finance", "read", always)])
+    assert matcher.allows("reports/finance", "read")
+    assert not matcher.allows("reports/finance/q1", "read")
+    assert not matcher.allows("reports", "read")
+
+
+def test_conditional_subtree_candidates_kept_when_path_leaves_trie():
+    matcher = PermissionMatcher([], [("reports/*", "read", always)])
+    assert matcher.allows("reports/unknown/deeper", "read")
+
+
+def test_conditional_subtree_does_not_cover_prefix_itself():
+    matcher = PermissionMatcher([], [("reports/*", "read", always)])
+    assert not matcher.allows("reports", "read")
+
+
+def test_conditional_action_must_match():
+    matcher = PermissionMatcher([], [("reports", "read", always), ("docs", "*", always)])
+    assert not matcher.allows("reports", "write")
+    assert matcher.allows("docs", "write")
+
+
+def test_conditions_receive_context():
+    matcher = PermissionMatcher([], [("reports", "read", lambda context: context.get("ok") is True)])
+    assert matcher.allows("reports", "read", {"ok": True})
+    assert not matcher.allows("reports", "read", {"ok": False})
+    assert not matcher.allows("reports", "read")
+
+
+@pytest.mark.parametrize("resource", ["reports", "reports/finance", "reports/*", "*"])
+def test_valid_resource_patterns(resource):
+    assert validate_resource_pattern(resource) == resource
+
+
+@pytest.mark.parametrize("resource", ["", "reports/", "/reports", "reports//q1", "*/finance", "reports/fin*", "re*"])
+def test_invalid_resource_patterns(resource):
+    with pytest.raises(ValueError):
+        validate_resource_pattern(resource)
+
+
+def test_action_patterns():
+    assert validate_action_pattern("read") == "read"
+    assert validate_action_pattern("*") == "*"
+    with pytest.raises(ValueError):
+        validate_action_pattern("re*")